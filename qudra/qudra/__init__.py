@@ -1,8 +1,10 @@
 """
 qudra: quantum energy management
 """
+
 import os
 
+from . import optimizers
 from .optimizers import *
 
 with open(
@@ -12,3 +14,8 @@ with open(
 
 __author__ = "Asil Qraini, Fouad Afiouni, Gargi Chandrakar, Nurgazy Seidaliev, Sahar Ben Rached, Salem Al Haddad, Sarthak Prasad Malla. Mentors: Akash Kant, Shantanu Jha."
 __credits__ = "qudra dev team"
+
+
+def __getattr__(name: str):
+    # lazily imported names of the optimizers package, e.g. SimulatedQPUSampler
+    return getattr(optimizers, name)
@@ -0,0 +1,7 @@
+"""
+qudra benchmarks: timing, memory and solution quality across network sizes
+
+Run from the command line with `python -m qudra.benchmarks --help`.
+"""
+
+from .distributed_energy import *
@@ -0,0 +1,3 @@
+from .distributed_energy import main
+
+main()
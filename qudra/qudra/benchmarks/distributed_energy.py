@@ -0,0 +1,398 @@
+"""
+DistributedEnergyOptimizer benchmarks
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from ..optimizers.distributed_energy import DistributedEnergyOptimizer
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# solver name -> (run function, largest number of variables it is run on)
+SOLVERS: Dict[str, Tuple[Callable[..., Any], Optional[int]]] = {
+    "exact_dp": (
+        lambda optimizer, seed: optimizer.run_exact_dp(label="exact_dp"),
+        None,
+    ),
+    "classical": (
+        lambda optimizer, seed: optimizer.run_classical(label="classical"),
+        16,
+    ),
+    "annealer_sim": (
+        lambda optimizer, seed: optimizer.run_annealer_sim(
+            label="annealer_sim", num_shots=100, engine="qudra", seed=seed
+        ),
+        None,
+    ),
+    "annealer_sim_dimod": (
+        lambda optimizer, seed: optimizer.run_annealer_sim(
+            label="annealer_sim_dimod", num_shots=10, engine="dimod", seed=seed
+        ),
+        40,
+    ),
+    "qaoa_fast": (
+        lambda optimizer, seed: optimizer.run_qaoa(
+            label="qaoa_fast", backend="fast_statevector", seed=seed
+        ),
+        18,
+    ),
+    "vqe_fast": (
+        lambda optimizer, seed: optimizer.run_vqe(
+            label="vqe_fast", backend="fast_statevector", seed=seed
+        ),
+        14,
+    ),
+    "qaoa": (lambda optimizer, seed: optimizer.run_qaoa(label="qaoa"), 10),
+    "vqe": (lambda optimizer, seed: optimizer.run_vqe(label="vqe"), 10),
+}
+
+
+def gen_benchmark_params(n: int, N: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generate a reproducible random network of n plants with N power level steps.
+
+    P_min and the power level step (P_max - P_min) / N are given to one decimal, so
+    that every power level lies on a 0.1 grid and run_exact_dp is exact on small
+    instances. The demand is 60% of the total capacity.
+
+    Args:
+        n (int):
+            number of plants
+        N (int):
+            number of power level steps
+        seed (int):
+            random seed
+
+    Returns:
+        params (dict):
+            DistributedEnergyOptimizer parameters
+    """
+    rng = np.random.default_rng(seed)
+    P_min = np.round(rng.uniform(0.5, 2.0, n), 1)
+    step = np.maximum(np.round(rng.uniform(1.0, 4.0, n) / N, 1), 0.1)
+    P_max = np.round(P_min + N * step, 1)
+    return {
+        "A": rng.uniform(1.0, 5.0, n).tolist(),
+        "B": rng.uniform(0.5, 2.0, n).tolist(),
+        "C": rng.uniform(0.05, 0.5, n).tolist(),
+        "P_min": P_min.tolist(),
+        "P_max": P_max.tolist(),
+        "L": float(np.round(0.6 * P_max.sum(), 1)),
+        "N": N,
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process so far, in MiB
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _measure(
+    func: Callable[[], Any], trace_memory: bool = True
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run func once and record its wall time and memory use. Errors are recorded
+    instead of raised, so that one failing stage does not end a sweep.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    value, error = None, None
+    try:
+        value = func()
+    except Exception as err:  # pylint: disable=broad-except
+        error = f"{type(err).__name__}: {err}"
+    record: Dict[str, Any] = {"time_s": time.perf_counter() - start}
+    if trace_memory:
+        record["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    record["peak_rss_mb"] = _peak_rss_mb()
+    if error is not None:
+        record["error"] = error
+    return value, record
+
+
+def _solve(
+    optimizer: DistributedEnergyOptimizer,
+    run: Callable[..., Any],
+    seed: int,
+) -> Tuple[Any, float]:
+    """
+    Run a solver and evaluate the QUBO energy of its optimal state
+    """
+    result = run(optimizer, seed)
+    state = optimizer._best_state(result)
+    return result, float(optimizer.qubo_energies([state])[0])
+
+
+def benchmark_instance(
+    params: Dict[str, Any],
+    solvers: Sequence[str] = ("exact_dp", "annealer_sim"),
+    num_samples: int = 1000,
+    seed: int = 0,
+    trace_memory: bool = True,
+    warm_up: bool = True,
+) -> Dict[str, Any]:
+    """
+    Benchmark the model building stages and solvers on a single network.
+
+    Model stages are run on a fresh optimizer in pipeline order: gen_coeff_arrays,
+    gen_coeff, gen_quadratic_program, _convert_coeff, gen_ising_model, and
+    parse_params / decode_samples on num_samples random valid states. Solvers
+    larger than their SOLVERS size limit are skipped.
+
+    Args:
+        params (dict):
+            DistributedEnergyOptimizer parameters
+        solvers (Sequence[str]):
+            names of SOLVERS to run
+        num_samples (int):
+            number of states to parse
+        seed (int):
+            random seed for the states and the solvers
+        trace_memory (bool):
+            whether to record the peak traced allocation of every stage, which
+            slows down allocation-heavy stages
+        warm_up (bool):
+            whether to first run the stages and solvers on a small throwaway
+            network, so that one-time costs such as importing the backends
+            (dimod, qiskit, ...) are not timed
+
+    Returns:
+        record (dict):
+            "n", "N", "encoding", "num_vars", "stages" and "solvers" records keyed
+            by name, "best_known_cost" and "best_known_solver". Every solver record
+            has its "opt_cost" and "gap" to the best known cost.
+    """
+    if warm_up:
+        benchmark_instance(
+            dict(
+                gen_benchmark_params(2, 1, seed=seed),
+                **{key: params[key] for key in ("encoding", "sparse") if key in params},
+            ),
+            solvers=solvers,
+            num_samples=1,
+            seed=seed,
+            trace_memory=False,
+            warm_up=False,
+        )
+
+    optimizer = DistributedEnergyOptimizer(params)
+    registry = optimizer.variables
+    record: Dict[str, Any] = {
+        "n": optimizer.params["n"],
+        "N": optimizer.params["N"],
+        "encoding": optimizer.params["encoding"],
+        "num_vars": registry.num_vars,
+        "stages": {},
+        "solvers": {},
+    }
+    stages = record["stages"]
+
+    # model building
+    # ==========================================================================
+    _, stages["gen_coeff_arrays"] = _measure(
+        optimizer._ensure_coeff_arrays, trace_memory
+    )
+    _, stages["gen_coeff"] = _measure(optimizer.gen_coeff, trace_memory)
+    _, stages["gen_quadratic_program"] = _measure(
+        optimizer.gen_quadratic_program, trace_memory
+    )
+    _, stages["_convert_coeff"] = _measure(optimizer._convert_coeff, trace_memory)
+    _, stages["gen_ising_model"] = _measure(optimizer.gen_ising_model, trace_memory)
+
+    rng = np.random.default_rng(seed)
+    states = registry.encode(
+        rng.random((num_samples, registry.n)) < 0.8,
+        rng.integers(0, registry.N + 1, (num_samples, registry.n)),
+    )
+    names = optimizer.variable_names
+    _, stages["parse_params"] = _measure(
+        lambda: [optimizer.parse_params(state.tolist(), names) for state in states],
+        trace_memory,
+    )
+    _, stages["decode_samples"] = _measure(
+        lambda: optimizer.decode_samples(states), trace_memory
+    )
+    for stage in ("parse_params", "decode_samples"):
+        stages[stage]["num_samples"] = num_samples
+
+    # solvers
+    # ==========================================================================
+    for name in solvers:
+        if name not in SOLVERS:
+            raise ValueError(f"Unknown solver {name}, use one of {list(SOLVERS)}.")
+        run, max_vars = SOLVERS[name]
+        if max_vars is not None and registry.num_vars > max_vars:
+            record["solvers"][name] = {"skipped": f"more than {max_vars} variables"}
+            continue
+        solved, solver_record = _measure(
+            lambda: _solve(optimizer, run, seed), trace_memory
+        )
+        if solved is not None:
+            result, solver_record["opt_cost"] = solved
+            if name == "exact_dp":
+                solver_record["exact"] = result.extras["exact"]
+        record["solvers"][name] = solver_record
+
+    # solution quality
+    # ==========================================================================
+    costs = {
+        name: solver["opt_cost"]
+        for name, solver in record["solvers"].items()
+        if "opt_cost" in solver
+    }
+    record["best_known_cost"] = min(costs.values()) if costs else None
+    record["best_known_solver"] = min(costs, key=costs.get) if costs else None
+    for name, cost in costs.items():
+        record["solvers"][name]["gap"] = cost - record["best_known_cost"]
+    return record
+
+
+def run_benchmarks(
+    ns: Sequence[int] = (2, 4, 8),
+    Ns: Sequence[int] = (1, 3, 7),
+    encodings: Sequence[str] = ("one_hot",),
+    solvers: Sequence[str] = ("exact_dp", "classical", "annealer_sim", "qaoa_fast"),
+    num_samples: int = 1000,
+    seed: int = 0,
+    trace_memory: bool = True,
+    output: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Benchmark every combination of number of plants n, number of power level steps
+    N and encoding.
+
+    Args:
+        ns (Sequence[int]):
+            numbers of plants
+        Ns (Sequence[int]):
+            numbers of power level steps
+        encodings (Sequence[str]):
+            variable encodings, see VariableRegistry
+        solvers (Sequence[str]):
+            names of SOLVERS to run
+        num_samples (int):
+            number of states to parse per instance
+        seed (int):
+            random seed for the networks, states and solvers
+        trace_memory (bool):
+            whether to record the peak traced allocation of every stage
+        output (Optional[str]):
+            path of a JSON file to write the report to
+
+    Returns:
+        report (dict):
+            machine-readable report with the environment ("qudra_version",
+            "python", "platform", "numpy", "timestamp"), the sweep "config" and one
+            benchmark_instance record per instance in "results"
+    """
+    from .. import __version__
+
+    report: Dict[str, Any] = {
+        "qudra_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "config": {
+            "ns": list(ns),
+            "Ns": list(Ns),
+            "encodings": list(encodings),
+            "solvers": list(solvers),
+            "num_samples": num_samples,
+            "seed": seed,
+            "trace_memory": trace_memory,
+        },
+        "results": [],
+    }
+    for n in ns:
+        for N in Ns:
+            params = gen_benchmark_params(n, N, seed=seed)
+            for encoding in encodings:
+                report["results"].append(
+                    benchmark_instance(
+                        dict(params, encoding=encoding),
+                        solvers=solvers,
+                        num_samples=num_samples,
+                        seed=seed,
+                        trace_memory=trace_memory,
+                        warm_up=not report["results"],
+                    )
+                )
+
+    if output is not None:
+        with open(output, "w") as out_file:
+            json.dump(report, out_file, indent=2, default=_to_json)
+    return report
+
+
+def _to_json(value: Any) -> Any:
+    """
+    JSON fallback for NumPy scalars
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point, e.g.
+
+        python -m qudra.benchmarks --n 2 4 8 --N 3 7 --output bench.json
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m qudra.benchmarks",
+        description="Benchmark qudra over a grid of plants and power levels.",
+    )
+    parser.add_argument("--n", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--N", type=int, nargs="+", default=[1, 3, 7])
+    parser.add_argument("--encodings", nargs="+", default=["one_hot"])
+    parser.add_argument(
+        "--solvers",
+        nargs="+",
+        default=["exact_dp", "classical", "annealer_sim", "qaoa_fast"],
+        choices=list(SOLVERS),
+    )
+    parser.add_argument("--num-samples", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-trace-memory", action="store_true")
+    parser.add_argument("--output", default="qudra_benchmarks.json")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        ns=args.n,
+        Ns=args.N,
+        encodings=args.encodings,
+        solvers=args.solvers,
+        num_samples=args.num_samples,
+        seed=args.seed,
+        trace_memory=not args.no_trace_memory,
+        output=args.output,
+    )
+    for result in report["results"]:
+        stages = ", ".join(
+            f"{name} {stage['time_s']:.3g}s" for name, stage in result["stages"].items()
+        )
+        print(f"n={result['n']} N={result['N']} {result['encoding']}: {stages}")
+    print(f"Report written to {args.output}")
@@ -3,3 +3,21 @@ Optimizers
 """
 
 from .distributed_energy import *
+from .annealing import *
+from .variables import *
+from .statevector import *
+from .cache import *
+from .store import *
+from .samples import *
+from .structured import *
+from .multiperiod import *
+
+
+def __getattr__(name: str):
+    # SimulatedQPUSampler subclasses dimod's samplers, so its module is only
+    # imported, with D-Wave's packages, when it is first used
+    if name == "SimulatedQPUSampler":
+        from .qpu import SimulatedQPUSampler
+
+        return SimulatedQPUSampler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
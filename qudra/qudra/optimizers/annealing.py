@@ -0,0 +1,258 @@
+"""
+GroupAnnealer
+"""
+
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse
+
+
+class GroupAnnealer:
+    """
+    Simulated annealing over a QUBO whose variables are partitioned into groups
+    that each only have a few valid assignments, e.g. the (v_i, z_i0, ..., z_iN)
+    one-hot group of every plant i.
+
+    Every replica always holds a valid configuration for every group. A move picks
+    a group and resamples its configuration from all valid ones with heat-bath
+    probabilities, so moves never leave the feasible subspace and the validity
+    penalty never has to be climbed over. All replicas are updated together as rows
+    of one NumPy array.
+    """
+
+    SCHEDULES = ["geometric", "linear"]
+
+    def __init__(
+        self,
+        linear: np.ndarray,
+        quadratic: Union[np.ndarray, scipy.sparse.spmatrix],
+        offset: float,
+        groups: np.ndarray,
+        configurations: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Creates GroupAnnealer object.
+
+        Args:
+            linear (np.ndarray):
+                linear coefficient vector with Q elements
+            quadratic (Union[np.ndarray, scipy.sparse.spmatrix]):
+                upper-triangular quadratic coefficient matrix of shape (Q, Q)
+            offset (float):
+                constant offset
+            groups (np.ndarray):
+                array of shape (num_groups, G) listing the variables of each group.
+                Every variable must belong to exactly one group.
+            configurations (Optional[np.ndarray]):
+                0/1 array of shape (K, G) with the valid assignments of a group's
+                variables. Defaults to one-hot assignments.
+        """
+        self._linear = np.asarray(linear, dtype=float)
+        self._offset = float(offset)
+        self._groups = np.asarray(groups)
+        num_groups, group_size = self._groups.shape
+        if configurations is None:
+            configurations = np.eye(group_size, dtype=np.int8)
+        self._configurations = np.asarray(configurations, dtype=float)
+
+        # symmetric coupling matrix W = U + U^T, so that dE/dx_j = l_j + (W x)_j
+        if scipy.sparse.issparse(quadratic):
+            self._coupling = (quadratic + quadratic.T).tocsr()
+        else:
+            self._coupling = quadratic + quadratic.T
+
+        # W restricted to each group, shape (num_groups, G, G)
+        shape = (num_groups, group_size, group_size)
+        rows = np.broadcast_to(self._groups[:, :, None], shape).ravel()
+        cols = np.broadcast_to(self._groups[:, None, :], shape).ravel()
+        self._group_coupling = np.asarray(self._coupling[rows, cols]).reshape(shape)
+        # sparse rows of every group's variables, see _coupling_rows
+        self._neighbors: Optional[dict] = None
+
+        # energy of every configuration of every group on its own, (num_groups, K)
+        cfg = self._configurations
+        self._group_energies = self._linear[self._groups] @ cfg.T + 0.5 * np.einsum(
+            "kg,ngh,kh->nk", cfg, self._group_coupling, cfg
+        )
+
+    @property
+    def configurations(self) -> np.ndarray:
+        return self._configurations
+
+    def _coupling_rows(self, group: int) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Rows of W of a group's variables, as (columns, block): for sparse
+        couplings only the columns with non-zero entries, so that updates of the
+        fields touch the group's neighbors only; for dense couplings all columns
+        (columns is None).
+        """
+        if not scipy.sparse.issparse(self._coupling):
+            return None, self._coupling[self._groups[group]]
+        if self._neighbors is None:
+            self._neighbors = {}
+        if group not in self._neighbors:
+            rows = self._coupling[self._groups[group]]
+            columns = np.unique(rows.indices)
+            self._neighbors[group] = (columns, rows[:, columns].toarray())
+        return self._neighbors[group]
+
+    def energies(self, states: np.ndarray) -> np.ndarray:
+        """
+        QUBO energy of a batch of 0/1 states of shape (R, Q).
+        """
+        x = np.asarray(states, dtype=float)
+        return (
+            self._offset + x @ self._linear + 0.5 * np.sum((x @ self._coupling) * x, 1)
+        )
+
+    def _group_deltas(
+        self, fields: np.ndarray, choice: np.ndarray, group: int
+    ) -> np.ndarray:
+        """
+        Energy change of switching a group to each of its configurations, for every
+        replica. Shape (R, K).
+        """
+        cfg = self._configurations
+        current = cfg[choice[:, group]]  # (R, G)
+        external = (
+            fields[:, self._groups[group]] - current @ self._group_coupling[group]
+        )
+        energies = self._group_energies[group] + external @ cfg.T
+        return energies - energies[np.arange(len(energies)), choice[:, group]][:, None]
+
+    def default_beta_range(
+        self,
+        num_samples: int = 32,
+        seed: Optional[Union[int, np.random.Generator]] = None,
+    ) -> Tuple[float, float]:
+        """
+        Inverse temperature range estimated from the group moves of random valid
+        states: the hottest beta accepts the largest uphill move with probability
+        1/2, the coldest accepts the smallest non-zero uphill move with
+        probability 1/100.
+        """
+        rng = np.random.default_rng(seed)
+        choice = self._random_choice(num_samples, rng)
+        fields = self._fields(choice)
+        deltas = np.abs(
+            np.concatenate(
+                [
+                    self._group_deltas(fields, choice, g).ravel()
+                    for g in range(len(self._groups))
+                ]
+            )
+        )
+        deltas = deltas[deltas > 1e-9 * max(deltas.max(), 1.0)]
+        if len(deltas) == 0:
+            return 0.1, 1.0
+        return np.log(2) / deltas.max(), np.log(100) / deltas.min()
+
+    def _random_choice(self, num_reads: int, rng: np.random.Generator) -> np.ndarray:
+        return rng.integers(
+            0, len(self._configurations), size=(num_reads, len(self._groups))
+        )
+
+    def _initial_choice(self, initial_states: np.ndarray) -> np.ndarray:
+        """
+        Configuration of every group closest (in Hamming distance) to the given
+        states, so invalid states are repaired to a nearby valid one.
+        """
+        grouped = np.asarray(initial_states, dtype=float)[:, self._groups]
+        distances = np.abs(
+            grouped[:, :, None, :] - self._configurations[None, None, :, :]
+        ).sum(axis=-1)
+        return np.argmin(distances, axis=-1)
+
+    def _fields(self, choice: np.ndarray) -> np.ndarray:
+        states = self.states(choice)
+        return np.asarray(states.astype(float) @ self._coupling)
+
+    def states(self, choice: np.ndarray) -> np.ndarray:
+        """
+        0/1 states of shape (R, Q) from the configuration index of every group,
+        shape (R, num_groups).
+        """
+        states = np.zeros((choice.shape[0], len(self._linear)), dtype=np.int8)
+        states[:, self._groups] = self._configurations[choice]
+        return states
+
+    def sample(
+        self,
+        num_reads: int = 100,
+        num_sweeps: int = 200,
+        beta_range: Optional[Tuple[float, float]] = None,
+        schedule: str = "geometric",
+        initial_states: Optional[Union[np.ndarray, List[List[int]]]] = None,
+        seed: Optional[Union[int, np.random.Generator]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run num_reads annealing replicas in parallel.
+
+        Args:
+            num_reads (int):
+                number of replicas
+            num_sweeps (int):
+                number of sweeps; a sweep visits every group once in random order
+            beta_range (Optional[Tuple[float, float]]):
+                (hot, cold) inverse temperatures. Defaults to default_beta_range().
+            schedule (str):
+                "geometric" or "linear" interpolation between the betas
+            initial_states (Optional[Union[np.ndarray, List[List[int]]]]):
+                0/1 states of shape (S, Q) to start from, tiled over the replicas.
+                Defaults to uniformly random valid states.
+            seed (Optional[Union[int, np.random.Generator]]):
+                random seed, or a generator to draw from, e.g. to continue its
+                stream over several calls
+
+        Returns:
+            states (np.ndarray): final 0/1 states of shape (num_reads, Q)
+            energies (np.ndarray): QUBO energies of shape (num_reads,)
+        """
+        if schedule not in self.SCHEDULES:
+            raise ValueError(
+                f"Unknown schedule {schedule}, use one of {self.SCHEDULES}."
+            )
+        rng = np.random.default_rng(seed)
+
+        if initial_states is None:
+            choice = self._random_choice(num_reads, rng)
+        else:
+            initial_states = np.atleast_2d(np.asarray(initial_states))
+            # repeat the given states over all replicas
+            tiled = np.resize(np.arange(len(initial_states)), num_reads)
+            choice = self._initial_choice(initial_states[tiled])
+
+        if beta_range is None:
+            beta_range = self.default_beta_range(seed=rng)
+        if schedule == "geometric":
+            betas = np.geomspace(beta_range[0], beta_range[1], num_sweeps)
+        else:
+            betas = np.linspace(beta_range[0], beta_range[1], num_sweeps)
+
+        cfg = self._configurations
+        fields = self._fields(choice)
+
+        for beta in betas:
+            for group in rng.permutation(len(self._groups)):
+                deltas = self._group_deltas(fields, choice, group)
+
+                # heat-bath choice of the group's configuration
+                weights = np.exp(-beta * (deltas - deltas.min(axis=1, keepdims=True)))
+                cumulative = np.cumsum(weights, axis=1)
+                threshold = rng.random(num_reads) * cumulative[:, -1]
+                new = (cumulative < threshold[:, None]).sum(axis=1)
+
+                moved = new != choice[:, group]
+                if not moved.any():
+                    continue
+                change = cfg[new[moved]] - cfg[choice[moved, group]]
+                columns, block = self._coupling_rows(group)
+                if columns is None:
+                    fields[moved] += change @ block
+                else:
+                    fields[np.ix_(moved, columns)] += change @ block
+                choice[moved, group] = new[moved]
+
+        states = self.states(choice)
+        return states, self.energies(states)
@@ -0,0 +1,224 @@
+"""
+ModelCache
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+
+# bump when the layout of cached entries changes
+CACHE_FORMAT = 1
+
+
+def params_hash(params: Dict[str, Any], keys: Optional[Sequence[str]] = None) -> str:
+    """
+    Content hash of model parameters.
+
+    Args:
+        params (dict):
+            model parameters. Array-like values are hashed by value, so lists,
+            tuples and NumPy arrays with the same entries give the same hash.
+        keys (Optional[Sequence[str]]):
+            parameters to include. Defaults to all of them.
+
+    Returns:
+        key (str):
+            hex SHA-256 digest
+    """
+    keys = sorted(params) if keys is None else sorted(keys)
+    canonical = {}
+    for key in keys:
+        value = params.get(key)
+        if isinstance(value, (list, tuple, np.ndarray, np.generic)):
+            value = np.asarray(value).tolist()
+        canonical[key] = value
+    payload = json.dumps(
+        {"format": CACHE_FORMAT, "params": canonical}, sort_keys=True, default=repr
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ModelCache:
+    """
+    Content-addressed on-disk cache of model artifacts, bounded in size with least
+    recently used eviction.
+
+    Every key (see params_hash) has its own directory holding named items. Items
+    that are dicts of NumPy arrays are stored as .npz files, anything else (e.g.
+    a QuadraticProgram or Pauli operator) is pickled, so the cache directory must
+    only be shared with trusted writers. Writes are atomic, so concurrent
+    processes may share a cache directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2**30) -> None:
+        """
+        Creates ModelCache object.
+
+        Args:
+            directory (str):
+                cache directory, created if it does not exist
+            max_bytes (int):
+                size bound of the cache. Least recently used keys are evicted when
+                it is exceeded.
+        """
+        self._directory = os.path.abspath(os.path.expanduser(directory))
+        self._max_bytes = max_bytes
+        os.makedirs(self._directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self._directory, key)
+
+    def _path(self, key: str, name: str, suffix: str) -> str:
+        return os.path.join(self._entry(key), name + suffix)
+
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._entry(key))
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isdir(self._entry(key))
+
+    def keys(self) -> List[str]:
+        """
+        Cached keys, least recently used first
+        """
+        entries = [
+            entry
+            for entry in os.listdir(self._directory)
+            if os.path.isdir(self._entry(entry)) and not entry.startswith(".")
+        ]
+        return sorted(entries, key=lambda entry: os.path.getmtime(self._entry(entry)))
+
+    # Items
+    # ==============================================================================
+    def get(self, key: str, name: str) -> Optional[Any]:
+        """
+        Load an item, or None if it is not cached.
+
+        Args:
+            key (str):
+                model key
+            name (str):
+                item name, e.g. "coeffs"
+
+        Returns:
+            value (Optional[Any]):
+                dict of arrays for .npz items, the unpickled object otherwise
+        """
+        value: Optional[Any] = None
+        arrays_path = self._path(key, name, ".npz")
+        object_path = self._path(key, name, ".pkl")
+        try:
+            if os.path.exists(arrays_path):
+                with np.load(arrays_path, allow_pickle=False) as data:
+                    value = {field: data[field] for field in data.files}
+            elif os.path.exists(object_path):
+                with open(object_path, "rb") as in_file:
+                    value = pickle.load(in_file)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            # a concurrently evicted or truncated item is a cache miss
+            return None
+        if value is not None:
+            self._touch(key)
+        return value
+
+    def put(self, key: str, name: str, value: Any) -> None:
+        """
+        Store an item and evict least recently used keys if the cache is too large.
+
+        Args:
+            key (str):
+                model key
+            name (str):
+                item name, e.g. "coeffs"
+            value (Any):
+                dict of NumPy arrays, or any picklable object
+        """
+        os.makedirs(self._entry(key), exist_ok=True)
+        is_arrays = isinstance(value, dict) and all(
+            isinstance(item, (np.ndarray, np.generic, int, float))
+            for item in value.values()
+        )
+        suffix = ".npz" if is_arrays else ".pkl"
+
+        handle, tmp_path = tempfile.mkstemp(dir=self._entry(key), suffix=".tmp")
+        with os.fdopen(handle, "wb") as out_file:
+            if is_arrays:
+                np.savez(out_file, **value)
+            else:
+                pickle.dump(value, out_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key, name, suffix))
+        self._touch(key)
+        self.evict(keep=key)
+
+    # Eviction
+    # ==============================================================================
+    def _entry_bytes(self, key: str) -> int:
+        entry = self._entry(key)
+        try:
+            return sum(
+                os.path.getsize(os.path.join(entry, item)) for item in os.listdir(entry)
+            )
+        except FileNotFoundError:
+            return 0
+
+    def size(self) -> int:
+        """
+        Total size of all cached items in bytes
+        """
+        return sum(self._entry_bytes(key) for key in self.keys())
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Remove least recently used keys until the cache fits in max_bytes.
+
+        Args:
+            keep (Optional[str]):
+                key that is never evicted, e.g. the one just written
+
+        Returns:
+            evicted (List[str]):
+                removed keys
+        """
+        keys = self.keys()
+        sizes = {key: self._entry_bytes(key) for key in keys}
+        total = sum(sizes.values())
+        evicted = []
+        for key in keys:
+            if total <= self._max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= sizes[key]
+            evicted.append(key)
+        return evicted
+
+    def remove(self, key: str) -> None:
+        """
+        Remove all items of a key
+        """
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+
+    def clear(self) -> None:
+        """
+        Remove all keys
+        """
+        for key in self.keys():
+            self.remove(key)
@@ -2,26 +2,52 @@
 DistributedEnergyOptimizer
 """
 
-from typing import Dict, List, Tuple, Any, Optional
-
-from braket.ocean_plugin import BraketDWaveSampler
-from dwave.system.composites import EmbeddingComposite
-from matplotlib import rcParams
-from qiskit import Aer
-from qiskit.algorithms import QAOA, VQE, NumPyMinimumEigensolver
-from qiskit.utils import QuantumInstance, algorithm_globals
-from qiskit_optimization import QuadraticProgram
-from qiskit_optimization.algorithms import MinimumEigenOptimizer, GroverOptimizer
-
-import dimod
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    Any,
+    Optional,
+    Union,
+)
+import contextlib
+import copy
+import functools
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+
 import numpy as np
-import seaborn as sns
+import scipy.sparse
+
+from .annealing import GroupAnnealer
+from .cache import ModelCache, params_hash
+from .statevector import StatevectorAnsatz, cost_diagonal
+from .structured import StructuredEnergyModel
+from .samples import SampleAggregator, SampleSummary, time_to_solution
+from .store import ResultStore, SQLiteResultStore, result_key
+from .variables import VariableRegistry
+
+# Quantum backends and plotting take seconds to import, so they are imported by the
+# methods that use them and only type checkers see them here.
+if TYPE_CHECKING:
+    from qiskit.utils import QuantumInstance
+    from qiskit_optimization import QuadraticProgram
+    from qiskit_optimization.algorithms import MinimumEigenOptimizer
+
+    import dimod
 
 
 def gen_transportation_losses(
-    distances: List[float],
-) -> List[Tuple[float, float, float]]:
+    distances: Union[List[float], np.ndarray],
+) -> np.ndarray:
     """
     Generate Transportation Losses
 
@@ -32,87 +58,354 @@ def gen_transportation_losses(
     quadratic ramp-up cost: Ci = (distance_i - avg_distance)/std_distance
 
     Args:
-        distances (List[float]):
+        distances (Union[List[float], np.ndarray]):
             Distances of plants from the center of a city/state/country.
             This list has n elements, where n is the number of plants.
 
     Returns:
-        cost (List[Tuple[float,float,float]]):
-            List of transportation loss related costs for each plant.
-            Each element has the form (Ai, Bi, Ci) as described above.
-            This list has n elements, where n is the number of plants.
+        cost (np.ndarray):
+            Transportation loss related costs for each plant, shape (n, 3).
+            Row i is (Ai, Bi, Ci) as described above.
     """
-    n = len(distances)
-    avg_distance = np.mean(distances)
-    std_distance = np.std(distances)
-    cost: List[Tuple[float, float, float]] = []
-    for i in range(n):
-        cost.append(
-            (
-                0.0,  # Ai
-                distances[i] / avg_distance,  # Bi
-                (distances[i] - avg_distance) / std_distance,  # Ci
-            )
+    distances = np.asarray(distances, dtype=float)
+    avg_distance = distances.mean()
+    std_distance = distances.std()
+    return np.stack(
+        [
+            np.zeros_like(distances),  # Ai
+            distances / avg_distance,  # Bi
+            (distances - avg_distance) / std_distance,  # Ci
+        ],
+        axis=-1,
+    )
+
+
+def _cost_tensor(
+    cost_types: Any,
+    weights: Optional[Union[Dict[str, float], List[float], np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[List[str]], List[str]]:
+    """
+    Stack the costs of every cost type into one tensor.
+
+    Args:
+        cost_types (Any):
+            see gen_params_multicost
+        weights (Optional[Union[Dict[str, float], List[float], np.ndarray]]):
+            see gen_params_multicost. Defaults to 1 for every cost type.
+
+    Returns:
+        costs (np.ndarray): (cost_types, n, 3) tensor of (A, B, C) per plant
+        weights (np.ndarray): (cost_types,) weight of each cost type
+        plants (Optional[List[str]]): plant names, if the costs name them
+        names (List[str]): cost type names, their indices for an array
+    """
+    if isinstance(cost_types, str):
+        import pandas as pd
+
+        cost_types = pd.read_parquet(cost_types)
+
+    if hasattr(cost_types, "columns"):  # pandas DataFrame in long format
+        import pandas as pd
+
+        if weights is None:
+            weights = dict.fromkeys(pd.unique(cost_types["cost_type"]), 1.0)
+        if not isinstance(weights, dict):
+            raise ValueError("Please provide weights by cost type for a DataFrame.")
+        names = list(weights)
+        types = pd.Categorical(cost_types["cost_type"], categories=names).codes
+        if np.any(types < 0):
+            unknown = set(cost_types["cost_type"]) - set(names)
+            raise ValueError(f"Please provide weights for cost types {unknown}.")
+        plant_index, plants = pd.factorize(cost_types["plant"])
+        costs = np.zeros((len(names), len(plants), 3))
+        costs[types, plant_index] = cost_types[["A", "B", "C"]].to_numpy(dtype=float)
+        weights = np.array([weights[name] for name in names])
+        return costs, weights, list(plants), names
+
+    if isinstance(cost_types, dict):
+        names = list(cost_types)
+        costs = np.stack([np.asarray(cost_types[name], dtype=float) for name in names])
+        if isinstance(weights, dict):
+            weights = [weights[name] for name in names]
+    else:
+        costs = np.asarray(cost_types, dtype=float)
+        names = [str(t) for t in range(len(costs))]
+    if weights is None:
+        weights = np.ones(len(costs))
+    weights = np.asarray(weights, dtype=float)
+    if costs.ndim != 3 or costs.shape[2] != 3 or weights.shape != costs.shape[:1]:
+        raise ValueError(
+            f"Please provide costs of shape (cost_types, n, 3) and one weight per "
+            f"cost type, got {costs.shape} and {weights.shape}."
         )
-    return cost
+    return costs, weights, None, names
 
 
 def gen_params_multicost(
-    cost_types: Dict[str, List[Tuple[float, float, float]]],
-    weights: Dict[str, float],
+    cost_types: Any,
+    weights: Union[Dict[str, float], List[float], np.ndarray],
     params: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Generate model parameters
 
     Args:
-        cost_type (dict):
-            key (str): e.g. CO2 emissions
-            val (list[tuple(float,float,float)]): [(A, B, C),...]
-            e.g.:
-                cost_types = {
-                    "CO2": [(A1,B1,C1),(A2,B2,C2),(A3,B3,C3)],
-                    "Efficiency": [(A1,B1,C1),(A2,B2,C2),(A3,B3,C3)],
-                    "Transportation Loss": [(A1,B1,C1),(A2,B2,C2),(A3,B3,C3)],
-                }
+        cost_types (Any):
+            (A, B, C) costs of every plant per cost type, either as
+
+            a dict:
+                key (str): e.g. CO2 emissions
+                val (array-like): [(A1,B1,C1),(A2,B2,C2),...] of shape (n, 3)
+                e.g.:
+                    cost_types = {
+                        "CO2": [(A1,B1,C1),(A2,B2,C2),(A3,B3,C3)],
+                        "Efficiency": [(A1,B1,C1),(A2,B2,C2),(A3,B3,C3)],
+                        "Transportation Loss": gen_transportation_losses(d),
+                    }
+
+            a (cost_types, n, 3) array,
+
+            or a pandas DataFrame (or the path of a Parquet file holding one) with
+            one row per cost type and plant and columns "cost_type", "plant",
+            "A", "B" and "C". Plants are ordered by first appearance and their
+            names are used as plant_names unless params has them.
+
+        weights (Union[Dict[str, float], List[float], np.ndarray]):
+            weight of every cost type, by name or in the order of cost_types
+
+        params (Optional[Dict[str, Any]]):
+            params to add the combined costs to
 
     Returns:
         params (dict):
             key (str): parameter name
-            val (Any): usually float or list or something of the like
+            val (Any): usually float or list or something of the like. "A", "B"
+                and "C" are arrays of shape (n,).
 
     """
 
     params = params if params is not None else {}
+    costs, weights, plants, _ = _cost_tensor(cost_types, weights)
 
-    params["n"] = params.get("n", len(list(cost_types.values())[0]))
-    params["A"] = [0 for _ in range(params["n"])]
-    params["B"] = [0 for _ in range(params["n"])]
-    params["C"] = [0 for _ in range(params["n"])]
-
-    for cost_type, costs in cost_types.items():
-        for plant_indx in range(params["n"]):
-            params["A"][plant_indx] += weights[cost_type] * costs[plant_indx][0]
-            params["B"][plant_indx] += weights[cost_type] * costs[plant_indx][1]
-            params["C"][plant_indx] += weights[cost_type] * costs[plant_indx][2]
+    combined = np.einsum("t,tnk->kn", weights, costs)
+    params["n"] = params.get("n", costs.shape[1])
+    params["A"], params["B"], params["C"] = combined
+    if plants is not None:
+        params.setdefault("plant_names", [str(plant) for plant in plants])
 
     return params
 
 
+def simplex_grid(num_types: int, resolution: int) -> np.ndarray:
+    """
+    Regular grid over the weight simplex: every weight vector with non-negative
+    multiples of 1/resolution that sum to 1.
+
+    Args:
+        num_types (int):
+            number of cost types
+        resolution (int):
+            number of steps between 0 and 1 along every weight
+
+    Returns:
+        weights (np.ndarray):
+            array of shape (binom(resolution + num_types - 1, num_types - 1),
+            num_types), in lexicographic order so that neighboring rows are close
+    """
+    if num_types < 1 or resolution < 1:
+        raise ValueError("Please provide a positive num_types and resolution.")
+    points = [[]]
+    for t in range(num_types - 1):
+        points = [
+            point + [k] for point in points for k in range(resolution - sum(point) + 1)
+        ]
+    grid = np.array([point + [resolution - sum(point)] for point in points])
+    return grid / resolution
+
+
+def pareto_mask(objectives: np.ndarray) -> np.ndarray:
+    """
+    Non-dominated rows of a batch of objective vectors to minimize. A row is
+    dominated if another row is at most as large in every objective and smaller in
+    one. Of identical rows, only the first one is kept.
+
+    Args:
+        objectives (np.ndarray):
+            array of shape (S, T)
+
+    Returns:
+        mask (np.ndarray):
+            (S,) booleans, True for rows on the Pareto front
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    no_worse = np.all(objectives[:, None, :] <= objectives[None, :, :], axis=-1)
+    better = np.any(objectives[:, None, :] < objectives[None, :, :], axis=-1)
+    dominated = np.any(no_worse & better, axis=0)
+    # of identical rows, the later ones count as dominated by the first one
+    same = no_worse & no_worse.T
+    duplicate = np.any(np.tril(same, k=-1), axis=1)
+    return ~dominated & ~duplicate
+
+
+def _upper_triangular_entries(
+    quadratic: Union[np.ndarray, scipy.sparse.spmatrix],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extract the non-zero entries of an upper-triangular coefficient matrix.
+
+    Args:
+        quadratic (Union[np.ndarray, scipy.sparse.spmatrix]):
+            dense or sparse upper-triangular quadratic coefficient matrix
+
+    Returns:
+        rows (np.ndarray): row indices of the non-zero entries
+        cols (np.ndarray): column indices of the non-zero entries
+        vals (np.ndarray): values of the non-zero entries
+    """
+    if scipy.sparse.issparse(quadratic):
+        coo = quadratic.tocoo()
+        mask = coo.data != 0
+        return coo.row[mask], coo.col[mask], coo.data[mask]
+    rows, cols = np.nonzero(quadratic)
+    return rows, cols, quadratic[rows, cols]
+
+
+def _row_col_sums(quadratic: Union[np.ndarray, scipy.sparse.spmatrix]) -> np.ndarray:
+    """
+    Sum of every row plus the sum of every column of a quadratic coefficient matrix,
+    i.e. the total coefficient of all cross terms each variable takes part in.
+    """
+    return (
+        np.asarray(quadratic.sum(axis=1)).ravel()
+        + np.asarray(quadratic.sum(axis=0)).ravel()
+    )
+
+
+def qubo_to_ising(
+    linear: np.ndarray,
+    quadratic: Union[np.ndarray, scipy.sparse.spmatrix],
+    offset: float,
+) -> Tuple[np.ndarray, Union[np.ndarray, scipy.sparse.spmatrix], float]:
+    """
+    Convert QUBO coefficients over x in {0,1} to Ising coefficients over y in {1,-1}.
+
+    Map:
+        0 ->  1
+        1 -> -1
+        x = (1-y)/2
+
+    a x1    -> offset: a/2, linear: (-a/2) y1
+    c x1 x2 -> offset: c/4, linear: (-c/4) y1 + (-c/4) y2, quadratic: (c/4) y1 y2
+
+    Args:
+        linear (np.ndarray):
+            linear coefficient vector
+        quadratic (Union[np.ndarray, scipy.sparse.spmatrix]):
+            upper-triangular quadratic coefficient matrix
+        offset (float):
+            constant offset
+
+    Returns:
+        h (np.ndarray): Ising linear coefficient vector
+        J (Union[np.ndarray, scipy.sparse.spmatrix]): Ising coupling matrix
+        offset (float): Ising constant offset
+    """
+    h = -linear / 2.0 - _row_col_sums(quadratic) / 4.0
+    J = quadratic / 4.0
+    new_offset = offset + linear.sum() / 2.0 + quadratic.sum() / 4.0
+    return h, J, float(new_offset)
+
+
+def ising_to_qubo(
+    h: np.ndarray,
+    J: Union[np.ndarray, scipy.sparse.spmatrix],
+    offset: float,
+) -> Tuple[np.ndarray, Union[np.ndarray, scipy.sparse.spmatrix], float]:
+    """
+    Convert Ising coefficients over y in {1,-1} back to QUBO coefficients over
+    x in {0,1}. Inverse of qubo_to_ising.
+
+    Map:
+        y = 1 - 2x
+
+    Args:
+        h (np.ndarray):
+            Ising linear coefficient vector
+        J (Union[np.ndarray, scipy.sparse.spmatrix]):
+            upper-triangular Ising coupling matrix
+        offset (float):
+            Ising constant offset
+
+    Returns:
+        linear (np.ndarray): linear coefficient vector
+        quadratic (Union[np.ndarray, scipy.sparse.spmatrix]): quadratic coefficients
+        offset (float): constant offset
+    """
+    linear = -2.0 * h - 2.0 * _row_col_sums(J)
+    quadratic = J * 4.0
+    new_offset = offset + h.sum() + J.sum()
+    return linear, quadratic, float(new_offset)
+
+
+def _pack_coeff_arrays(
+    coeffs: Tuple[np.ndarray, Union[np.ndarray, scipy.sparse.spmatrix], float],
+) -> Dict[str, np.ndarray]:
+    """
+    Coefficient arrays as a flat dict of arrays, for ModelCache.
+    """
+    linear, quadratic, offset = coeffs
+    packed = {"linear": linear, "offset": np.float64(offset)}
+    if scipy.sparse.issparse(quadratic):
+        coo = quadratic.tocoo()
+        packed.update(
+            rows=coo.row, cols=coo.col, vals=coo.data, shape=np.array(coo.shape)
+        )
+    else:
+        packed["quadratic"] = quadratic
+    return packed
+
+
+def _unpack_coeff_arrays(
+    packed: Dict[str, np.ndarray],
+) -> Tuple[np.ndarray, Union[np.ndarray, scipy.sparse.spmatrix], float]:
+    """
+    Inverse of _pack_coeff_arrays.
+    """
+    if "quadratic" in packed:
+        quadratic = packed["quadratic"]
+    else:
+        quadratic = scipy.sparse.coo_matrix(
+            (packed["vals"], (packed["rows"], packed["cols"])),
+            shape=tuple(packed["shape"]),
+        ).tocsr()
+    return packed["linear"], quadratic, float(packed["offset"])
+
+
 class DistributedEnergyOptimizerResults:
-    def __init__(self, results: Any, extras: Optional[Dict[str, Any]] = None) -> None:
+    __slots__ = ("_results", "_extras", "_samples")
+
+    def __init__(
+        self,
+        results: Any,
+        extras: Optional[Dict[str, Any]] = None,
+        samples: Optional[SampleSummary] = None,
+    ) -> None:
         """
         Creates DistributedEnergyOptimizerResults object.
 
         Args:
             results (Any):
-                results object produced by optimization problem
+                results object produced by optimization problem. None for sampling
+                methods unless their raw response was kept.
             extras (Dict[str, Any]):
                 key (str): extra label
                 val (Any): extra value
+            samples (Optional[SampleSummary]):
+                lowest-energy distinct states of sampling methods
         """
         self._results: Any = results
         self._extras: Dict[str, Any] = extras if extras is not None else {}
+        self._samples: Optional[SampleSummary] = samples
 
     @property
     def results(self) -> Any:
@@ -122,6 +415,36 @@ class DistributedEnergyOptimizerResults:
     def extras(self) -> Dict[str, Any]:
         return self._extras
 
+    @property
+    def samples(self) -> Optional[SampleSummary]:
+        return self._samples
+
+
+def _timed(run: Callable[..., DistributedEnergyOptimizerResults]) -> Callable:
+    """
+    Decorator of DistributedEnergyOptimizer.run_* methods that records the seconds
+    spent in every stage of the run (see DistributedEnergyOptimizer._stage), plus
+    its "total", in the extras["timings"] of its results.
+    """
+    method = run.__name__[len("run_") :]
+
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs) -> DistributedEnergyOptimizerResults:
+        timings: Dict[str, float] = {}
+        self._timings.append((method, timings))
+        start = time.perf_counter()
+        try:
+            result = run(self, *args, **kwargs)
+        finally:
+            self._timings.pop()
+        timings["total"] = time.perf_counter() - start
+        if self.on_stage is not None:
+            self.on_stage("total", timings["total"], {"method": method})
+        result.extras["timings"] = timings
+        return result
+
+    return wrapper
+
 
 class DistributedEnergyOptimizer:
     """
@@ -135,7 +458,27 @@ class DistributedEnergyOptimizer:
 
     REQUIRED_PARAMS = ["A", "B", "C", "P_min", "P_max", "L", "N"]
 
-    def __init__(self, params) -> None:
+    # params that define the model, and so the ModelCache key
+    MODEL_PARAMS = REQUIRED_PARAMS + ["alpha", "beta", "encoding", "sparse"]
+
+    # run_* keyword argument through which a method accepts a warm start
+    WARM_START_KWARGS = {
+        "annealer_sim": "initial_state",
+        "structured": "initial_state",
+        "qaoa": "initial_point",
+        "vqe": "initial_point",
+    }
+
+    # methods that never use the coefficient arrays of the dense QUBO
+    QUBO_FREE_METHODS = ["exact_dp", "structured"]
+
+    def __init__(
+        self,
+        params,
+        cache: Optional[Union[str, ModelCache]] = None,
+        store: Optional[Union[str, ResultStore]] = None,
+        on_stage: Optional[Callable[[str, float, Dict[str, Any]], None]] = None,
+    ) -> None:
         """
         Set up DistributedEnergyOptimizer object.
 
@@ -143,6 +486,22 @@ class DistributedEnergyOptimizer:
             params (dict): required params specificed by REQUIRED_PARAMS
                 key (str): param name
                 val (Any): param values
+
+            cache (Optional[Union[str, ModelCache]]):
+                on-disk cache (or its directory) of the coefficient arrays,
+                QuadraticProgram and Ising operator, shared by all optimizers of the
+                same model
+
+            store (Optional[Union[str, ResultStore]]):
+                persistent store (or its SQLite file) of run results, used by
+                run_stored
+
+            on_stage (Optional[Callable[[str, float, Dict[str, Any]], None]]):
+                profiling hook called as on_stage(name, seconds, meta) after every
+                stage of a run (e.g. "coeff_arrays", "ising_model", "sampling",
+                "decoding") and with name "total" after every run_* call. meta has
+                the "method" and stage details, e.g. "cached" for model artifacts.
+                Worker processes of run_batch and run_portfolio do not call it.
         """
 
         for label in self.REQUIRED_PARAMS:  # make sure we have all the required params
@@ -153,33 +512,172 @@ class DistributedEnergyOptimizer:
         self.params["alpha"] = params.get("alpha", 5e5)
         self.params["beta"] = params.get("beta", 8)
         self.params["n"] = len(self.params["A"])
+        self.params["sparse"] = params.get("sparse", False)
+        self.params["encoding"] = params.get("encoding", "one_hot")
 
         self.params["plant_names"] = params.get(
             "plant_names", [f"plant_{i}" for i in range(self.params["n"])]
         )
 
         self.results: Dict[str, DistributedEnergyOptimizerResults] = {}
-        self._quadratic_program: Optional[QuadraticProgram] = None
+        self._quadratic_program: Optional["QuadraticProgram"] = None
+        self._linear_coeffs: Optional[np.ndarray] = None
+        self._quadratic_coeffs: Optional[Union[np.ndarray, scipy.sparse.spmatrix]] = (
+            None
+        )
+        self._variables: Optional[VariableRegistry] = None
         self._linear_terms: Optional[Dict[str, float]] = None
         self._quadratic_terms: Optional[Dict[Tuple[str, str], float]] = None
         self._offset: Optional[float] = None
+        self._ising_model: Optional["dimod.BinaryQuadraticModel"] = None
+        self._annealer: Optional[GroupAnnealer] = None
+        self._structured_model: Optional[StructuredEnergyModel] = None
+        self._ising_operator: Optional[Tuple[Any, float]] = None
+        self.cache = ModelCache(cache) if isinstance(cache, str) else cache
+        self.store = SQLiteResultStore(store) if isinstance(store, str) else store
+        self.on_stage = on_stage
+        # (method, timings) of the run_* calls in progress, innermost last
+        self._timings: List[Tuple[str, Dict[str, float]]] = []
+        # minor-embeddings by embedding_key
+        self._embeddings: Dict[str, Dict[str, List[int]]] = {}
+
+    @property
+    def model_key(self) -> str:
+        """
+        Content hash of the params that define the model, see MODEL_PARAMS
+        """
+        return params_hash(self.params, self.MODEL_PARAMS)
+
+    @contextlib.contextmanager
+    def _stage(self, name: str, **meta) -> Iterator[Dict[str, Any]]:
+        """
+        Time a stage of the run_* calls in progress. The seconds are added to the
+        timings of every enclosing run and passed to on_stage.
+
+        Args:
+            name (str):
+                stage name, e.g. "sampling"
+            **meta:
+                stage details for on_stage. The yielded dict can be updated inside
+                the stage.
+        """
+        meta = dict(meta)
+        start = time.perf_counter()
+        try:
+            yield meta
+        finally:
+            seconds = time.perf_counter() - start
+            for _, timings in self._timings:
+                timings[name] = timings.get(name, 0.0) + seconds
+            if self.on_stage is not None:
+                if self._timings:
+                    meta.setdefault("method", self._timings[-1][0])
+                self.on_stage(name, seconds, meta)
+
+    def _load_or_build(
+        self,
+        name: str,
+        build: Callable[[], Any],
+        pack: Optional[Callable[[Any], Any]] = None,
+        unpack: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Load a model artifact from self.cache, or build it and store it there.
+
+        Args:
+            name (str):
+                item name in the cache
+            build (Callable[[], Any]):
+                builds the artifact
+            pack (Optional[Callable[[Any], Any]]):
+                converts the artifact before it is stored
+            unpack (Optional[Callable[[Any], Any]]):
+                inverse of pack
+
+        Returns:
+            value (Any):
+                the artifact
+        """
+        with self._stage(name, cached=False) as meta:
+            if self.cache is None:
+                return build()
+            key = self.model_key
+            cached = self.cache.get(key, name)
+            if cached is not None:
+                meta["cached"] = True
+                return cached if unpack is None else unpack(cached)
+            value = build()
+            self.cache.put(key, name, value if pack is None else pack(value))
+            return value
+
+    def _ensure_coeff_arrays(self) -> None:
+        """
+        Build and cache the coefficient arrays if they have not been built yet.
+        """
+        if self._linear_coeffs is None:
+            (
+                self._linear_coeffs,
+                self._quadratic_coeffs,
+                self._offset,
+            ) = self._load_or_build(
+                "coeff_arrays",
+                self.gen_coeff_arrays,
+                _pack_coeff_arrays,
+                _unpack_coeff_arrays,
+            )
 
     @property
     def offset(self) -> float:
         """
         Offset term property
         """
-        if self._offset is None:
-            self._linear_terms, self._quadratic_terms, self._offset = self.gen_coeff()
+        self._ensure_coeff_arrays()
         return self._offset
 
+    @property
+    def linear_coeffs(self) -> np.ndarray:
+        """
+        Linear coefficient vector property, indexed like variable_names
+        """
+        self._ensure_coeff_arrays()
+        return self._linear_coeffs
+
+    @property
+    def quadratic_coeffs(self) -> Union[np.ndarray, scipy.sparse.spmatrix]:
+        """
+        Upper-triangular quadratic coefficient matrix property, indexed like
+        variable_names
+        """
+        self._ensure_coeff_arrays()
+        return self._quadratic_coeffs
+
+    @property
+    def variables(self) -> VariableRegistry:
+        """
+        Variable registry property, mapping (kind, plant, level) to integer columns
+        """
+        if self._variables is None:
+            self._variables = VariableRegistry(
+                self.params["n"], self.params["N"], self.params["encoding"]
+            )
+        return self._variables
+
+    @property
+    def variable_names(self) -> List[str]:
+        """
+        Binary variable names, in the order used by the coefficient arrays
+        """
+        return self.variables.names
+
     @property
     def linear_terms(self) -> Dict[str, float]:
         """
         Linear terms property
         """
         if self._linear_terms is None:
-            self._linear_terms, self._quadratic_terms, self._offset = self.gen_coeff()
+            self._linear_terms = dict(
+                zip(self.variable_names, self.linear_coeffs.tolist())
+            )
         return self._linear_terms
 
     @property
@@ -188,18 +686,97 @@ class DistributedEnergyOptimizer:
         Quadratics terms property
         """
         if self._quadratic_terms is None:
-            self._linear_terms, self._quadratic_terms, self._offset = self.gen_coeff()
+            names = self.variable_names
+            rows, cols, vals = _upper_triangular_entries(self.quadratic_coeffs)
+            self._quadratic_terms = {
+                (names[r], names[c]): v
+                for r, c, v in zip(rows.tolist(), cols.tolist(), vals.tolist())
+            }
         return self._quadratic_terms
 
     @property
-    def quadratic_program(self) -> QuadraticProgram:
+    def ising_model(self) -> "dimod.BinaryQuadraticModel":
+        """
+        Spin-basis dimod model property, reused across annealer runs
+        """
+        if self._ising_model is None:
+            with self._stage("ising_model"):
+                self._ising_model = self.gen_ising_model()
+        return self._ising_model
+
+    @property
+    def annealer(self) -> GroupAnnealer:
+        """
+        qudra-native simulated annealer property, whose moves keep every plant in a
+        valid configuration of the encoding
+        """
+        if self._annealer is None:
+            linear, quadratic, offset = (
+                self.linear_coeffs,
+                self.quadratic_coeffs,
+                self.offset,
+            )
+            with self._stage("annealer"):
+                self._annealer = GroupAnnealer(
+                    linear,
+                    quadratic,
+                    offset,
+                    self.variables.groups,
+                    self.variables.configurations(),
+                )
+        return self._annealer
+
+    @property
+    def structured_model(self) -> StructuredEnergyModel:
+        """
+        Energy model property with the load balance term kept as a rank-1 squared
+        linear form, built without the dense QUBO (see StructuredEnergyModel)
+        """
+        if self._structured_model is None:
+            with self._stage("structured_model"):
+                registry = self.variables
+                group_linear, block, offset = self._group_terms()
+                group_power, power_const = self._power_forms()
+                G = registry.group_size
+                quadratic = np.zeros((registry.n, G, G))
+                block_rows, block_cols = np.triu_indices(G, k=1)
+                quadratic[:, block_rows, block_cols] = block
+                self._structured_model = StructuredEnergyModel(
+                    group_linear,
+                    quadratic,
+                    offset,
+                    registry.groups,
+                    group_power,
+                    power_const.sum(),
+                    self.params["beta"],
+                    self.params["L"],
+                    registry.configurations(),
+                )
+        return self._structured_model
+
+    @property
+    def quadratic_program(self) -> "QuadraticProgram":
         """
         Quadratic program property
         """
         if self._quadratic_program is None:
-            self._quadratic_program = self.gen_quadratic_program()
+            self._quadratic_program = self._load_or_build(
+                "quadratic_program", self.gen_quadratic_program
+            )
         return self._quadratic_program
 
+    @property
+    def ising_operator(self) -> Tuple[Any, float]:
+        """
+        Qiskit Ising operator and offset of the quadratic program, as used by
+        MinimumEigenOptimizer
+        """
+        if self._ising_operator is None:
+            self._ising_operator = self._load_or_build(
+                "ising_operator", self.quadratic_program.to_ising
+            )
+        return self._ising_operator
+
     def parse_params(
         self, arr: List[int], arr_keys: List[str]
     ) -> Tuple[List[int], Dict[Tuple[int, int], int], List[float]]:
@@ -230,246 +807,947 @@ class DistributedEnergyOptimizer:
                 List of power levels outputted by each plant. This list has n elements,
                 where n is the number of plants.
         """
-        num_qubits = len(arr)
         n = self.params["n"]
         N = self.params["N"]
-        vs = [0 for _ in range(n)]
-        zs: Dict[Tuple[int, int], int] = {}
-
-        for i in range(num_qubits):
-            val = arr[i]
-            key = arr_keys[i]
+        vs_arr, zs_arr, ps_arr = self.decode_samples([arr], arr_keys)
 
-            # getting v values
-            if key[0:2] == "xv":
-                v_indx = int(key[2:])
-                vs[v_indx] = val
-
-            if key[0:2] == "xz":
-                z_indx_str = key[2:]
-                i, j = [int(x) for x in z_indx_str.split(",")]
-                zs[(i, j)] = val
-
-        ps = [0.0 for _ in range(n)]
-
-        for i in range(n):
-            p_min_val = self.params["P_min"][i]
-            p_max_val = self.params["P_max"][i]
-            h_val = (p_max_val - p_min_val) / N
-
-            if vs[i] == 1:
-                continue
-
-            curr_max_indx = 0
-            for k in range(N + 1):
-                if zs[(i, k)] == 1:
-                    curr_max_indx = k
-
-            ps[i] = p_min_val + h_val * curr_max_indx
+        vs = vs_arr[0].tolist()
+        zs = {(i, k): int(zs_arr[0, i, k]) for i in range(n) for k in range(N + 1)}
+        ps = ps_arr[0].tolist()
 
         return vs, zs, ps
 
-    def gen_coeff(self) -> Tuple[Dict[str, float], Dict[Tuple[str, str], float], float]:
+    def power_levels(self) -> np.ndarray:
         """
-        Based on the parameters provided and stored in self.params.
+        Power output of every (plant, level) pair: p_ik = P_min_i + k*h_i, where
+        h_i = (P_max_i - P_min_i)/N.
 
         Returns:
-            linear_terms (Dict[str, float]): 4.2*("xz0,1")
-                key (str): represents variable name. E.g. "xz0,1"
-                val (str): coefficient of linear term. E.g. 4.2
+            levels (np.ndarray):
+                array of shape (n, N+1)
+        """
+        N = self.params["N"]
+        p_min = np.asarray(self.params["P_min"], dtype=float)
+        p_max = np.asarray(self.params["P_max"], dtype=float)
+        h = (p_max - p_min) / N
+        return p_min[:, None] + h[:, None] * np.arange(N + 1)
 
-            quadratic_terms (Dict[Tuple[str,str], float]): 3.2*("xz1,2")*("xz3,0")
-                key (Tuple[str,str]): represents cross term between two binary variables. E.g. ("xz1,2". "xz3,0")
-                val (float): coefficient of that cross term. E.g. 3.2
+    def _power_forms(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Power output of every plant as a linear form over its group of variables
+        (see VariableRegistry.groups): p_i = const_i + sum_j coeffs_ij x_ij.
 
-            offset (float):
-                constant offset
+        Returns:
+            coeffs (np.ndarray): shape (n, G)
+            const (np.ndarray): shape (n,)
         """
-        # setup
-        # ==========================================================================
-        # parameters
-        A = self.params["A"]
-        B = self.params["B"]
-        C = self.params["C"]
         N = self.params["N"]
-        n = self.params["n"]
-        p_min = self.params["P_min"]
-        p_max = self.params["P_max"]
-        alpha = self.params["alpha"]
-        beta = self.params["beta"]
-        L = self.params["L"]
-
-        # helpers
-        def zindx(i: int, k: int) -> str:
-            return "xz%s,%s" % (i, k)
+        p_min = np.asarray(self.params["P_min"], dtype=float)
+        p_max = np.asarray(self.params["P_max"], dtype=float)
+        h = (p_max - p_min) / N
+        forms = self.variables.forms()
+        on, on_const = forms["on"]
+        level, level_const = forms["level"]
+        coeffs = p_min[:, None] * on + h[:, None] * level
+        const = p_min * on_const + h * level_const
+        return coeffs, const
+
+    def decode_samples(
+        self, states: np.ndarray, names: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode a batch of binary state vectors in one vectorized pass.
 
-        def vindx(i: int) -> str:
-            return "xv%s" % i
+        Args:
+            states (np.ndarray):
+                array of shape (S, Q) of 0/1s, one state per row. E.g. the
+                record of a dimod SampleSet converted to the {0,1} basis.
 
-        h = []
-        for i in range(len(p_min)):
-            h.append((p_max[i] - p_min[i]) / N)
+            names (Optional[List[str]]):
+                variable name of each column of states. If None, the columns are
+                assumed to follow variable_names.
 
-        linear_terms: Dict[str, float] = {}
-        quadratic_terms: Dict[Tuple[str, str], float] = {}
-        offset = 0.0
+        Returns:
+            vs (np.ndarray):
+                array of shape (S, n) of 0/1s representing whether a power plant
+                is turned off (1) or not (0)
 
-        # cost function
-        # ==========================================================================
-        # sum_i A_i (1-v_i) done
-        for i in range(n):
-            linear_terms[vindx(i)] = -A[i]
-            offset += A[i]
-
-        # sum_i B_i p_i done
-        for i in range(n):
-            for k in range(0, N + 1):
-                val = B[i] * (p_min[i] + k * h[i])
-                linear_terms[zindx(i, k)] = val
-
-        # sum_i C_i p_i^2 done
-        for i in range(n):
-            for k in range(0, N + 1):
-                for m in range(k, N + 1):
-                    if m == k:
-                        linear_terms[zindx(i, k)] = (
-                            linear_terms.get(zindx(i, k), 0)
-                            + C[i] * (p_min[i] + k * h[i]) ** 2
-                        )
-                        continue
-                    label1 = (zindx(i, k), zindx(i, m))
-                    quadratic_terms[label1] = quadratic_terms.get(label1, 0) + 2 * C[
-                        i
-                    ] * (p_min[i] + k * h[i]) * (p_min[i] + m * h[i])
-
-        # alpha sum_i (v_i + sum_k z_ik - 1)^2
-        for i in range(n):
-            linear_terms[vindx(i)] = linear_terms.get(vindx(i), 0) - alpha
-            for k in range(0, N + 1):
-                linear_terms[zindx(i, k)] += -2 * alpha
-                label2 = (vindx(i), zindx(i, k))
-                quadratic_terms[label2] = quadratic_terms.get(label2, 0) + 2 * alpha
-                for m in range(k, N + 1):
-                    if m == k:
-                        linear_terms[zindx(i, k)] += alpha
-                        continue
-
-                    label3 = (zindx(i, k), zindx(i, m))
-                    quadratic_terms[label3] += 2 * alpha
-            offset += alpha
-
-        # sum_i p_i = L done
-        for i in range(n):
-            for k in range(0, N + 1):
-                linear_terms[zindx(i, k)] += -2 * beta * L * (p_min[i] + k * h[i])
-                for j in range(i, n):
-                    for m in range(k, N + 1):
-                        if i == j and m == k:
-                            linear_terms[zindx(i, k)] += (
-                                beta * (p_min[i] + k * h[i]) ** 2
-                            )
-                            continue
-                        label4 = (zindx(i, k), zindx(j, m))
+            zs (np.ndarray):
+                array of shape (S, n, N+1) of 0/1s representing whether plant i is
+                outputting power level k. These are the z variables themselves for
+                the "one_hot" encoding, and decoded from the levels otherwise.
 
-                        quadratic_terms[label4] = quadratic_terms.get(
-                            label4, 0
-                        ) + 2 * beta * (p_min[i] + k * h[i]) * (p_min[j] + m * h[j])
+            ps (np.ndarray):
+                array of shape (S, n) of power levels outputted by each plant
+        """
+        registry = self.variables
+        states = registry.reorder(states, names)
+        vs, on, level = registry.decode(states)
 
-        offset += beta * L**2
+        if registry.encoding == "one_hot":
+            zs = states[:, registry.kind_index("z")]
+        else:
+            zs = np.zeros(on.shape + (self.params["N"] + 1,), dtype=states.dtype)
+            np.put_along_axis(zs, level[..., None], on[..., None], axis=-1)
 
-        return linear_terms, quadratic_terms, offset
+        ps = self.power_levels()[np.arange(self.params["n"]), level]
+        ps = np.where(on, ps, 0.0)
+        return vs, zs, ps
 
-    # IBM
-    # ==============================================================================
-    def gen_quadratic_program(self) -> QuadraticProgram:
+    def qubo_energies(
+        self, states: np.ndarray, names: Optional[List[str]] = None
+    ) -> np.ndarray:
         """
-        Generates Qiskit QuadraticProgram object based on linear terms, quadratic terms,
-        and offset of the problem at hand.
+        QUBO energy of a batch of binary state vectors.
 
-        Returns:
-            qubo (QuadraticProgram):
-                Qiskit QuadraticProgram object describing QUBO optimization problem.
-        """
-        qubo = QuadraticProgram(name="energy")
-        n = self.params["n"]
-        N = self.params["N"]
+        Args:
+            states (np.ndarray):
+                array of shape (S, Q) of 0/1s, one state per row
 
-        qubo.binary_var_dict(n, key_format="v{}")
-        for i in range(n):
-            qubo.binary_var_dict(
-                key_format="z" + str(i) + ",{}", keys=list(range(N + 1))
-            )
+            names (Optional[List[str]]):
+                variable name of each column of states. If None, the columns are
+                assumed to follow variable_names.
 
-        qubo.minimize(
-            linear=self.linear_terms,
-            quadratic=self.quadratic_terms,
-            constant=self.offset,
+        Returns:
+            energies (np.ndarray):
+                array of shape (S,) with the energy of every state
+        """
+        x = self.variables.reorder(states, names).astype(float)
+        return (
+            self.offset
+            + x @ self.linear_coeffs
+            + np.sum((x @ self.quadratic_coeffs) * x, axis=1)
         )
-        return qubo
 
-    def _run_gate_based_opt(
+    def evaluate(
         self,
-        quantum_instance: Optional[QuantumInstance] = None,
-        label: str = "qaoa",
-        opt_type: str = "qaoa",
-    ) -> DistributedEnergyOptimizerResults:
+        states: np.ndarray,
+        names: Optional[List[str]] = None,
+        load_tolerance: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
         """
-        Base function for gate based QAOA or VQE optimization methods.
+        Score a batch of binary state vectors in one vectorized pass, e.g. to
+        validate or filter the samples of an annealer.
 
         Args:
-            quantum_instance (Optional[QuantumInstance]):
-                Qiskit backend on which to run quantum optimization.
+            states (np.ndarray):
+                array of shape (S, Q) of 0/1s, one state per row
 
-            label (str):
-                label to use for results
+            names (Optional[List[str]]):
+                variable name of each column of states. If None, the columns are
+                assumed to follow variable_names.
 
-            opt_type (str):
-                "qaoa" or "vqe"
+            load_tolerance (Optional[float]):
+                largest absolute load mismatch of a feasible state. Defaults to no
+                bound, i.e. only the encoding decides feasibility.
 
         Returns:
+            evaluation (Dict[str, np.ndarray]):
+                "energy": (S,) QUBO energy, computed with structured_model
+                "cost": (S,) dispatch cost sum_i A_i (1-v_i) + B_i p_i + C_i p_i^2
+                    of the decoded power levels
+                "load": (S,) total power output sum_i p_i
+                "load_mismatch": (S,) sum_i p_i - L
+                "invalid": (S, n) booleans, True where a plant's group of
+                    variables is not a valid assignment of the encoding (e.g. not
+                    one-hot)
+                "num_invalid": (S,) number of invalid plants
+                "feasible": (S,) booleans, True where no plant is invalid and the
+                    load mismatch is within load_tolerance
+        """
+        states = self.variables.reorder(np.atleast_2d(states), names)
+        vs, _, ps = self.decode_samples(states)
+        A = np.asarray(self.params["A"], dtype=float)
+        B = np.asarray(self.params["B"], dtype=float)
+        C = np.asarray(self.params["C"], dtype=float)
+
+        cost = (1 - vs) @ A + ps @ B + ps**2 @ C
+        load = ps.sum(axis=1)
+        mismatch = load - self.params["L"]
+        invalid = ~self.variables.valid(states)
+        feasible = ~invalid.any(axis=1)
+        if load_tolerance is not None:
+            feasible &= np.abs(mismatch) <= load_tolerance
+        return {
+            "energy": self.structured_model.energies(states),
+            "cost": cost,
+            "load": load,
+            "load_mismatch": mismatch,
+            "invalid": invalid,
+            "num_invalid": invalid.sum(axis=1),
+            "feasible": feasible,
+        }
+
+    def _best_state(self, results: DistributedEnergyOptimizerResults) -> np.ndarray:
+        """
+        Optimal 0/1 state of a run, ordered like variable_names.
+
+        Args:
             results (DistributedEnergyOptimizerResults):
-                results from optimization
+                results of any run_* method
+
+        Returns:
+            state (np.ndarray):
+                array of shape (Q,)
         """
-        opt_types = {"qaoa": QAOA, "vqe": VQE}
-        quantum_algo = opt_types[opt_type]
+        if "opt_state" in results.extras:
+            values, names = results.extras["opt_state"], results.extras["names"]
+        else:
+            values, names = results.results.x, results.results.variable_names
+        return self.variables.reorder([values], names)[0].astype(int)
 
-        if quantum_instance is None:
-            backend = Aer.get_backend("qasm_simulator")
-            quantum_instance = QuantumInstance(
-                backend=backend,
-                seed_simulator=algorithm_globals.random_seed,
-                seed_transpiler=algorithm_globals.random_seed,
-            )
-        quadprog = self.quadratic_program
+    def _group_terms(self) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Separable part of the QUBO, i.e. everything but the load balance term: the
+        cost function and validity penalty of every plant as linear and quadratic
+        forms over the plant's group of variables (see VariableRegistry.groups).
 
-        _eval_count = 0
+        Returns:
+            linear (np.ndarray):
+                linear coefficients, shape (n, G)
 
-        def callback(eval_count, parameters, mean, std):
-            nonlocal _eval_count
-            _eval_count = eval_count
+            quadratic (np.ndarray):
+                coefficients of the pairs np.triu_indices(G, k=1) of every group,
+                shape (n, G*(G-1)/2)
 
-        # Create solver
-        solver = quantum_algo(
-            quantum_instance=quantum_instance,
-            callback=callback,
+            offset (float):
+                constant offset
+        """
+        A = np.asarray(self.params["A"], dtype=float)
+        B = np.asarray(self.params["B"], dtype=float)
+        C = np.asarray(self.params["C"], dtype=float)
+        n = self.params["n"]
+        alpha = self.params["alpha"]
+        registry = self.variables
+        block_rows, block_cols = np.triu_indices(registry.group_size, k=1)
+
+        # encoding: commitment (1-v_i), power p_i and validity penalty of each plant
+        # as linear/quadratic forms over the plant's group of variables
+        commit, commit_const = registry.forms()["commit"]
+        group_power, power_const = self._power_forms()
+        pen_linear, pen_quadratic, pen_offset = registry.penalty()
+
+        # sum_i A_i (1-v_i) + sum_i B_i p_i + sum_i C_i p_i^2
+        linear = (
+            A[:, None] * commit
+            + B[:, None] * group_power
+            + C[:, None] * (2 * power_const[:, None] * group_power + group_power**2)
         )
+        offset = np.sum(A * commit_const + B * power_const + C * power_const**2)
 
-        # Create optimizer for solver
-        optimizer = MinimumEigenOptimizer(solver)
-
-        # Get result from optimizer
-        result = optimizer.solve(quadprog)
+        # alpha sum_i penalty_i, e.g. (v_i + sum_k z_ik - 1)^2 for "one_hot"
+        linear += alpha * pen_linear
+        offset += alpha * pen_offset * n
 
-        self.results[label] = DistributedEnergyOptimizerResults(
-            result, {"eval_count": _eval_count}
+        # cross terms within a plant: 2 C_i p_ij p_im + alpha penalty
+        quadratic = (
+            2 * C[:, None] * group_power[:, block_rows] * group_power[:, block_cols]
+            + alpha * pen_quadratic[block_rows, block_cols]
         )
-        return self.results[label]
+        return linear, quadratic, float(offset)
 
-    def run_qaoa(
-        self, quantum_instance: Optional[QuantumInstance] = None, label: str = "qaoa"
-    ) -> DistributedEnergyOptimizerResults:
+    def gen_coeff_arrays(
+        self, sparse: Optional[bool] = None
+    ) -> Tuple[np.ndarray, Union[np.ndarray, scipy.sparse.spmatrix], float]:
         """
-        QAOA Optimization method.
+        Based on the parameters provided and stored in self.params, build the QUBO
+        coefficients as arrays over the integer variable columns of
+        self.variables (see VariableRegistry), e.g. for the "one_hot" encoding:
+
+            v_i  -> i
+            z_ik -> n + i*(N+1) + k
+
+        Args:
+            sparse (Optional[bool]):
+                whether to return the quadratic matrix as a scipy.sparse CSR matrix.
+                Defaults to self.params["sparse"].
+
+        Returns:
+            linear (np.ndarray):
+                linear coefficient vector with Q elements, where Q is the number of
+                variables of the encoding (n*(N+2) for "one_hot")
+
+            quadratic (Union[np.ndarray, scipy.sparse.spmatrix]):
+                strictly upper-triangular quadratic coefficient matrix of shape (Q, Q)
+
+            offset (float):
+                constant offset
+        """
+        # setup
+        # ==========================================================================
+        # parameters
+        beta = self.params["beta"]
+        L = self.params["L"]
+        sparse = self.params["sparse"] if sparse is None else sparse
+
+        # helpers
+        registry = self.variables
+        num_vars = registry.num_vars
+        groups = registry.groups  # variables of each plant, ascending, (n, G)
+        block_rows, block_cols = np.triu_indices(registry.group_size, k=1)
+
+        # cost function and validity penalty of each plant
+        # ==========================================================================
+        group_linear, block, offset = self._group_terms()
+        group_power, power_const = self._power_forms()
+        power = np.zeros(num_vars)
+        power[groups] = group_power
+
+        # beta (sum_i p_i - L)^2
+        residual = power_const.sum() - L
+        group_linear += 2 * beta * residual * group_power + beta * group_power**2
+        offset += beta * residual**2
+
+        linear = np.zeros(num_vars)
+        linear[groups] = group_linear
+
+        # cross terms across the network: 2 beta p_ij p_km
+        if sparse:
+            active = np.flatnonzero(power)
+            load_rows, load_cols = np.triu_indices(len(active), k=1)
+            rows = np.concatenate([groups[:, block_rows].ravel(), active[load_rows]])
+            cols = np.concatenate([groups[:, block_cols].ravel(), active[load_cols]])
+            vals = np.concatenate(
+                [
+                    block.ravel(),
+                    2 * beta * power[active[load_rows]] * power[active[load_cols]],
+                ]
+            )
+            quadratic = scipy.sparse.coo_matrix(
+                (vals, (rows, cols)), shape=(num_vars, num_vars)
+            ).tocsr()
+        else:
+            quadratic = np.outer(power, power)
+            quadratic *= 2 * beta
+            quadratic[groups[:, block_rows], groups[:, block_cols]] += block
+            quadratic = np.triu(quadratic, k=1)
+
+        return linear, quadratic, float(offset)
+
+    def gen_coeff(self) -> Tuple[Dict[str, float], Dict[Tuple[str, str], float], float]:
+        """
+        Based on the parameters provided and stored in self.params.
+
+        Returns:
+            linear_terms (Dict[str, float]): 4.2*("xz0,1")
+                key (str): represents variable name. E.g. "xz0,1"
+                val (str): coefficient of linear term. E.g. 4.2
+
+            quadratic_terms (Dict[Tuple[str,str], float]): 3.2*("xz1,2")*("xz3,0")
+                key (Tuple[str,str]): represents cross term between two binary variables. E.g. ("xz1,2". "xz3,0")
+                val (float): coefficient of that cross term. E.g. 3.2
+
+            offset (float):
+                constant offset
+        """
+        linear, quadratic, offset = self.gen_coeff_arrays()
+        names = self.variable_names
+        linear_terms = dict(zip(names, linear.tolist()))
+        rows, cols, vals = _upper_triangular_entries(quadratic)
+        quadratic_terms = {
+            (names[r], names[c]): v
+            for r, c, v in zip(rows.tolist(), cols.tolist(), vals.tolist())
+        }
+        return linear_terms, quadratic_terms, offset
+
+    # Incremental updates
+    # ==============================================================================
+    def _apply_coeff_delta(
+        self,
+        d_linear: np.ndarray,
+        d_quadratic: Optional[scipy.sparse.coo_matrix],
+        d_offset: float,
+    ) -> None:
+        """
+        Patch the cached coefficient arrays, QuadraticProgram and spin-basis model
+        in place with a change in QUBO coefficients. Dict views are rebuilt lazily.
+
+        Args:
+            d_linear (np.ndarray):
+                change in the linear coefficient vector
+            d_quadratic (Optional[scipy.sparse.coo_matrix]):
+                change in the upper-triangular quadratic coefficient matrix, if any
+            d_offset (float):
+                change in the constant offset
+        """
+        self._linear_coeffs += d_linear
+        self._offset += d_offset
+        if d_quadratic is not None:
+            if scipy.sparse.issparse(self._quadratic_coeffs):
+                self._quadratic_coeffs = (self._quadratic_coeffs + d_quadratic).tocsr()
+            else:
+                self._quadratic_coeffs[
+                    d_quadratic.row, d_quadratic.col
+                ] += d_quadratic.data
+        self._linear_terms = None
+        self._quadratic_terms = None
+        self._annealer = None
+        self._ising_operator = None
+
+        if self._quadratic_program is not None:
+            objective = self._quadratic_program.objective
+            objective.constant = self._offset
+            objective.linear = self._linear_coeffs
+            if d_quadratic is not None:
+                objective.quadratic = self._quadratic_coeffs
+
+        if self._ising_model is not None:
+            if d_quadratic is None:
+                d_quadratic = scipy.sparse.coo_matrix((len(d_linear), len(d_linear)))
+            h, J, offset = qubo_to_ising(d_linear, d_quadratic, d_offset)
+            names = self.variable_names
+            self._ising_model.add_linear_from(zip(names, h.tolist()))
+            rows, cols, vals = _upper_triangular_entries(J)
+            self._ising_model.add_quadratic_from(
+                (names[r], names[c], v)
+                for r, c, v in zip(rows.tolist(), cols.tolist(), vals.tolist())
+            )
+            self._ising_model.offset += offset
+
+    def _reset_unpatched_models(self) -> None:
+        """
+        Drop the QuadraticProgram and Ising operator when there are no coefficient
+        arrays to patch them from, e.g. when they were loaded from the cache, so
+        that they are rebuilt (or loaded) for the updated params.
+        """
+        self._quadratic_program = None
+        self._ising_operator = None
+
+    def update_demand(self, L: float) -> None:
+        """
+        Change the demand L without rebuilding the model.
+
+        Only the -2*beta*L*p_i linear terms and the beta*L^2 offset depend on L, so
+        the cached coefficients, QuadraticProgram, spin-basis model and structured
+        model are patched in place.
+
+        Args:
+            L (float):
+                new demand
+        """
+        L_old = self.params["L"]
+        self.params["L"] = L
+        if self._structured_model is not None:
+            self._structured_model.target = L
+        if self._linear_coeffs is None:
+            self._reset_unpatched_models()
+            return
+
+        beta = self.params["beta"]
+        group_power, power_const = self._power_forms()
+        d_linear = np.zeros(self.variables.num_vars)
+        d_linear[self.variables.groups] = -2 * beta * (L - L_old) * group_power
+        total = power_const.sum()
+        d_offset = beta * ((total - L) ** 2 - (total - L_old) ** 2)
+        self._apply_coeff_delta(d_linear, None, d_offset)
+
+    def update_costs(
+        self,
+        A: Optional[List[float]] = None,
+        B: Optional[List[float]] = None,
+        C: Optional[List[float]] = None,
+    ) -> None:
+        """
+        Change the per plant cost coefficients without rebuilding the model.
+        Coefficients that are not provided are left unchanged.
+
+        Args:
+            A (Optional[List[float]]):
+                new start-up costs, one per plant
+            B (Optional[List[float]]):
+                new linear costs, one per plant
+            C (Optional[List[float]]):
+                new quadratic costs, one per plant
+        """
+        n = self.params["n"]
+        d_cost = {}
+        for label, new in [("A", A), ("B", B), ("C", C)]:
+            if new is None:
+                d_cost[label] = np.zeros(n)
+                continue
+            if len(new) != n:
+                raise ValueError(f"Please provide {n} values for {label}.")
+            d_cost[label] = np.asarray(new, dtype=float) - np.asarray(
+                self.params[label], dtype=float
+            )
+            self.params[label] = new
+        self._structured_model = None
+        if self._linear_coeffs is None:
+            self._reset_unpatched_models()
+            return
+
+        registry = self.variables
+        groups = registry.groups
+        commit, commit_const = registry.forms()["commit"]
+        group_power, power_const = self._power_forms()
+        d_A, d_B, d_C = d_cost["A"][:, None], d_cost["B"][:, None], d_cost["C"][:, None]
+
+        d_linear = np.zeros(registry.num_vars)
+        d_linear[groups] = (
+            d_A * commit
+            + d_B * group_power
+            + d_C * (2 * power_const[:, None] * group_power + group_power**2)
+        )
+        d_offset = np.sum(
+            d_cost["A"] * commit_const
+            + d_cost["B"] * power_const
+            + d_cost["C"] * power_const**2
+        )
+
+        d_quadratic = None
+        if np.any(d_cost["C"]):
+            rows, cols = np.triu_indices(registry.group_size, k=1)
+            d_quadratic = scipy.sparse.coo_matrix(
+                (
+                    (2 * d_C * group_power[:, rows] * group_power[:, cols]).ravel(),
+                    (groups[:, rows].ravel(), groups[:, cols].ravel()),
+                ),
+                shape=(registry.num_vars, registry.num_vars),
+            )
+        self._apply_coeff_delta(d_linear, d_quadratic, d_offset)
+
+    def update_penalties(
+        self, alpha: Optional[float] = None, beta: Optional[float] = None
+    ) -> None:
+        """
+        Change the penalty weights. A change of alpha only touches each plant's
+        block and is patched in place, a change of beta rebuilds the model.
+
+        Args:
+            alpha (Optional[float]):
+                new weight of the encoding validity penalty
+            beta (Optional[float]):
+                new weight of the load balance term
+        """
+        if alpha is not None and alpha != self.params["alpha"]:
+            self._structured_model = None
+        if beta is not None and beta != self.params["beta"]:
+            self.params["beta"] = beta
+            if alpha is not None:
+                self.params["alpha"] = alpha
+            self._structured_model = None
+            self._linear_coeffs = None
+            self._quadratic_coeffs = None
+            self._offset = None
+            self._linear_terms = None
+            self._quadratic_terms = None
+            self._quadratic_program = None
+            self._ising_model = None
+            self._annealer = None
+            self._ising_operator = None
+            return
+        if alpha is None:
+            return
+
+        d_alpha = alpha - self.params["alpha"]
+        self.params["alpha"] = alpha
+        if d_alpha == 0:
+            return
+        if self._linear_coeffs is None:
+            self._reset_unpatched_models()
+            return
+
+        registry = self.variables
+        groups = registry.groups
+        pen_linear, pen_quadratic, pen_offset = registry.penalty()
+        rows, cols = np.triu_indices(registry.group_size, k=1)
+        d_linear = np.zeros(registry.num_vars)
+        d_linear[groups] = d_alpha * pen_linear
+        d_quadratic = scipy.sparse.coo_matrix(
+            (
+                np.tile(d_alpha * pen_quadratic[rows, cols], registry.n),
+                (groups[:, rows].ravel(), groups[:, cols].ravel()),
+            ),
+            shape=(registry.num_vars, registry.num_vars),
+        )
+        self._apply_coeff_delta(
+            d_linear, d_quadratic, d_alpha * pen_offset * registry.n
+        )
+
+    # Penalty calibration
+    # ==============================================================================
+    def penalty_bounds(self, safety: float = 1.1) -> Dict[str, float]:
+        """
+        Smallest safe penalty weights, derived from bounds on the objective.
+
+        beta makes the load balance binding: moving one plant one power level step
+        h_i (or switching it on at P_min_i) towards the demand must pay off, so
+        beta > (B_i + 2 C_i P_max_i) / h_i and
+        beta > (A_i + B_i P_min_i + C_i P_min_i^2) / P_min_i^2 for every plant.
+
+        alpha makes every invalid state (penalty >= 1) cost more than a known valid
+        one: alpha > U - L, where U is the objective of the run_exact_dp dispatch
+        and L a lower bound of the unpenalized objective over all 0/1 states, from
+        bounding every plant's commitment and power forms independently.
+
+        Args:
+            safety (float):
+                factor > 1 applied to both bounds
+
+        Returns:
+            bounds (Dict[str, float]):
+                "alpha", "beta", "objective_upper_bound" (U) and
+                "objective_lower_bound" (L)
+        """
+        A = np.asarray(self.params["A"], dtype=float)
+        B = np.asarray(self.params["B"], dtype=float)
+        C = np.asarray(self.params["C"], dtype=float)
+        p_min = np.asarray(self.params["P_min"], dtype=float)
+        p_max = np.asarray(self.params["P_max"], dtype=float)
+        h = (p_max - p_min) / self.params["N"]
+
+        # beta
+        # ==========================================================================
+        marginal = np.divide(B + 2 * C * p_max, h, out=np.zeros_like(h), where=h > 0)
+        start_up = np.divide(
+            A + B * p_min + C * p_min**2,
+            p_min**2,
+            out=np.zeros_like(p_min),
+            where=p_min > 0,
+        )
+        beta = safety * max(float(np.max(marginal)), float(np.max(start_up)), 1e-9)
+
+        # alpha
+        # ==========================================================================
+        # lower bound: every plant's commitment and power at their cheapest over
+        # arbitrary 0/1 assignments of its group, load term >= 0
+        commit, commit_const = self.variables.forms()["commit"]
+        commit_lo = commit_const + np.minimum(commit, 0).sum()
+        commit_hi = commit_const + np.maximum(commit, 0).sum()
+        group_power, power_const = self._power_forms()
+        power_lo = power_const + np.minimum(group_power, 0).sum(axis=1)
+        power_hi = power_const + np.maximum(group_power, 0).sum(axis=1)
+        vertex = np.divide(-B, 2 * C, out=power_lo.copy(), where=C > 0)
+        candidates = np.stack([power_lo, power_hi, np.clip(vertex, power_lo, power_hi)])
+        power_cost = np.min(B * candidates + C * candidates**2, axis=0)
+        lower = float(np.sum(np.minimum(A * commit_lo, A * commit_hi) + power_cost))
+
+        # upper bound: objective of a valid dispatch, under the new beta
+        old_beta = self.params["beta"]
+        self.params["beta"] = beta
+        try:
+            upper = self.run_exact_dp(label="_penalty_bounds").extras["opt_cost"]
+        finally:
+            self.params["beta"] = old_beta
+            self.results.pop("_penalty_bounds", None)
+
+        return {
+            "alpha": safety * max(upper - lower, 1e-9),
+            "beta": beta,
+            "objective_upper_bound": upper,
+            "objective_lower_bound": lower,
+        }
+
+    def calibrate_penalties(
+        self,
+        safety: float = 1.1,
+        tune: bool = False,
+        factors: Sequence[float] = (1.0, 0.5, 0.25, 0.1, 0.05),
+        num_shots: int = 100,
+        seed: Optional[int] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Set alpha and beta to the smallest safe penalty weights (see
+        penalty_bounds), optionally tuning alpha empirically.
+
+        With tune, the annealer is run with num_shots shots for alpha scaled by
+        each of factors, and the alpha with the lowest time to solution (99%
+        success) of the best valid dispatch found by any run is kept. Smaller alphas
+        flatten the landscape but are no longer guaranteed to be safe; only samples
+        of valid states count as successes.
+
+        Args:
+            safety (float):
+                factor > 1 applied to the safe bounds
+            tune (bool):
+                whether to tune alpha on short annealer runs
+            factors (Sequence[float]):
+                multiples of the safe alpha to try when tuning
+            num_shots (int):
+                number of shots per tuning run
+            seed (Optional[int]):
+                random seed of the tuning runs, which makes their samples and
+                success probabilities reproducible. The tts99 also depend on the
+                measured time per shot.
+            **kwargs:
+                extra keyword arguments for run_annealer_sim. Defaults to the
+                "dimod" engine, as the "qudra" engine only visits valid states and
+                so does not depend on alpha.
+
+        Returns:
+            report (Dict[str, Any]):
+                the penalty_bounds, the chosen "alpha" and "beta", and with tune
+                the "trials": "factor", "alpha", "success_probability", "tts99"
+                and "time_per_shot" of every tuning run
+        """
+        bounds = self.penalty_bounds(safety)
+        report: Dict[str, Any] = dict(bounds, safe_alpha=bounds["alpha"])
+        self.update_penalties(alpha=bounds["alpha"], beta=bounds["beta"])
+        if not tune:
+            return report
+
+        kwargs.setdefault("engine", "dimod")
+        kwargs.setdefault("top_k", 64)
+        runs = []
+        for factor in factors:
+            self.update_penalties(alpha=factor * bounds["alpha"])
+            result = self.run_annealer_sim(
+                label="_calibration", num_shots=num_shots, seed=seed, **kwargs
+            )
+            valid = self.variables.valid(result.samples.states).all(axis=1)
+            runs.append((factor, result.samples, valid, result.extras["time_per_shot"]))
+        self.results.pop("_calibration", None)
+
+        # valid states have the same energy under every alpha
+        target = bounds["objective_upper_bound"]
+        for _, samples, valid, _ in runs:
+            if valid.any():
+                target = min(target, float(samples.energies[valid].min()))
+
+        trials = []
+        for factor, samples, valid, time_per_shot in runs:
+            hits = valid & (samples.energies <= target + 1e-9 * max(1.0, abs(target)))
+            success = samples.counts[hits].sum() / samples.stats["num_reads"]
+            trials.append(
+                {
+                    "factor": factor,
+                    "alpha": factor * bounds["alpha"],
+                    "success_probability": float(success),
+                    "time_per_shot": time_per_shot,
+                    "tts99": time_to_solution(success, time_per_shot),
+                }
+            )
+
+        # lowest TTS, the larger (safer) alpha on ties
+        best = min(trials, key=lambda trial: (trial["tts99"], -trial["alpha"]))
+        self.update_penalties(alpha=best["alpha"])
+        report.update(alpha=best["alpha"], target_energy=target, trials=trials)
+        return report
+
+    # IBM
+    # ==============================================================================
+    def gen_quadratic_program(self) -> "QuadraticProgram":
+        """
+        Generates Qiskit QuadraticProgram object based on linear terms, quadratic terms,
+        and offset of the problem at hand.
+
+        Returns:
+            qubo (QuadraticProgram):
+                Qiskit QuadraticProgram object describing QUBO optimization problem.
+        """
+        from qiskit_optimization import QuadraticProgram
+
+        qubo = QuadraticProgram(name="energy")
+        for name in self.variable_names:
+            qubo.binary_var(name=name)
+
+        qubo.minimize(
+            linear=self.linear_coeffs,
+            quadratic=self.quadratic_coeffs,
+            constant=self.offset,
+        )
+        return qubo
+
+    def _solve_min_eigen(self, optimizer: "MinimumEigenOptimizer") -> Any:
+        """
+        Solve the (possibly cached) quadratic program with a MinimumEigenOptimizer
+        through its public solve, which converts the program to an Ising operator
+        on every call.
+        """
+        quadprog = self.quadratic_program
+        with self._stage("optimization"):
+            return optimizer.solve(quadprog)
+
+    def _run_fast_statevector(
+        self,
+        label: str,
+        opt_type: str,
+        initial_point: Optional[np.ndarray] = None,
+        reps: Optional[int] = None,
+        gradient: Optional[str] = "adjoint",
+        seed: Optional[int] = None,
+        min_probability: float = 1e-6,
+        num_samples: int = 1024,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        QAOA or VQE on an exact NumPy statevector, see StatevectorAnsatz.
+
+        The cost Hamiltonian diagonal is computed once, every objective evaluation
+        is an exact expectation value and gradients are exact. Like Qiskit's
+        MinimumEigenOptimizer, the optimal state is the cheapest bitstring with
+        probability of at least min_probability in the optimal statevector, or the
+        most probable bitstring if none reaches it (e.g. a near-uniform state on
+        20+ qubits).
+
+        Returns:
+            results (DistributedEnergyOptimizerResults):
+                results whose results attribute holds the num_samples most probable
+                bitstrings: "states" (S, Q), "probabilities" (S,), "energies" (S,)
+        """
+        linear, quadratic, offset = (
+            self.linear_coeffs,
+            self.quadratic_coeffs,
+            self.offset,
+        )
+        with self._stage("cost_diagonal"):
+            diagonal = cost_diagonal(linear, quadratic, offset)
+        if opt_type == "qaoa":
+            ansatz = StatevectorAnsatz.qaoa(diagonal, reps=1 if reps is None else reps)
+        else:
+            ansatz = StatevectorAnsatz.real_amplitudes(
+                diagonal, reps=3 if reps is None else reps
+            )
+        if initial_point is None:
+            rng = np.random.default_rng(seed)
+            initial_point = rng.uniform(-np.pi, np.pi, ansatz.num_parameters)
+        with self._stage("optimization"):
+            result = ansatz.minimize(np.asarray(initial_point, dtype=float), gradient)
+
+        with self._stage("decoding"):
+            probabilities = np.abs(ansatz.statevector(result.x)) ** 2
+            sampled = np.flatnonzero(probabilities >= min_probability)
+            if len(sampled):
+                best = sampled[np.argmin(diagonal[sampled])]
+            else:
+                best = int(np.argmax(probabilities))
+            top = np.argsort(probabilities)[::-1][:num_samples]
+
+        bits = np.arange(len(self.linear_coeffs))
+        self.results[label] = DistributedEnergyOptimizerResults(
+            {
+                "states": ((top[:, None] >> bits) & 1).astype(np.int8),
+                "probabilities": probabilities[top],
+                "energies": diagonal[top],
+            },
+            {
+                "opt_cost": float(diagonal[best]),
+                "opt_state": ((best >> bits) & 1).tolist(),
+                "names": self.variable_names,
+                "eval_count": ansatz.eval_count,
+                "optimal_point": result.x,
+                "optimal_value": float(result.fun),
+                "backend": "fast_statevector",
+            },
+        )
+        return self.results[label]
+
+    def _run_gate_based_opt(
+        self,
+        quantum_instance: Optional["QuantumInstance"] = None,
+        label: str = "qaoa",
+        opt_type: str = "qaoa",
+        initial_point: Optional[np.ndarray] = None,
+        backend: Optional[str] = None,
+        reps: Optional[int] = None,
+        gradient: Optional[str] = "adjoint",
+        seed: Optional[int] = None,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Base function for gate based QAOA or VQE optimization methods.
+
+        Args:
+            quantum_instance (Optional[QuantumInstance]):
+                Qiskit backend on which to run quantum optimization.
+
+            label (str):
+                label to use for results
+
+            opt_type (str):
+                "qaoa" or "vqe"
+
+            initial_point (Optional[np.ndarray]):
+                initial variational parameters, e.g. the optimal point of a
+                previous run
+
+            backend (Optional[str]):
+                "fast_statevector" to simulate the ansatz exactly with NumPy, or the
+                name of an Aer backend used when no quantum_instance is given.
+                Defaults to "qasm_simulator".
+
+            reps (Optional[int]):
+                number of ansatz layers, "fast_statevector" only. Defaults to 1 for
+                QAOA and 3 for VQE, like Qiskit.
+
+            gradient (Optional[str]):
+                "adjoint", "parameter_shift" (VQE only) or None for a gradient-free
+                optimizer, "fast_statevector" only
+
+            seed (Optional[int]):
+                seed of the random initial point, "fast_statevector" only
+
+        Returns:
+            results (DistributedEnergyOptimizerResults):
+                results from optimization
+        """
+        if backend == "fast_statevector":
+            return self._run_fast_statevector(
+                label,
+                opt_type,
+                initial_point=initial_point,
+                reps=reps,
+                gradient=gradient,
+                seed=seed,
+            )
+
+        from qiskit import Aer
+        from qiskit.algorithms import QAOA, VQE
+        from qiskit.utils import QuantumInstance, algorithm_globals
+        from qiskit_optimization.algorithms import MinimumEigenOptimizer
+
+        opt_types = {"qaoa": QAOA, "vqe": VQE}
+        quantum_algo = opt_types[opt_type]
+
+        if quantum_instance is None:
+            backend = Aer.get_backend(backend or "qasm_simulator")
+            quantum_instance = QuantumInstance(
+                backend=backend,
+                seed_simulator=algorithm_globals.random_seed,
+                seed_transpiler=algorithm_globals.random_seed,
+            )
+
+        _eval_count = 0
+
+        def callback(eval_count, parameters, mean, std):
+            nonlocal _eval_count
+            _eval_count = eval_count
+
+        # Create solver
+        solver = quantum_algo(
+            quantum_instance=quantum_instance,
+            callback=callback,
+            initial_point=initial_point,
+        )
+
+        # Create optimizer for solver
+        optimizer = MinimumEigenOptimizer(solver)
+
+        # Get result from optimizer
+        result = self._solve_min_eigen(optimizer)
+
+        self.results[label] = DistributedEnergyOptimizerResults(
+            result,
+            {
+                "eval_count": _eval_count,
+                "optimal_point": result.min_eigen_solver_result.optimal_point,
+            },
+        )
+        return self.results[label]
+
+    @_timed
+    def run_qaoa(
+        self,
+        quantum_instance: Optional["QuantumInstance"] = None,
+        label: str = "qaoa",
+        initial_point: Optional[np.ndarray] = None,
+        backend: Optional[str] = None,
+        reps: Optional[int] = None,
+        gradient: Optional[str] = "adjoint",
+        seed: Optional[int] = None,
+        polish: bool = False,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        QAOA Optimization method.
 
         Args:
             quantum_instance (Optional[QuantumInstance]):
@@ -478,18 +1756,56 @@ class DistributedEnergyOptimizer:
             label (str):
                 label to use for results
 
+            initial_point (Optional[np.ndarray]):
+                initial variational parameters, e.g. the optimal point of a
+                previous run
+
+            backend (Optional[str]):
+                "fast_statevector" for exact NumPy statevector simulation with exact
+                gradients, or an Aer backend name. Defaults to "qasm_simulator".
+
+            reps (Optional[int]):
+                number of ansatz layers, "fast_statevector" only
+
+            gradient (Optional[str]):
+                "adjoint", "parameter_shift" (VQE only) or None, "fast_statevector" only
+
+            seed (Optional[int]):
+                seed of the random initial point, "fast_statevector" only
+
+            polish (bool):
+                whether to polish the most probable bitstrings afterwards, see
+                polish
+
         Returns:
             result (DistributedEnergyOptimizerResults):
                 results from optimization
         """
-        return self._run_gate_based_opt(
+        results = self._run_gate_based_opt(
             quantum_instance=quantum_instance,
             label=label,
             opt_type="qaoa",
+            initial_point=initial_point,
+            backend=backend,
+            reps=reps,
+            gradient=gradient,
+            seed=seed,
         )
+        if polish:
+            self.polish(label)
+        return results
 
+    @_timed
     def run_vqe(
-        self, quantum_instance: Optional[QuantumInstance] = None, label: str = "vqe"
+        self,
+        quantum_instance: Optional["QuantumInstance"] = None,
+        label: str = "vqe",
+        initial_point: Optional[np.ndarray] = None,
+        backend: Optional[str] = None,
+        reps: Optional[int] = None,
+        gradient: Optional[str] = "adjoint",
+        seed: Optional[int] = None,
+        polish: bool = False,
     ) -> DistributedEnergyOptimizerResults:
         """
         VQE Optimization method.
@@ -501,19 +1817,49 @@ class DistributedEnergyOptimizer:
             label (str):
                 label to use for results
 
+            initial_point (Optional[np.ndarray]):
+                initial variational parameters, e.g. the optimal point of a
+                previous run
+
+            backend (Optional[str]):
+                "fast_statevector" for exact NumPy statevector simulation with exact
+                gradients, or an Aer backend name. Defaults to "qasm_simulator".
+
+            reps (Optional[int]):
+                number of ansatz layers, "fast_statevector" only
+
+            gradient (Optional[str]):
+                "adjoint", "parameter_shift" or None, "fast_statevector" only
+
+            seed (Optional[int]):
+                seed of the random initial point, "fast_statevector" only
+
+            polish (bool):
+                whether to polish the most probable bitstrings afterwards, see
+                polish
+
         Returns:
             result (DistributedEnergyOptimizerResults):
                 results from optimization
         """
-        return self._run_gate_based_opt(
+        results = self._run_gate_based_opt(
             quantum_instance=quantum_instance,
             label=label,
             opt_type="vqe",
+            initial_point=initial_point,
+            backend=backend,
+            reps=reps,
+            gradient=gradient,
+            seed=seed,
         )
+        if polish:
+            self.polish(label)
+        return results
 
+    @_timed
     def run_grover(
         self,
-        quantum_instance: Optional[QuantumInstance] = None,
+        quantum_instance: Optional["QuantumInstance"] = None,
         label: str = "grover",
         num_iterations=100,
     ) -> DistributedEnergyOptimizerResults:
@@ -534,6 +1880,10 @@ class DistributedEnergyOptimizer:
             result (DistributedEnergyOptimizerResults):
                 results from optimization
         """
+        from qiskit import Aer
+        from qiskit.utils import QuantumInstance, algorithm_globals
+        from qiskit_optimization.algorithms import GroverOptimizer
+
         if quantum_instance is None:
             backend = Aer.get_backend("qasm_simulator")
             quantum_instance = QuantumInstance(
@@ -544,19 +1894,19 @@ class DistributedEnergyOptimizer:
 
         quadprog = self.quadratic_program
 
-        n = self.params["n"]
-        N = self.params["N"]
-        num_qubits = n + N * n
+        num_qubits = self.variables.num_vars
         optimizer = GroverOptimizer(
-            num_qubits, num_iterations=num_iterations, quantum_instance=backend
+            num_qubits, num_iterations=num_iterations, quantum_instance=quantum_instance
         )
 
         # Get result from optimizer
-        result = optimizer.solve(quadprog)
+        with self._stage("optimization"):
+            result = optimizer.solve(quadprog)
 
         self.results[label] = DistributedEnergyOptimizerResults(result)
         return self.results[label]
 
+    @_timed
     def run_classical(
         self, label: str = "classical"
     ) -> DistributedEnergyOptimizerResults:
@@ -569,18 +1919,285 @@ class DistributedEnergyOptimizer:
 
         Returns:
             result (DistributedEnergyOptimizerResults):
-                results from optimization
+                results from optimization
+        """
+        from qiskit.algorithms import NumPyMinimumEigensolver
+        from qiskit_optimization.algorithms import MinimumEigenOptimizer
+
+        solver = NumPyMinimumEigensolver()
+
+        # Create optimizer for solver
+        optimizer = MinimumEigenOptimizer(solver)
+
+        # Get result from optimizer
+        result = self._solve_min_eigen(optimizer)
+
+        self.results[label] = DistributedEnergyOptimizerResults(result)
+        return self.results[label]
+
+    # Dynamic programming
+    # ==============================================================================
+    def _output_grid(
+        self, outputs: np.ndarray, resolution: Optional[float], max_states: int
+    ) -> Tuple[float, bool]:
+        """
+        Step of the cumulative output grid used by run_exact_dp, and whether every
+        plant output lies exactly on it.
+        """
+        if resolution is not None:
+            grid = float(resolution)
+        else:
+            # common step of all outputs, detected on a micro-unit grid
+            micro = np.round(outputs * 1e6)
+            if np.allclose(micro / 1e6, outputs, rtol=0, atol=1e-9):
+                grid = np.gcd.reduce(micro.astype(np.int64).ravel()) / 1e6
+            else:
+                grid = 0.0
+            total = outputs.max(axis=1).sum()
+            if grid == 0.0 or total / grid >= max_states:
+                grid = total / (max_states - 1)
+        exact = np.allclose(np.round(outputs / grid) * grid, outputs, atol=1e-9)
+        return grid, bool(exact)
+
+    @_timed
+    def run_exact_dp(
+        self,
+        label: str = "exact_dp",
+        resolution: Optional[float] = None,
+        max_states: int = 100_000,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Dynamic programming method over plants and cumulative power output.
+
+        Apart from the load balance term, the objective is a sum of independent
+        per-plant costs over the N+2 valid states of each plant (off or power level
+        k). Plants are added one at a time, keeping for every reachable total output
+        the cheapest commitment, and the load term is evaluated on the totals at the
+        end. This takes O(n (N+2) T) time for T grid points of total output.
+
+        The grid step is the common step of all plant outputs, so the optimum is
+        exact when the outputs are commensurate (e.g. given to a few decimals).
+        Otherwise, or when that grid has more than max_states points, outputs are
+        snapped to a coarser grid; extras["exact"] is then False and the result is
+        a near-optimal dispatch whose cost is still evaluated exactly.
+
+        Args:
+            label (str):
+                label to use for results
+
+            resolution (Optional[float]):
+                step of the total output grid. Defaults to the common step of the
+                plant outputs, capped by max_states.
+
+            max_states (int):
+                maximum number of grid points of total output
+
+        Returns:
+            result (DistributedEnergyOptimizerResults):
+                results from optimization
+        """
+        n = self.params["n"]
+        N = self.params["N"]
+        A = np.asarray(self.params["A"], dtype=float)
+        B = np.asarray(self.params["B"], dtype=float)
+        C = np.asarray(self.params["C"], dtype=float)
+        beta = self.params["beta"]
+        L = self.params["L"]
+
+        with self._stage("optimization"):
+            # state s = 0 is off, s = k + 1 is power level k
+            levels = self.power_levels()
+            outputs = np.concatenate([np.zeros((n, 1)), levels], axis=1)
+            costs = np.concatenate(
+                [np.zeros((n, 1)), (A + (B + C * levels.T) * levels.T).T], axis=1
+            )
+            grid, exact = self._output_grid(outputs, resolution, max_states)
+            steps = np.round(outputs / grid).astype(int)
+
+            # cheapest cost and true total output of every reachable grid point
+            size = steps.max(axis=1).sum() + 1
+            best = np.full(size, np.inf)
+            best[0] = 0.0
+            totals = np.zeros(size)
+            choice = np.zeros((n, size), dtype=np.min_scalar_type(N + 1))
+            reach = 1
+            for i in range(n):
+                new_best = np.full(size, np.inf)
+                new_totals = np.zeros(size)
+                for s in range(N + 2):
+                    cells = slice(steps[i, s], steps[i, s] + reach)
+                    cand = best[:reach] + costs[i, s]
+                    better = cand < new_best[cells]
+                    new_best[cells] = np.where(better, cand, new_best[cells])
+                    new_totals[cells] = np.where(
+                        better, totals[:reach] + outputs[i, s], new_totals[cells]
+                    )
+                    choice[i, cells] = np.where(better, s, choice[i, cells])
+                best, totals = new_best, new_totals
+                reach += steps[i].max()
+
+            # add the load balance term and backtrack the optimal states
+            objective = best + beta * (totals - L) ** 2
+            cell = int(np.argmin(objective))
+            opt_cost = float(objective[cell])
+            state = np.zeros(n, dtype=int)
+            for i in reversed(range(n)):
+                state[i] = choice[i, cell]
+                cell -= steps[i, state[i]]
+
+            opt_values = self.variables.encode([state > 0], [state - 1])[0]
+        self.results[label] = DistributedEnergyOptimizerResults(
+            {"vs": (state == 0).astype(int), "ps": outputs[np.arange(n), state]},
+            {
+                "opt_cost": opt_cost,
+                "opt_state": opt_values.tolist(),
+                "names": self.variable_names,
+                "grid": grid,
+                "num_states": size,
+                "exact": exact,
+            },
+        )
+        return self.results[label]
+
+    # Structured model
+    # ==============================================================================
+    @_timed
+    def run_structured(
+        self,
+        label: str = "structured",
+        num_reads: int = 1,
+        max_passes: int = 100,
+        initial_state: Optional[List[int]] = None,
+        perturbation: float = 0.05,
+        seed: Optional[int] = None,
+        top_k: int = 10,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Local search on the structured model (see StructuredEnergyModel.solve). It
+        never builds the dense QUBO, so it scales to networks with many thousands
+        of plants.
+
+        Args:
+            label (str):
+                label to use for results
+
+            num_reads (int):
+                number of local searches
+
+            max_passes (int):
+                maximum number of descent passes per read
+
+            initial_state (Optional[List[int]]):
+                0/1 state ordered like variable_names, e.g. the solution of a
+                previous period. It is polished (see StructuredEnergyModel.polish)
+                and kept as one more sample next to the reads, which start from
+                the Lagrangian relaxation of the load balance term.
+
+            perturbation (float):
+                fraction of plants set to a random configuration before every read
+                but the first one
+
+            seed (Optional[int]):
+                random seed of the perturbations
+
+            top_k (int):
+                number of lowest-energy distinct states kept in the results' samples
+
+        Returns:
+            result (DistributedEnergyOptimizerResults):
+                results from optimization
+        """
+        model = self.structured_model
+        with self._stage("optimization"):
+            states, energies = model.solve(
+                num_reads=num_reads,
+                max_passes=max_passes,
+                perturbation=perturbation,
+                seed=seed,
+            )
+            if initial_state is not None:
+                warm, warm_energies = model.polish([initial_state])
+                states = np.concatenate([states, warm])
+                energies = np.concatenate([energies, warm_energies])
+        with self._stage("aggregation"):
+            samples = SampleSummary.from_states(states, energies, top_k=top_k)
+
+        self.results[label] = DistributedEnergyOptimizerResults(
+            None,
+            {
+                "opt_cost": samples.best_energy,
+                "opt_state": samples.best_state.tolist(),
+                "names": self.variable_names,
+                "num_reads": num_reads,
+            },
+            samples,
+        )
+        return self.results[label]
+
+    def _candidate_states(
+        self, results: DistributedEnergyOptimizerResults, top_k: int
+    ) -> np.ndarray:
+        """
+        Up to top_k most relevant states of a run, ordered like variable_names: the
+        lowest-energy samples of annealer runs, the most probable bitstrings of
+        gate-based runs, or the optimal state otherwise.
+        """
+        if results.samples is not None:
+            return results.samples.states[:top_k]
+        raw = results.results
+        if isinstance(raw, dict) and "states" in raw:
+            return np.asarray(raw["states"])[:top_k]
+        if getattr(raw, "samples", None):
+            samples = sorted(raw.samples, key=lambda sample: -sample.probability)
+            return self.variables.reorder(
+                [sample.x for sample in samples[:top_k]], raw.variable_names
+            )
+        return self._best_state(results)[None, :]
+
+    def polish(
+        self, label: str, top_k: int = 10, max_steps: Optional[int] = None
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Post-process the states of a run with StructuredEnergyModel.polish: invalid
+        plant encodings are repaired and every state descends with single plant
+        moves to a local minimum. The raw results are kept, the polished states are
+        added to their extras.
+
+        Args:
+            label (str):
+                label of the results to polish
+
+            top_k (int):
+                number of states to polish, see _candidate_states
+
+            max_steps (Optional[int]):
+                maximum number of descent steps. Defaults to a local minimum.
+
+        Returns:
+            result (DistributedEnergyOptimizerResults):
+                the results of label, whose extras gain "raw_energies" and
+                "polished_energies" (QUBO energies of the states before and after),
+                "polished_states" and the best of them as "polished_opt_cost" and
+                "polished_opt_state" (ordered like variable_names)
         """
-        solver = NumPyMinimumEigensolver()
-
-        # Create optimizer for solver
-        optimizer = MinimumEigenOptimizer(solver)
-
-        # Get result from optimizer
-        result = optimizer.solve(self.quadratic_program)
-
-        self.results[label] = DistributedEnergyOptimizerResults(result)
-        return self.results[label]
+        if label not in self.results:
+            raise ValueError(f"No results with label {label}.")
+        results = self.results[label]
+        model = self.structured_model
+        with self._stage("polishing"):
+            states = self._candidate_states(results, top_k)
+            polished, energies = model.polish(states, max_steps=max_steps)
+            best = int(np.argmin(energies))
+            results.extras.update(
+                {
+                    "raw_energies": model.energies(states),
+                    "polished_energies": energies,
+                    "polished_states": polished,
+                    "polished_opt_cost": float(energies[best]),
+                    "polished_opt_state": polished[best].astype(int).tolist(),
+                }
+            )
+        return results
 
     # D-WAVE
     # ==============================================================================
@@ -604,35 +2221,98 @@ class DistributedEnergyOptimizer:
               -> linear: (-c/4) x2
               -> quadratic: (c/4) x1x2
         """
-        new_linear_terms = {}
-        new_quadratic_terms = {}
-        new_offset = self.offset
+        names = self.variable_names
+        h, J, offset = qubo_to_ising(
+            self.linear_coeffs, self.quadratic_coeffs, self.offset
+        )
+        new_linear_terms = dict(zip(names, h.tolist()))
+        rows, cols, vals = _upper_triangular_entries(J)
+        new_quadratic_terms = {
+            (names[r], names[c]): v
+            for r, c, v in zip(rows.tolist(), cols.tolist(), vals.tolist())
+        }
+        return new_linear_terms, new_quadratic_terms, offset
+
+    def gen_ising_model(self) -> "dimod.BinaryQuadraticModel":
+        """
+        Generates a spin-basis dimod BinaryQuadraticModel straight from the
+        coefficient arrays, using {1,-1} instead of {0,1} for the binary variables.
 
-        # linear terms
-        for var_name, coeff in self.linear_terms.items():
-            new_offset += coeff / 2.0
-            new_linear_terms[var_name] = new_linear_terms.get(var_name, 0) + (
-                -coeff / 2.0
-            )
+        Samples map back to the {0,1} basis with convert_basis, and ising_to_qubo
+        recovers the {0,1} coefficients. Note that dimod's own change_vartype uses
+        the opposite convention (spin 1 -> binary 1).
 
-        # quadratic terms
-        for var_names, coeff in self.quadratic_terms.items():
-            new_offset += coeff / 4
-            var_name1, var_name2 = var_names
-            new_linear_terms[var_name1] = new_linear_terms.get(var_name1, 0) + (
-                -coeff / 4
-            )
-            new_linear_terms[var_name2] = new_linear_terms.get(var_name2, 0) + (
-                -coeff / 4
-            )
-            new_quadratic_terms[var_names] = new_quadratic_terms.get(var_names, 0) + (
-                coeff / 4
-            )
-        return new_linear_terms, new_quadratic_terms, new_offset
+        Returns:
+            model (dimod.BinaryQuadraticModel):
+                spin-basis model whose variables are labelled by variable_names
+        """
+        import dimod
+
+        h, J, offset = qubo_to_ising(
+            self.linear_coeffs, self.quadratic_coeffs, self.offset
+        )
+        return dimod.BinaryQuadraticModel.from_numpy_vectors(
+            h,
+            _upper_triangular_entries(J),
+            offset,
+            dimod.SPIN,
+            variable_order=self.variable_names,
+        )
+
+    def _time_to_solution(
+        self,
+        samples: SampleSummary,
+        elapsed: float,
+        target_energy: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """
+        Time to solution extras of a sampling run.
+
+        Args:
+            samples (SampleSummary):
+                samples of the run
+            elapsed (float):
+                wall time of the run in seconds
+            target_energy (Optional[float]):
+                energy that counts as a success. Defaults to the lowest energy.
+
+        Returns:
+            extras (Dict[str, float]):
+                "time_per_shot", "success_probability" and "tts99"
+        """
+        time_per_shot = elapsed / samples.stats["num_reads"]
+        success = samples.success_probability(target_energy)
+        return {
+            "time_per_shot": time_per_shot,
+            "success_probability": success,
+            "tts99": time_to_solution(success, time_per_shot),
+        }
+
+    def _response_samples(
+        self, response: "dimod.SampleSet"
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Samples of a spin-basis dimod response as 0/1 states.
+
+        Args:
+            response (dimod.SampleSet):
+                response of a sampler on ising_model
+
+        Returns:
+            states (np.ndarray): (S, Q) 0/1 states ordered like variable_names
+            energies (np.ndarray): (S,) energy of each state
+            num_occurrences (np.ndarray): (S,) number of reads of each state
+        """
+        record = response.record
+        states = self.variables.reorder(
+            self.convert_basis(record["sample"]), list(response.variables)
+        )
+        return states, record["energy"], record["num_occurrences"]
 
-    def convert_basis(self, y: int) -> int:
+    def convert_basis(self, y: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
         """
         Convert coefficients that use {1,-1} instead of {0,1} for the binary variables.
+        Accepts a single spin or an array of spins, e.g. a dimod record.
 
         Map:
             1  -> 0
@@ -640,10 +2320,27 @@ class DistributedEnergyOptimizer:
             y  -> x
             x  =  (1-y)/2
         """
-        return int((1 - y) / 2)
+        x = (1 - np.asarray(y, dtype=int)) // 2
+        return int(x) if x.ndim == 0 else x
 
+    @_timed
     def run_annealer_sim(
-        self, label: str = "annealer_sim", num_shots: int = 100
+        self,
+        label: str = "annealer_sim",
+        num_shots: int = 100,
+        initial_state: Optional[List[int]] = None,
+        engine: str = "dimod",
+        num_sweeps: Optional[int] = None,
+        beta_range: Optional[Tuple[float, float]] = None,
+        schedule: str = "geometric",
+        seed: Optional[int] = None,
+        top_k: int = 10,
+        keep_response: bool = False,
+        chunk_size: Optional[int] = None,
+        patience: Optional[int] = None,
+        bin_width: Optional[float] = None,
+        target_energy: Optional[float] = None,
+        polish: bool = False,
     ) -> DistributedEnergyOptimizerResults:
         """
         Annealer Optimization method run on a simulator.
@@ -655,43 +2352,253 @@ class DistributedEnergyOptimizer:
             num_shots (int):
                 number of shots to run on the experiment
 
+            initial_state (Optional[List[int]]):
+                0/1 state ordered like variable_names, e.g. the solution of a
+                previous period. It is kept as the optimal state if none of the
+                samples has a lower energy. The "qudra" engine also starts every
+                replica from it.
+
+            engine (str):
+                "dimod" for Ocean's (dwave-samplers) single-flip
+                SimulatedAnnealingSampler on ising_model, or
+                "qudra" for the vectorized GroupAnnealer, which runs all shots as
+                replicas of one array and only makes moves that keep every plant's
+                group of variables in a valid configuration of the encoding
+
+            num_sweeps (Optional[int]):
+                number of sweeps per shot. Defaults to the engine's default.
+
+            beta_range (Optional[Tuple[float, float]]):
+                (hot, cold) inverse temperatures. Defaults to the engine's estimate.
+
+            schedule (str):
+                "geometric" or "linear" beta schedule, "qudra" engine only
+
+            seed (Optional[int]):
+                random seed. The "dimod" engine draws the seed of every chunk from
+                it.
+
+            top_k (int):
+                number of lowest-energy distinct states kept in the results' samples
+
+            keep_response (bool):
+                whether to keep the dimod SampleSet of all shots as the results'
+                results attribute, which is None otherwise
+
+            chunk_size (Optional[int]):
+                number of shots sampled at a time. Every chunk is folded into
+                running aggregates (see SampleAggregator) and dropped, so memory use
+                does not grow with num_shots. Defaults to all shots at once.
+
+            patience (Optional[int]):
+                stop early once the lowest energy has not improved for this many
+                consecutive chunks. Defaults to running all shots.
+
+            bin_width (Optional[float]):
+                energy bin width of the samples' histogram. Defaults to no histogram.
+
+            target_energy (Optional[float]):
+                energy that counts as a success for the time to solution, e.g. a
+                known optimum. Defaults to the lowest energy found.
+
+            polish (bool):
+                whether to polish the top_k samples afterwards, see polish
+
         Returns:
             result (DistributedEnergyOptimizerResults):
-                results from optimization
+                results from optimization. Its extras "num_shots" and "num_chunks"
+                are the numbers of shots and chunks actually run, and
+                "time_per_shot", "success_probability" and "tts99" the wall time
+                per shot, the fraction of shots at the target energy and the time
+                to reach it with 99% confidence.
         """
-        vartype = dimod.SPIN
+        if engine not in ("dimod", "qudra"):
+            raise ValueError(f"Unknown engine {engine}, use 'dimod' or 'qudra'.")
+        chunk_size = num_shots if chunk_size is None else chunk_size
+        if chunk_size < 1:
+            raise ValueError("Please provide a positive chunk_size.")
+        if keep_response and chunk_size < num_shots:
+            raise ValueError("keep_response needs all shots in a single chunk.")
+        sweep_kwargs = {} if num_sweeps is None else {"num_sweeps": num_sweeps}
+        rng = np.random.default_rng(seed)
+
+        # run classical simulated annealing, one chunk of shots at a time
+        aggregator = SampleAggregator(top_k=top_k, bin_width=bin_width)
+        response = None
+        num_chunks, num_stable = 0, 0
+        # build the model first, so that only sampling counts as time per shot
+        model = self.ising_model if engine == "dimod" else self.annealer
+        start = time.perf_counter()
+        while aggregator.num_reads < num_shots:
+            num_reads = min(chunk_size, num_shots - aggregator.num_reads)
+            if engine == "dimod":
+                from dwave.samplers import SimulatedAnnealingSampler
+
+                with self._stage("sampling"):
+                    response = SimulatedAnnealingSampler().sample(
+                        model,
+                        num_reads=num_reads,
+                        beta_range=beta_range,
+                        seed=int(rng.integers(2**31)),
+                        **sweep_kwargs,
+                    )
+                with self._stage("decoding"):
+                    states, energies, num_occurrences = self._response_samples(response)
+            else:
+                with self._stage("sampling"):
+                    states, energies = model.sample(
+                        num_reads=num_reads,
+                        beta_range=beta_range,
+                        schedule=schedule,
+                        initial_states=(
+                            None if initial_state is None else [initial_state]
+                        ),
+                        seed=rng,
+                        **sweep_kwargs,
+                    )
+                num_occurrences = None
+                if keep_response:
+                    import dimod
+
+                    response = dimod.SampleSet.from_samples(
+                        (1 - 2 * states, self.variable_names), dimod.SPIN, energies
+                    )
+
+            best_energy = aggregator.best_energy
+            with self._stage("aggregation"):
+                feasible = self.variables.valid(states).all(axis=1)
+                aggregator.add(states, energies, num_occurrences, feasible)
+            num_chunks += 1
+            num_stable = num_stable + 1 if aggregator.best_energy >= best_energy else 0
+            if patience is not None and num_stable >= patience:
+                break
 
-        # run classical simulated annealing
-        linear_terms, quadratic_terms, offset = self._convert_coeff()
+        # store results
+        elapsed = time.perf_counter() - start
+        samples = aggregator.summary()
+        opt_cost = samples.best_energy
+        opt_values = samples.best_state.tolist()
 
-        model = dimod.BinaryQuadraticModel(
-            linear_terms, quadratic_terms, offset=offset, vartype=vartype
-        )
-        sampler = dimod.SimulatedAnnealingSampler()
-        response = sampler.sample(model, num_reads=num_shots)
+        if initial_state is not None:
+            initial_cost = self.qubo_energies([initial_state])[0]
+            if initial_cost < opt_cost:
+                opt_cost = initial_cost
+                opt_values = list(initial_state)
 
-        # store results
-        energies = response.record["energy"]
-        min_indx = np.argmin(energies)
-        opt_values = response.record["sample"][min_indx]
-        opt_values = [self.convert_basis(y) for y in opt_values]
-        names = list(response.variables)
         self.results[label] = DistributedEnergyOptimizerResults(
-            response,
+            response if keep_response else None,
             {
-                "opt_cost": energies[min_indx],
+                "opt_cost": opt_cost,
                 "opt_state": opt_values,
-                "names": names,
-                "num_shots": num_shots,
+                "names": self.variable_names,
+                "num_shots": samples.stats["num_reads"],
+                "num_chunks": num_chunks,
+                **self._time_to_solution(samples, elapsed, target_energy),
             },
+            samples,
         )
+        if polish:
+            self.polish(label, top_k)
         return self.results[label]
 
+    def embedding_key(self, sampler: "dimod.Structured") -> str:
+        """
+        Key of the minor-embedding of the model on a structured sampler. The
+        model's interaction graph depends only on n, N and encoding, so the
+        embedding is shared by all models with those params.
+
+        Args:
+            sampler (dimod.Structured):
+                sampler whose edgelist is the target graph
+
+        Returns:
+            key (str):
+                hex SHA-256 digest
+        """
+        return params_hash(
+            {
+                "n": self.params["n"],
+                "N": self.params["N"],
+                "encoding": self.params["encoding"],
+                "target": params_hash({"edges": sampler.edgelist}),
+            }
+        )
+
+    def embedding(
+        self, sampler: "dimod.Structured", seed: Optional[int] = None
+    ) -> Dict[str, List[int]]:
+        """
+        Minor-embedding of the model on a structured sampler. It is looked up in
+        memory and in self.cache (under embedding_key) before it is searched for
+        with minorminer, so the search runs once per interaction graph and target.
+
+        Args:
+            sampler (dimod.Structured):
+                sampler whose edgelist is the target graph
+            seed (Optional[int]):
+                random seed of the minorminer search
+
+        Returns:
+            embedding (Dict[str, List[int]]):
+                chain of target qubits of every variable
+        """
+        key = self.embedding_key(sampler)
+        if key in self._embeddings:
+            return self._embeddings[key]
+
+        import minorminer
+
+        edges = list(self.ising_model.quadratic)
+        with self._stage("embedding", cached=False) as meta:
+            embedding = None if self.cache is None else self.cache.get(key, "embedding")
+            if embedding is not None and self._covers(embedding, sampler, edges):
+                meta["cached"] = True
+            else:
+                embedding = minorminer.find_embedding(
+                    edges, sampler.edgelist, random_seed=seed
+                )
+                if not embedding:
+                    raise ValueError(
+                        f"No embedding of {len(self.variable_names)} variables "
+                        f"found on {getattr(sampler, 'name', 'the sampler')}."
+                    )
+                embedding = {name: list(chain) for name, chain in embedding.items()}
+                if self.cache is not None:
+                    self.cache.put(key, "embedding", embedding)
+        self._embeddings[key] = embedding
+        return embedding
+
+    def _covers(
+        self,
+        embedding: Dict[str, List[int]],
+        sampler: "dimod.Structured",
+        edges: List[Tuple[str, str]],
+    ) -> bool:
+        """
+        Whether embedding has a chain for every variable and a coupler for every
+        interaction of the model
+        """
+        if set(embedding) != set(self.variable_names):
+            return False
+        couplers = set(map(tuple, sampler.edgelist))
+        couplers |= {(v, u) for u, v in couplers}
+        return all(
+            any((a, b) in couplers for a in embedding[u] for b in embedding[v])
+            for u, v in edges
+        )
+
+    @_timed
     def run_annealer_qpu(
         self,
         label: str = "annealer_qpu",
         num_shots: int = 100,
         device_name: str = "DW_2000Q_6",
+        top_k: int = 10,
+        keep_response: bool = False,
+        sampler: Optional["dimod.Structured"] = None,
+        chain_strength: Optional[float] = None,
+        embedding_seed: Optional[int] = None,
+        polish: bool = False,
     ) -> DistributedEnergyOptimizerResults:
         """
         Annealer Optimization method run on DWAVE annealers.
@@ -706,41 +2613,635 @@ class DistributedEnergyOptimizer:
             device_name (str):
                 DWAVE device name. E.g. "DW_2000Q_6"
 
+            top_k (int):
+                number of lowest-energy distinct states kept in the results' samples
+
+            keep_response (bool):
+                whether to keep the dimod SampleSet of all shots as the results'
+                results attribute, which is None otherwise
+
+            sampler (Optional[dimod.Structured]):
+                structured sampler to run on instead of the Braket device named
+                device_name, e.g. a SimulatedQPUSampler for offline runs
+
+            chain_strength (Optional[float]):
+                coupling of the qubits of a chain. Defaults to dwave-system's
+                uniform torque compensation.
+
+            embedding_seed (Optional[int]):
+                random seed of the embedding search, see embedding
+
+            polish (bool):
+                whether to polish the top_k samples afterwards, see polish
+
         Returns:
             result (DistributedEnergyOptimizerResults):
                 results from optimization
         """
-
-        device = "arn:aws:braket:::device/qpu/d-wave/" + device_name
-        vartype = dimod.SPIN
+        from dwave.system.composites import FixedEmbeddingComposite
 
         # define BQM
-        linear_terms, quadratic_terms, offset = self._convert_coeff()
+        model = self.ising_model
+
+        if sampler is None:
+            from braket.ocean_plugin import BraketDWaveSampler
+
+            device = "arn:aws:braket:::device/qpu/d-wave/" + device_name
+            s3_folder = ("amazon-braket-qbraid-jobs", "5f2001ee89-40iitp-2eac-2ein")
+            sampler = BraketDWaveSampler(s3_folder, device_arn=device)
+        embedding = self.embedding(sampler, seed=embedding_seed)
+
+        # run BQM: solve on the device with the cached embedding
+        composite = FixedEmbeddingComposite(sampler, embedding)
+        start = time.perf_counter()
+        with self._stage("sampling"):
+            response = composite.sample(
+                model, num_reads=num_shots, chain_strength=chain_strength
+            )
+        elapsed = time.perf_counter() - start
 
-        model = dimod.BinaryQuadraticModel(
-            linear_terms, quadratic_terms, offset=offset, vartype=vartype
+        # store results
+        with self._stage("decoding"):
+            states, energies, num_occurrences = self._response_samples(response)
+        with self._stage("aggregation"):
+            samples = SampleSummary.from_states(
+                states, energies, num_occurrences, top_k
+            )
+        chain_breaks = response.record["chain_break_fraction"]
+        chain_lengths = [len(chain) for chain in embedding.values()]
+        self.results[label] = DistributedEnergyOptimizerResults(
+            response if keep_response else None,
+            {
+                "opt_cost": samples.best_energy,
+                "opt_state": samples.best_state.tolist(),
+                "names": self.variable_names,
+                "num_shots": num_shots,
+                "num_qubits": sum(chain_lengths),
+                "max_chain_length": max(chain_lengths),
+                "chain_break_fraction": float(
+                    np.average(chain_breaks, weights=response.record.num_occurrences)
+                ),
+                **self._time_to_solution(samples, elapsed),
+            },
+            samples,
         )
+        if polish:
+            self.polish(label, top_k)
+        return self.results[label]
+
+    # Result store
+    # ==============================================================================
+    def result_key(self, method: str, **kwargs) -> str:
+        """
+        Key of a run in the result store.
 
-        s3_folder = ("amazon-braket-qbraid-jobs", "5f2001ee89-40iitp-2eac-2ein")
+        Args:
+            method (str):
+                solve method, i.e. the suffix of a run_* method
+            **kwargs:
+                keyword arguments of the run_* method, except label
 
-        # run BQM: solve with the D-Wave device
-        sampler = BraketDWaveSampler(s3_folder, device_arn=device)
-        sampler = EmbeddingComposite(sampler)
-        response = sampler.sample(model, num_reads=num_shots)
+        Returns:
+            key (str):
+                hash of model_key, method, seed, num_shots and the other kwargs
+        """
+        options = dict(kwargs)
+        seed = options.pop("seed", None)
+        shots = options.pop("num_shots", None)
+        return result_key(self.model_key, method, seed, shots, options)
+
+    @_timed
+    def run_stored(
+        self,
+        method: str = "annealer_sim",
+        label: Optional[str] = None,
+        refresh: bool = False,
+        **kwargs,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Solve with a run_* method unless the same run is already in self.store.
+
+        A run is the same if the model (see model_key), method, seed, num_shots and
+        the other keyword arguments are. Stored results only keep the compact
+        extras ("opt_cost", "opt_state", "names" and JSON-compatible scalars), so
+        their results attribute is None and their extras have "stored": True.
+
+        Args:
+            method (str):
+                solve method, i.e. the suffix of a run_* method
+
+            label (Optional[str]):
+                label to use for results. Defaults to method.
+
+            refresh (bool):
+                whether to solve and overwrite the stored result even if there is one
+
+            **kwargs:
+                extra keyword arguments for the run_* method. E.g. num_shots, seed
+
+        Returns:
+            result (DistributedEnergyOptimizerResults):
+                stored or new results
+        """
+        if self.store is None:
+            raise ValueError("Please provide a store to use run_stored.")
+        if not hasattr(self, f"run_{method}"):
+            raise ValueError(f"Unknown method {method}.")
+        label = method if label is None else label
+
+        key = self.result_key(method, **kwargs)
+        with self._stage("store_lookup"):
+            record = None if refresh else self.store.get(key)
+        if record is not None:
+            extras = dict(record["extras"])
+            extras.update(
+                {
+                    "opt_cost": record["opt_cost"],
+                    "opt_state": record["opt_state"],
+                    "names": self.variable_names,
+                    "stored": True,
+                }
+            )
+            self.results[label] = DistributedEnergyOptimizerResults(None, extras)
+            return self.results[label]
+
+        result = getattr(self, f"run_{method}")(label=label, **kwargs)
+        state = self._best_state(result)
+        extras = {
+            name: value
+            for name, value in result.extras.items()
+            if name not in ("opt_cost", "opt_state", "names", "timings")
+        }
+        with self._stage("store_write"):
+            self.store.put(
+                {
+                    "key": key,
+                    "params_hash": self.model_key,
+                    "method": method,
+                    "seed": kwargs.get("seed"),
+                    "shots": kwargs.get("num_shots"),
+                    "options": kwargs,
+                    "opt_cost": float(self.qubo_energies([state])[0]),
+                    "opt_state": state,
+                    "extras": extras,
+                }
+            )
+        return result
+
+    def stored_results(
+        self, method: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        All stored results of this model, cheapest first.
+
+        Args:
+            method (Optional[str]):
+                only results of this solve method
+            limit (Optional[int]):
+                maximum number of results
+
+        Returns:
+            records (List[Dict[str, Any]]):
+                store records, see ResultStore
+        """
+        if self.store is None:
+            raise ValueError("Please provide a store to use stored_results.")
+        return self.store.query(self.model_key, method, limit)
+
+    # Batch dispatch
+    # ==============================================================================
+    def _worker_copy(self, coeff_arrays: bool = True) -> "DistributedEnergyOptimizer":
+        """
+        Independent copy that shares no mutable state with this optimizer.
+        Heavyweight caches and results are dropped.
+
+        Args:
+            coeff_arrays (bool):
+                whether the copy keeps the coefficient arrays, built first so that
+                workers do not each build them. Copies for QUBO_FREE_METHODS hold
+                none, so the dense QUBO is neither built nor pickled.
+        """
+        if coeff_arrays:
+            self._ensure_coeff_arrays()
+        worker = copy.copy(self)
+        worker.params = copy.deepcopy(self.params)
+        worker.results = {}
+        if coeff_arrays:
+            worker._linear_coeffs = self._linear_coeffs.copy()
+            worker._quadratic_coeffs = self._quadratic_coeffs.copy()
+        else:
+            worker._linear_coeffs = None
+            worker._quadratic_coeffs = None
+            worker._offset = None
+        worker._linear_terms = None
+        worker._quadratic_terms = None
+        worker._quadratic_program = None
+        worker._ising_model = None
+        worker._annealer = None
+        worker._structured_model = None
+        worker._ising_operator = None
+        worker.on_stage = None
+        worker._timings = []
+        return worker
+
+    @_timed
+    def run_batch(
+        self,
+        demands: List[float],
+        method: str = "annealer_sim",
+        label: str = "batch",
+        num_workers: Optional[int] = None,
+        warm_start: bool = True,
+        **kwargs,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Solve one dispatch per demand value of a time series, e.g. 96 quarter-hour
+        values of L.
+
+        The coefficient arrays are built once (unless the method is one of
+        QUBO_FREE_METHODS) and every period only patches the demand with
+        update_demand. The series is split into contiguous chunks that
+        are solved in parallel worker processes. Within a chunk each period is
+        seeded with the solution of the previous period.
+
+        Args:
+            demands (List[float]):
+                demand L of every period
+
+            method (str):
+                solve method, i.e. the suffix of a run_* method. E.g. "annealer_sim",
+                "classical", "qaoa" or "vqe"
+
+            label (str):
+                label to use for results
+
+            num_workers (Optional[int]):
+                number of worker processes. Defaults to the number of CPUs, capped by
+                the number of periods. With 1 worker, periods are solved in this
+                process.
+
+            warm_start (bool):
+                whether to seed each period with the previous period's solution
+
+            **kwargs:
+                extra keyword arguments for the run_* method. E.g. num_shots
+
+        Returns:
+            result (DistributedEnergyOptimizerResults):
+                results whose results attribute holds one stacked array per quantity:
+                    "L": (T,), "opt_cost": (T,), "states": (T, Q),
+                    "vs": (T, n), "zs": (T, n, N+1), "ps": (T, n)
+        """
+        if not hasattr(self, f"run_{method}"):
+            raise ValueError(f"Unknown method {method}.")
+
+        demands = np.asarray(demands, dtype=float)
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, len(demands)))
+        chunks = np.array_split(demands, num_workers)
+
+        worker = self._worker_copy(coeff_arrays=method not in self.QUBO_FREE_METHODS)
+        with self._stage("optimization", num_workers=num_workers):
+            if num_workers == 1:
+                outputs = [_solve_periods(worker, demands, method, warm_start, kwargs)]
+            else:
+                with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    futures = [
+                        executor.submit(
+                            _solve_periods,
+                            worker,
+                            chunk,
+                            method,
+                            warm_start,
+                            kwargs,
+                        )
+                        for chunk in chunks
+                    ]
+                    outputs = [future.result() for future in futures]
+
+        states = np.concatenate([states for states, _ in outputs])
+        opt_cost = np.concatenate([costs for _, costs in outputs])
+        with self._stage("decoding"):
+            vs, zs, ps = self.decode_samples(states)
 
-        # store results
-        energies = response.record["energy"]
-        min_indx = np.argmin(energies)
-        opt_values = response.record["sample"][min_indx]
-        opt_values = [self.convert_basis(y) for y in opt_values]
-        names = list(response.variables)
         self.results[label] = DistributedEnergyOptimizerResults(
-            response,
             {
-                "opt_cost": energies[min_indx],
-                "opt_state": opt_values,
-                "names": names,
-                "num_shots": num_shots,
+                "L": demands,
+                "opt_cost": opt_cost,
+                "states": states,
+                "vs": vs,
+                "zs": zs,
+                "ps": ps,
+            },
+            {
+                "method": method,
+                "num_workers": num_workers,
+                "chunk_sizes": [len(chunk) for chunk in chunks],
+                "warm_start": warm_start,
+            },
+        )
+        return self.results[label]
+
+    # Portfolio
+    # ==============================================================================
+    @_timed
+    def run_portfolio(
+        self,
+        methods: Sequence[str] = ("exact_dp", "annealer_sim", "qaoa"),
+        time_budget: Optional[float] = None,
+        label: str = "portfolio",
+        method_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+        num_workers: Optional[int] = None,
+        callback: Optional[
+            Callable[[str, DistributedEnergyOptimizerResults], None]
+        ] = None,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Race several solve methods in worker processes and keep the best feasible
+        solution found within a time budget.
+
+        Every method runs in its own process, with at most num_workers at a time.
+        As methods finish, their results are stored in self.results under the
+        method name and self.results[label] is updated to the best solution so far.
+        A solution is feasible if every plant's variables form a valid encoding.
+        Infeasible solutions only win if no method finds a feasible one. Methods
+        still running or waiting when the budget expires are cancelled.
+
+        Args:
+            methods (Sequence[str]):
+                solve methods, i.e. suffixes of run_* methods
+
+            time_budget (Optional[float]):
+                wall time in seconds, or None to wait for all methods
+
+            label (str):
+                label to use for the best results
+
+            method_kwargs (Optional[Dict[str, Dict[str, Any]]]):
+                extra keyword arguments for the run_* method of each method.
+                E.g. {"annealer_sim": {"num_shots": 100, "seed": 0}}
+
+            num_workers (Optional[int]):
+                number of worker processes. Defaults to the number of CPUs, capped by
+                the number of methods.
+
+            callback (Optional[Callable[[str, DistributedEnergyOptimizerResults], None]]):
+                called with the method and the best results whenever they improve
+
+        Returns:
+            result (DistributedEnergyOptimizerResults):
+                results holding the results of every finished method by name, with
+                extras "opt_cost", "opt_state", "names", "method" (of the best
+                solution), "feasible", "history" ((elapsed seconds, method, cost)
+                of every improvement), "completed", "cancelled", "errors" and
+                "elapsed"
+        """
+        methods = list(methods)
+        for method in methods:
+            if not hasattr(self, f"run_{method}"):
+                raise ValueError(f"Unknown method {method}.")
+        if len(set(methods)) != len(methods):
+            raise ValueError("Please provide every method only once.")
+        method_kwargs = method_kwargs or {}
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, len(methods)))
+
+        context = multiprocessing.get_context()
+        messages = context.Queue()
+        waiting = list(methods)
+        running: Dict[str, multiprocessing.process.BaseProcess] = {}
+        results: Dict[str, DistributedEnergyOptimizerResults] = {}
+        errors: Dict[str, str] = {}
+        history: List[Tuple[float, str, float]] = []
+        best: Optional[Tuple[bool, float, str, np.ndarray]] = None
+
+        start = time.perf_counter()
+        deadline = None if time_budget is None else start + time_budget
+        try:
+            while waiting or running:
+                while waiting and len(running) < num_workers:
+                    method = waiting.pop(0)
+                    running[method] = context.Process(
+                        target=_portfolio_worker,
+                        args=(
+                            self._worker_copy(
+                                coeff_arrays=method not in self.QUBO_FREE_METHODS
+                            ),
+                            method,
+                            method_kwargs.get(method, {}),
+                            messages,
+                        ),
+                        daemon=True,
+                    )
+                    running[method].start()
+
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    break
+                try:
+                    # wake up regularly to notice workers that died without a message
+                    message = messages.get(
+                        timeout=0.1 if remaining is None else min(remaining, 0.1)
+                    )
+                except queue.Empty:
+                    for method, process in list(running.items()):
+                        if not process.is_alive() and messages.empty():
+                            errors[method] = (
+                                f"Worker exited with code {process.exitcode}."
+                            )
+                            del running[method]
+                    continue
+
+                method, payload = message
+                running.pop(method).join()
+                if isinstance(payload, str):
+                    errors[method] = payload
+                    continue
+
+                result, state = payload
+                results[method] = self.results[method] = result
+                evaluation = self.evaluate([state])
+                cost = float(evaluation["energy"][0])
+                feasible = bool(evaluation["feasible"][0])
+                if best is None or (not best[0], best[1]) > (not feasible, cost):
+                    best = (feasible, cost, method, state)
+                    history.append((time.perf_counter() - start, method, cost))
+                    self.results[label] = self._portfolio_results(
+                        results, best, history, errors, running, waiting, start
+                    )
+                    if callback is not None:
+                        callback(method, self.results[label])
+        finally:
+            for process in running.values():
+                process.terminate()
+            for process in running.values():
+                process.join()
+            messages.close()
+
+        if best is None:
+            raise RuntimeError(f"No method finished within the time budget: {errors}")
+        self.results[label] = self._portfolio_results(
+            results, best, history, errors, running, waiting, start
+        )
+        return self.results[label]
+
+    def _portfolio_results(
+        self,
+        results: Dict[str, DistributedEnergyOptimizerResults],
+        best: Tuple[bool, float, str, np.ndarray],
+        history: List[Tuple[float, str, float]],
+        errors: Dict[str, str],
+        running: Dict[str, Any],
+        waiting: List[str],
+        start: float,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Snapshot of the state of run_portfolio, see its return value
+        """
+        feasible, cost, method, state = best
+        return DistributedEnergyOptimizerResults(
+            dict(results),
+            {
+                "opt_cost": cost,
+                "opt_state": state,
+                "names": self.variable_names,
+                "method": method,
+                "feasible": feasible,
+                "history": list(history),
+                "completed": list(results),
+                "cancelled": list(running) + list(waiting),
+                "errors": dict(errors),
+                "elapsed": time.perf_counter() - start,
+            },
+        )
+
+    # Pareto front
+    # ==============================================================================
+    @_timed
+    def run_pareto(
+        self,
+        cost_types: Any,
+        weights: Optional[np.ndarray] = None,
+        resolution: int = 10,
+        method: str = "structured",
+        label: str = "pareto",
+        num_workers: Optional[int] = None,
+        warm_start: bool = True,
+        **kwargs,
+    ) -> DistributedEnergyOptimizerResults:
+        """
+        Trade-off between cost types: solve one dispatch per weight vector of a
+        grid over the weight simplex and keep the Pareto front of their costs.
+
+        The QUBO is linear in A, B and C, so the (A, B, C) block of every cost
+        type is stacked once and the costs of a weight vector are their linear
+        combination. Each point only patches the costs of the built model with
+        update_costs. The grid is split into contiguous chunks that are solved in
+        parallel worker processes, and within a chunk each point is seeded with
+        the solution of the previous, neighboring point.
+
+        Args:
+            cost_types (Any):
+                (A, B, C) costs of every plant per cost type, in any format of
+                gen_params_multicost, for the plants of this optimizer
+
+            weights (Optional[np.ndarray]):
+                weight vectors to solve, shape (W, cost_types). Defaults to
+                simplex_grid(cost_types, resolution).
+
+            resolution (int):
+                steps of the default weight grid
+
+            method (str):
+                solve method, i.e. the suffix of a run_* method. Defaults to the
+                "structured" local search, which never builds the dense QUBO.
+
+            label (str):
+                label to use for results
+
+            num_workers (Optional[int]):
+                number of worker processes. Defaults to the number of CPUs, capped by
+                the number of weight vectors. With 1 worker, points are solved in
+                this process.
+
+            warm_start (bool):
+                whether to seed each point with the previous point's solution
+
+            **kwargs:
+                extra keyword arguments for the run_* method. E.g. num_reads
+
+        Returns:
+            result (DistributedEnergyOptimizerResults):
+                results whose results attribute holds one stacked array per quantity:
+                    "weights": (W, T), "objectives": (W, T) cost of the dispatch
+                    per cost type, "opt_cost": (W,), "states": (W, Q),
+                    "ps": (W, n), "load_mismatch": (W,) and "pareto": (W,)
+                    booleans, True for dispatches on the Pareto front of the
+                    objectives. Its extras "front" lists the Pareto front points in
+                    order of the first objective.
+        """
+        if not hasattr(self, f"run_{method}"):
+            raise ValueError(f"Unknown method {method}.")
+        costs, _, _, names = _cost_tensor(cost_types)
+        if costs.shape[1] != self.params["n"]:
+            raise ValueError(
+                f"Please provide costs for {self.params['n']} plants, got "
+                f"{costs.shape[1]}."
+            )
+        if weights is None:
+            weights = simplex_grid(len(costs), resolution)
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        if weights.shape[1] != len(costs):
+            raise ValueError(f"Please provide {len(costs)} weights per point.")
+
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, len(weights)))
+        chunks = np.array_split(weights, num_workers)
+
+        worker = self._worker_copy(coeff_arrays=method not in self.QUBO_FREE_METHODS)
+        with self._stage("optimization", num_workers=num_workers):
+            args = (costs, method, warm_start, kwargs)
+            if num_workers == 1:
+                outputs = [_solve_weights(worker, weights, *args)]
+            else:
+                with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    futures = [
+                        executor.submit(_solve_weights, worker, chunk, *args)
+                        for chunk in chunks
+                    ]
+                    outputs = [future.result() for future in futures]
+
+        states = np.concatenate([states for states, _ in outputs])
+        opt_cost = np.concatenate([costs for _, costs in outputs])
+        with self._stage("decoding"):
+            vs, _, ps = self.decode_samples(states)
+            # cost of every dispatch per cost type: sum_i A_i on_i + B_i p_i + C_i p_i^2
+            features = np.stack([1 - vs, ps, ps**2], axis=-1).astype(float)
+            objectives = np.einsum("snk,tnk->st", features, costs)
+            pareto = pareto_mask(objectives)
+            front = np.flatnonzero(pareto)
+            front = front[np.argsort(objectives[front, 0], kind="stable")]
+
+        self.results[label] = DistributedEnergyOptimizerResults(
+            {
+                "weights": weights,
+                "objectives": objectives,
+                "opt_cost": opt_cost,
+                "states": states,
+                "ps": ps,
+                "load_mismatch": ps.sum(axis=1) - self.params["L"],
+                "pareto": pareto,
+            },
+            {
+                "method": method,
+                "cost_types": names,
+                "front": front.tolist(),
+                "num_workers": num_workers,
+                "chunk_sizes": [len(chunk) for chunk in chunks],
+                "warm_start": warm_start,
             },
         )
         return self.results[label]
@@ -756,7 +3257,25 @@ class DistributedEnergyOptimizer:
                 label to use when extracting optimization results
         """
         results = self.results[label]
-        if label in ["qaoa", "vqe", "grover", "classical"]:
+        if "opt_state" in results.extras:
+            print(f"Solution found using the {label} method:\n")
+            opt_cost = results.extras["opt_cost"]
+            print(f"Minimum Cost: {opt_cost} ul")
+            print(f"Optimal State: ")
+            for source_contribution, source_name in zip(
+                results.extras["opt_state"], results.extras["names"]
+            ):
+                print(f"{source_name}:\t{source_contribution}")
+            if "num_shots" in results.extras:
+                num_shots = results.extras["num_shots"]
+                print(f"\nThe solution was found with {num_shots} shots of {label}.")
+            elif "eval_count" in results.extras:
+                eval_count = results.extras["eval_count"]
+                print(
+                    f"\nThe solution was found within {eval_count} evaluations of "
+                    f"{label}."
+                )
+        elif label in ["qaoa", "vqe", "grover", "classical"]:
             eval_count = results.extras.get("eval_count", 0)
 
             print(f"Solution found using the {label} method:\n")
@@ -770,17 +3289,6 @@ class DistributedEnergyOptimizer:
             print(
                 f"\nThe solution was found within {eval_count} evaluations of {label}."
             )
-        elif label[:8] == "annealer":
-            print(f"Solution found using the {label} method:\n")
-            opt_cost = results.extras["opt_cost"]
-            print(f"Minimum Cost: {opt_cost} ul")
-            print(f"Optimal State: ")
-            for source_contribution, source_name in zip(
-                results.extras["opt_state"], results.extras["names"]
-            ):
-                print(f"{source_name}:\t{source_contribution}")
-            num_shots = results.extras["num_shots"]
-            print(f"\nThe solution was found with {num_shots} shots of {label}.")
         else:
             raise NotImplementedError(f"This method is not implemented yet for {label}")
 
@@ -793,7 +3301,10 @@ class DistributedEnergyOptimizer:
                 label to identify results
         """
 
-        if label in ["qaoa", "vqe", "grover", "classical"] or label[:8] == "annealer":
+        if (
+            label in ["qaoa", "vqe", "grover", "classical"]
+            or "opt_state" in self.results[label].extras
+        ):
             plant_names = self.params["plant_names"]
             P_min = self.params["P_min"]
             P_max = self.params["P_max"]
@@ -802,16 +3313,21 @@ class DistributedEnergyOptimizer:
 
         print(f"Plot using the {label} method:\n")
 
-        if label in ["qaoa", "vqe", "grover", "classical"]:
+        if "opt_state" in self.results[label].extras:
+            var_values = self.results[label].extras["opt_state"]
+            var_names = self.results[label].extras["names"]
+
+        else:
             results = self.results[label].results
             var_values = results.x
             var_names = results.variable_names
 
-        elif label[:8] == "annealer":
-            var_values = self.results[label].extras["opt_state"]
-            var_names = self.results[label].extras["names"]
+        from matplotlib import rcParams
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
-        _, _, P = self.parse_params(var_values, var_names)
+        _, _, P = self.decode_samples([var_values], var_names)
+        P = P[0]
         fig = plt.figure(figsize=(8, 6), dpi=200)
         _ = fig.add_axes([0, 0, 1, 1])
         sns.barplot(
@@ -825,3 +3341,142 @@ class DistributedEnergyOptimizer:
         sns.barplot(x=plant_names, y=P, color="palegreen", edgecolor=".2")
         rcParams["figure.figsize"] = 2, 3
         plt.show()
+
+
+def _solve_periods(
+    optimizer: DistributedEnergyOptimizer,
+    demands: np.ndarray,
+    method: str,
+    warm_start: bool,
+    run_kwargs: Dict[str, Any],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve consecutive periods on one optimizer, patching the demand between periods.
+    Runs inside a worker process for DistributedEnergyOptimizer.run_batch.
+
+    Args:
+        optimizer (DistributedEnergyOptimizer):
+            optimizer owned by this worker
+        demands (np.ndarray):
+            demand L of every period in this chunk
+        method (str):
+            suffix of the run_* method to use
+        warm_start (bool):
+            whether to seed each period with the previous period's solution
+        run_kwargs (Dict[str, Any]):
+            extra keyword arguments for the run_* method
+
+    Returns:
+        states (np.ndarray): optimal 0/1 state of every period, shape (T, Q)
+        costs (np.ndarray): QUBO energy of every optimal state, shape (T,)
+    """
+    run = getattr(optimizer, f"run_{method}")
+    states = np.zeros((len(demands), optimizer.variables.num_vars), dtype=int)
+    costs = np.zeros(len(demands))
+    seed: Dict[str, Any] = {}
+    warm_kwarg = (
+        DistributedEnergyOptimizer.WARM_START_KWARGS.get(method) if warm_start else None
+    )
+
+    for t, L in enumerate(demands):
+        optimizer.update_demand(float(L))
+        result = run(label=method, **run_kwargs, **seed)
+        states[t] = optimizer._best_state(result)
+        costs[t] = optimizer.evaluate(states[t : t + 1])["energy"][0]
+
+        if warm_kwarg == "initial_state":
+            seed = {"initial_state": states[t].tolist()}
+        elif warm_kwarg == "initial_point":
+            seed = {"initial_point": result.extras["optimal_point"]}
+
+    return states, costs
+
+
+def _solve_weights(
+    optimizer: DistributedEnergyOptimizer,
+    weights: np.ndarray,
+    costs: np.ndarray,
+    method: str,
+    warm_start: bool,
+    run_kwargs: Dict[str, Any],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve consecutive weight vectors on one optimizer, patching the costs between
+    points. Runs inside a worker process for DistributedEnergyOptimizer.run_pareto.
+
+    Args:
+        optimizer (DistributedEnergyOptimizer):
+            optimizer owned by this worker
+        weights (np.ndarray):
+            weight vectors of this chunk, shape (W, T)
+        costs (np.ndarray):
+            (T, n, 3) tensor of (A, B, C) per cost type and plant
+        method (str):
+            suffix of the run_* method to use
+        warm_start (bool):
+            whether to seed each point with the previous point's solution
+        run_kwargs (Dict[str, Any]):
+            extra keyword arguments for the run_* method
+
+    Returns:
+        states (np.ndarray): optimal 0/1 state of every point, shape (W, Q)
+        energies (np.ndarray): QUBO energy of every optimal state, shape (W,)
+    """
+    run = getattr(optimizer, f"run_{method}")
+    states = np.zeros((len(weights), optimizer.variables.num_vars), dtype=int)
+    energies = np.zeros(len(weights))
+    seed: Dict[str, Any] = {}
+    warm_kwarg = (
+        DistributedEnergyOptimizer.WARM_START_KWARGS.get(method) if warm_start else None
+    )
+
+    for w, weight in enumerate(weights):
+        A, B, C = np.einsum("t,tnk->kn", weight, costs)
+        optimizer.update_costs(A, B, C)
+        result = run(label=method, **run_kwargs, **seed)
+        states[w] = optimizer._best_state(result)
+        energies[w] = optimizer.structured_model.energies(states[w : w + 1])[0]
+
+        if warm_kwarg == "initial_state":
+            seed = {"initial_state": states[w].tolist()}
+        elif warm_kwarg == "initial_point":
+            seed = {"initial_point": result.extras["optimal_point"]}
+
+    return states, energies
+
+
+def _portfolio_worker(
+    optimizer: DistributedEnergyOptimizer,
+    method: str,
+    run_kwargs: Dict[str, Any],
+    messages: Any,
+) -> None:
+    """
+    Run one solve method and report its results. Runs inside a worker process for
+    DistributedEnergyOptimizer.run_portfolio.
+
+    Args:
+        optimizer (DistributedEnergyOptimizer):
+            optimizer owned by this worker
+        method (str):
+            suffix of the run_* method to use
+        run_kwargs (Dict[str, Any]):
+            extra keyword arguments for the run_* method
+        messages (multiprocessing.Queue):
+            receives (method, (results, optimal 0/1 state)), or (method, error
+            message) if the method fails
+    """
+    try:
+        result = getattr(optimizer, f"run_{method}")(label=method, **run_kwargs)
+        state = optimizer._best_state(result)
+        try:
+            pickle.dumps(result)
+        except Exception:  # pylint: disable=broad-except
+            # keep the compact solution of results that cannot leave the process
+            extras = dict(result.extras)
+            extras.update({"opt_state": state, "names": optimizer.variable_names})
+            extras.setdefault("opt_cost", optimizer.qubo_energies([state])[0])
+            result = DistributedEnergyOptimizerResults(None, extras)
+        messages.put((method, (result, state)))
+    except Exception as err:  # pylint: disable=broad-except
+        messages.put((method, f"{type(err).__name__}: {err}"))
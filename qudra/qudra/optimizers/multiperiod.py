@@ -0,0 +1,574 @@
+"""
+MultiPeriodOptimizer
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse
+
+from .cache import ModelCache, params_hash
+from .distributed_energy import (
+    DistributedEnergyOptimizer,
+    DistributedEnergyOptimizerResults,
+)
+from .store import ResultStore
+from .structured import StructuredEnergyModel
+from .variables import VariableRegistry
+
+if TYPE_CHECKING:
+    import dimod
+
+
+def _form_products(
+    left: Tuple[np.ndarray, np.ndarray],
+    right: Tuple[np.ndarray, np.ndarray],
+    weights: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    Expand sum_km W_ikm (l_k . x + a_k)(r_m . y + b_m) into QUBO terms, for every
+    plant i with group variables x in one period and y in the next one.
+
+    Args:
+        left (Tuple[np.ndarray, np.ndarray]):
+            linear forms (l, a) over x, shapes (K, G) and (K,)
+        right (Tuple[np.ndarray, np.ndarray]):
+            linear forms (r, b) over y, shapes (M, G) and (M,)
+        weights (np.ndarray):
+            weight W of every pair of forms of every plant, shape (n, K, M)
+
+    Returns:
+        quadratic (np.ndarray): coefficients of x_g y_h, shape (n, G, G)
+        linear_left (np.ndarray): coefficients of x, shape (n, G)
+        linear_right (np.ndarray): coefficients of y, shape (n, G)
+        offset (float): constant offset
+    """
+    (l, a), (r, b) = left, right
+    return (
+        np.einsum("nkm,kg,mh->ngh", weights, l, r),
+        np.einsum("nkm,m,kg->ng", weights, b, l),
+        np.einsum("nkm,k,mh->nh", weights, a, r),
+        float(np.einsum("nkm,k,m->", weights, a, b)),
+    )
+
+
+class MultiPeriodOptimizer(DistributedEnergyOptimizer):
+    """
+    Unit commitment over T consecutive periods, e.g. the 96 quarter hours of a day.
+
+    Every period has its own copy of the single-period variables and QUBO (see
+    DistributedEnergyOptimizer) with its own demand L_t. Each plant's copies in
+    adjacent periods are coupled by transition costs:
+
+        S_i     when plant i starts up, i.e. is off in period t and on in t+1
+        gamma   when plant i is on in both periods and its output changes by more
+                than its ramp limit R_i
+
+    The variables are those of a VariableRegistry with T*n plants, plant i of
+    period t being plant t*n + i. The QUBO is stored block-tridiagonally (see
+    gen_blocks): one quadratic block shared by all periods, one transition block
+    shared by all pairs of adjacent periods, and one linear vector per period. The
+    coefficient arrays assembled from the blocks are always sparse, so a day-ahead
+    schedule costs T times the memory of one period instead of T^2.
+
+    Ramp limits need linear indicators of the plant configurations (see
+    VariableRegistry.indicators), i.e. the "one_hot" or "domain_wall" encoding.
+    """
+
+    # params that define the model, and so the ModelCache key
+    MODEL_PARAMS = DistributedEnergyOptimizer.MODEL_PARAMS + [
+        "S",
+        "R",
+        "gamma",
+        "initial_on",
+    ]
+
+    # output change above the ramp limit that counts as a violation
+    RAMP_TOLERANCE = 1e-9
+
+    def __init__(
+        self,
+        params: Dict[str, Any],
+        cache: Optional[Union[str, ModelCache]] = None,
+        store: Optional[Union[str, ResultStore]] = None,
+        on_stage: Optional[Callable[[str, float, Dict[str, Any]], None]] = None,
+    ) -> None:
+        """
+        Creates MultiPeriodOptimizer object.
+
+        Args:
+            params (dict):
+                params of DistributedEnergyOptimizer, where "L" is the demand of
+                every period, plus the optional
+                    "S": start-up cost of every plant. Defaults to 0.
+                    "R": ramp limit of every plant, i.e. the largest change of its
+                        output between adjacent periods. Defaults to no limit.
+                    "gamma": penalty of a ramp limit violation. Defaults to alpha.
+                    "initial_on": whether every plant is on before the first
+                        period, so that starting it up in the first period costs
+                        S_i. Defaults to no start-up costs in the first period.
+
+            cache (Optional[Union[str, ModelCache]]):
+                see DistributedEnergyOptimizer
+
+            store (Optional[Union[str, ResultStore]]):
+                see DistributedEnergyOptimizer
+
+            on_stage (Optional[Callable[[str, float, Dict[str, Any]], None]]):
+                see DistributedEnergyOptimizer
+        """
+        super().__init__(params, cache=cache, store=store, on_stage=on_stage)
+        n = self.params["n"]
+        self.params["L"] = np.atleast_1d(np.asarray(params["L"], dtype=float))
+        self.params["T"] = len(self.params["L"])
+        self.params["S"] = np.asarray(params.get("S", np.zeros(n)), dtype=float)
+        self.params["R"] = np.asarray(params.get("R", np.full(n, np.inf)), dtype=float)
+        self.params["gamma"] = params.get("gamma", self.params["alpha"])
+        self.params["initial_on"] = params.get("initial_on")
+        self.params["sparse"] = True
+        self._blocks: Optional[Dict[str, Any]] = None
+        self._period_columns: Optional[np.ndarray] = None
+
+    @property
+    def num_periods(self) -> int:
+        return self.params["T"]
+
+    @property
+    def variables(self) -> VariableRegistry:
+        """
+        Variable registry property with one plant per plant and period
+        """
+        if self._variables is None:
+            self._variables = VariableRegistry(
+                self.params["T"] * self.params["n"],
+                self.params["N"],
+                self.params["encoding"],
+            )
+        return self._variables
+
+    @property
+    def period_columns(self) -> np.ndarray:
+        """
+        Column of every period-local variable (in the column order of a
+        single-period VariableRegistry) in variables, shape (T, Q)
+        """
+        if self._period_columns is None:
+            T, n = self.params["T"], self.params["n"]
+            local = VariableRegistry(n, self.params["N"], self.params["encoding"])
+            columns = np.zeros((T, local.num_vars), dtype=int)
+            columns[:, local.groups] = self.variables.groups.reshape(T, n, -1)
+            self._period_columns = columns
+        return self._period_columns
+
+    @property
+    def blocks(self) -> Dict[str, Any]:
+        """
+        Block-tridiagonal QUBO property, see gen_blocks
+        """
+        if self._blocks is None:
+            self._blocks = self._load_or_build("blocks", self.gen_blocks)
+        return self._blocks
+
+    @property
+    def structured_model(self) -> StructuredEnergyModel:
+        raise ValueError(
+            "The structured model has a single load term, so it only describes "
+            "single-period models."
+        )
+
+    # QUBO
+    # ==============================================================================
+    def _period_optimizer(self) -> DistributedEnergyOptimizer:
+        """
+        Single-period optimizer with the demand of the first period
+        """
+        params = {
+            key: value
+            for key, value in self.params.items()
+            if key not in ("S", "R", "gamma", "initial_on", "T")
+        }
+        params["L"] = float(self.params["L"][0])
+        return DistributedEnergyOptimizer(params)
+
+    def _transition_terms(
+        self, period: DistributedEnergyOptimizer
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+        """
+        Start-up and ramp limit costs between the groups of a plant in adjacent
+        periods, see _form_products.
+        """
+        registry = period.variables
+        n, G = registry.n, registry.group_size
+        commit, commit_const = registry.forms()["commit"]
+        terms = [(np.zeros((n, G, G)), np.zeros((n, G)), np.zeros((n, G)), 0.0)]
+
+        # S_i (1 - commit_t) commit_t+1
+        S = self.params["S"]
+        if np.any(S):
+            terms.append(
+                _form_products(
+                    (-commit[None, :], np.array([1.0 - commit_const])),
+                    (commit[None, :], np.array([commit_const])),
+                    S[:, None, None],
+                )
+            )
+
+        # gamma for every pair of on configurations further apart than R_i
+        R = self.params["R"]
+        if np.any(np.isfinite(R)):
+            indicators = registry.indicators()
+            cfg = registry.configurations().astype(float)
+            group_power, power_const = period._power_forms()
+            on = cfg @ commit + commit_const  # (K,)
+            power = group_power @ cfg.T + power_const[:, None]  # (n, K)
+            jump = np.abs(power[:, :, None] - power[:, None, :])
+            violation = (jump > R[:, None, None] + self.RAMP_TOLERANCE) & (
+                np.outer(on, on) > 0.5
+            )
+            terms.append(
+                _form_products(indicators, indicators, self.params["gamma"] * violation)
+            )
+
+        quadratic, first, second, offset = (sum(parts) for parts in zip(*terms))
+        return quadratic, first, second, float(offset)
+
+    def gen_blocks(self) -> Dict[str, Any]:
+        """
+        Block-tridiagonal QUBO over the period-local variables x_t (in the column
+        order of a single-period VariableRegistry):
+
+            offset + sum_t (linear_t . x_t + x_t^T quadratic x_t)
+                   + sum_t x_t^T coupling x_t+1
+
+        Returns:
+            blocks (Dict[str, Any]):
+                "linear": (T, Q) linear coefficients of every period
+                "quadratic": (Q, Q) strictly upper-triangular CSR block of the
+                    single-period QUBO, shared by all periods
+                "coupling": (Q, Q) CSR block of the transition costs between a
+                    period (rows) and the next one (columns)
+                "offset": constant offset
+        """
+        T, L, beta = self.params["T"], self.params["L"], self.params["beta"]
+        period = self._period_optimizer()
+        linear, quadratic, offset = period.gen_coeff_arrays(sparse=True)
+        registry = period.variables
+        groups = registry.groups
+
+        # demand of every period: -2 beta L p_i terms and beta L^2 offset
+        group_power, power_const = period._power_forms()
+        power = np.zeros(registry.num_vars)
+        power[groups] = group_power
+        residual = power_const.sum() - L
+        linear = linear + 2 * beta * (residual - residual[0])[:, None] * power
+        offset = T * offset + beta * np.sum(residual**2 - residual[0] ** 2)
+
+        # transition costs between adjacent periods
+        block, first, second, const = self._transition_terms(period)
+        linear[:-1, groups] += first
+        linear[1:, groups] += second
+        offset += (T - 1) * const
+        shape = block.shape
+        coupling = scipy.sparse.coo_matrix(
+            (
+                block.ravel(),
+                (
+                    np.broadcast_to(groups[:, :, None], shape).ravel(),
+                    np.broadcast_to(groups[:, None, :], shape).ravel(),
+                ),
+            ),
+            shape=(registry.num_vars, registry.num_vars),
+        ).tocsr()
+        coupling.eliminate_zeros()
+
+        # start-ups in the first period
+        if self.params["initial_on"] is not None:
+            commit, commit_const = registry.forms()["commit"]
+            initial_on = np.asarray(self.params["initial_on"], dtype=float)
+            startup = self.params["S"] * (1 - initial_on)
+            linear[0, groups] += startup[:, None] * commit
+            offset += startup.sum() * commit_const
+
+        return {
+            "linear": linear,
+            "quadratic": scipy.sparse.csr_matrix(quadratic),
+            "coupling": coupling,
+            "offset": float(offset),
+        }
+
+    def gen_coeff_arrays(
+        self, sparse: Optional[bool] = None
+    ) -> Tuple[np.ndarray, scipy.sparse.spmatrix, float]:
+        """
+        Assemble the blocks into coefficient arrays over variables.
+
+        Args:
+            sparse (Optional[bool]):
+                ignored, the quadratic matrix is always sparse
+
+        Returns:
+            linear (np.ndarray):
+                linear coefficient vector with T*Q elements
+
+            quadratic (scipy.sparse.spmatrix):
+                strictly upper-triangular CSR matrix of shape (T*Q, T*Q)
+
+            offset (float):
+                constant offset
+        """
+        blocks = self.blocks
+        columns = self.period_columns
+        T, num_vars = self.params["T"], self.variables.num_vars
+
+        linear = np.zeros(num_vars)
+        linear[columns] = blocks["linear"]
+
+        quadratic = blocks["quadratic"].tocoo()
+        coupling = blocks["coupling"].tocoo()
+        rows = np.concatenate(
+            [columns[:, quadratic.row].ravel(), columns[:-1, coupling.row].ravel()]
+        )
+        cols = np.concatenate(
+            [columns[:, quadratic.col].ravel(), columns[1:, coupling.col].ravel()]
+        )
+        vals = np.concatenate(
+            [np.tile(quadratic.data, T), np.tile(coupling.data, T - 1)]
+        )
+        quadratic = scipy.sparse.coo_matrix(
+            (vals, (np.minimum(rows, cols), np.maximum(rows, cols))),
+            shape=(num_vars, num_vars),
+        ).tocsr()
+        return linear, quadratic, blocks["offset"]
+
+    def qubo_energies(
+        self, states: np.ndarray, names: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """
+        QUBO energy of a batch of binary state vectors, computed from the blocks.
+
+        Args:
+            states (np.ndarray):
+                array of shape (S, T*Q) of 0/1s, one state per row
+
+            names (Optional[List[str]]):
+                variable name of each column of states. If None, the columns are
+                assumed to follow variable_names.
+
+        Returns:
+            energies (np.ndarray):
+                array of shape (S,) with the energy of every state
+        """
+        blocks = self.blocks
+        x = self.variables.reorder(states, names).astype(float)
+        x = x[:, self.period_columns]  # (S, T, Q)
+        S, T, Q = x.shape
+        flat = x.reshape(S * T, Q)
+        within = np.sum((flat @ blocks["quadratic"]) * flat, axis=1)
+        across = np.sum(
+            (x[:, :-1].reshape(-1, Q) @ blocks["coupling"]) * x[:, 1:].reshape(-1, Q),
+            axis=1,
+        )
+        return (
+            blocks["offset"]
+            + np.einsum("stq,tq->s", x, blocks["linear"])
+            + within.reshape(S, T).sum(axis=1)
+            + across.reshape(S, T - 1).sum(axis=1)
+        )
+
+    # Decoding
+    # ==============================================================================
+    def decode_samples(
+        self, states: np.ndarray, names: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode a batch of binary state vectors in one vectorized pass.
+
+        Args:
+            states (np.ndarray):
+                array of shape (S, T*Q) of 0/1s, one state per row
+
+            names (Optional[List[str]]):
+                variable name of each column of states. If None, the columns are
+                assumed to follow variable_names.
+
+        Returns:
+            vs (np.ndarray):
+                array of shape (S, T, n) of 0/1s, 1 if the plant is turned off
+
+            zs (np.ndarray):
+                array of shape (S, T, n, N+1) of 0/1s, 1 if the plant outputs power
+                level k
+
+            ps (np.ndarray):
+                array of shape (S, T, n) of power levels outputted by each plant
+        """
+        registry = self.variables
+        states = registry.reorder(np.atleast_2d(states), names)
+        vs, on, level = registry.decode(states)
+        shape = (len(states), self.params["T"], self.params["n"])
+        vs, on, level = vs.reshape(shape), on.reshape(shape), level.reshape(shape)
+
+        if registry.encoding == "one_hot":
+            zs = states[:, registry.kind_index("z")].reshape(shape + (-1,))
+        else:
+            zs = np.zeros(shape + (self.params["N"] + 1,), dtype=states.dtype)
+            np.put_along_axis(zs, level[..., None], on[..., None], axis=-1)
+
+        ps = self.power_levels()[np.arange(self.params["n"]), level]
+        ps = np.where(on, ps, 0.0)
+        return vs, zs, ps
+
+    def evaluate(
+        self,
+        states: np.ndarray,
+        names: Optional[List[str]] = None,
+        load_tolerance: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score a batch of schedules in one vectorized pass.
+
+        Args:
+            states (np.ndarray):
+                array of shape (S, T*Q) of 0/1s, one state per row
+
+            names (Optional[List[str]]):
+                variable name of each column of states. If None, the columns are
+                assumed to follow variable_names.
+
+            load_tolerance (Optional[float]):
+                largest absolute load mismatch of a feasible period. Defaults to no
+                bound.
+
+        Returns:
+            evaluation (Dict[str, np.ndarray]):
+                "energy": (S,) QUBO energy
+                "cost": (S,) dispatch cost of all periods plus start-up costs
+                "startup_cost": (S,) start-up costs
+                "ramp_violations": (S,) number of ramp limit violations
+                "load": (S, T) total power output of every period
+                "load_mismatch": (S, T) load minus demand of every period
+                "invalid": (S, T, n) booleans, True where a plant's group of
+                    variables is not a valid assignment of the encoding
+                "num_invalid": (S,) number of invalid plant groups
+                "feasible": (S,) booleans, True where no group is invalid, no ramp
+                    limit is violated and every load mismatch is within
+                    load_tolerance
+        """
+        registry = self.variables
+        states = registry.reorder(np.atleast_2d(states), names)
+        vs, _, ps = self.decode_samples(states)
+        on = 1 - vs
+        A = np.asarray(self.params["A"], dtype=float)
+        B = np.asarray(self.params["B"], dtype=float)
+        C = np.asarray(self.params["C"], dtype=float)
+        S, R = self.params["S"], self.params["R"]
+
+        startups = on[:, 1:] * (1 - on[:, :-1])
+        startup_cost = startups.sum(axis=1) @ S
+        if self.params["initial_on"] is not None:
+            initial_on = np.asarray(self.params["initial_on"], dtype=float)
+            startup_cost = startup_cost + on[:, 0] @ (S * (1 - initial_on))
+        ramps = (on[:, 1:] * on[:, :-1] > 0) & (
+            np.abs(ps[:, 1:] - ps[:, :-1]) > R + self.RAMP_TOLERANCE
+        )
+
+        cost = (on @ A + ps @ B + ps**2 @ C).sum(axis=1) + startup_cost
+        load = ps.sum(axis=2)
+        mismatch = load - self.params["L"]
+        invalid = ~registry.valid(states).reshape(vs.shape)
+        feasible = ~invalid.any(axis=(1, 2)) & ~ramps.any(axis=(1, 2))
+        if load_tolerance is not None:
+            feasible &= np.all(np.abs(mismatch) <= load_tolerance, axis=1)
+        return {
+            "energy": self.qubo_energies(states),
+            "cost": cost,
+            "startup_cost": startup_cost,
+            "ramp_violations": ramps.sum(axis=(1, 2)),
+            "load": load,
+            "load_mismatch": mismatch,
+            "invalid": invalid,
+            "num_invalid": invalid.sum(axis=(1, 2)),
+            "feasible": feasible,
+        }
+
+    # Updates
+    # ==============================================================================
+    def _reset_model(self) -> None:
+        """
+        Drop the blocks and everything built from them.
+        """
+        self._blocks = None
+        self._linear_coeffs = None
+        self._quadratic_coeffs = None
+        self._offset = None
+        self._linear_terms = None
+        self._quadratic_terms = None
+        self._quadratic_program = None
+        self._ising_model = None
+        self._annealer = None
+        self._ising_operator = None
+
+    def update_demand(self, L: Union[float, List[float]]) -> None:
+        """
+        Change the demand of every period. The blocks are rebuilt.
+
+        Args:
+            L (Union[float, List[float]]):
+                new demand of every period, or one demand for all of them
+        """
+        L = np.broadcast_to(np.asarray(L, dtype=float), (self.params["T"],))
+        self.params["L"] = L.copy()
+        self._reset_model()
+
+    def update_costs(
+        self,
+        A: Optional[List[float]] = None,
+        B: Optional[List[float]] = None,
+        C: Optional[List[float]] = None,
+    ) -> None:
+        """
+        Change the per plant cost coefficients. The blocks are rebuilt.
+        """
+        for label, new in [("A", A), ("B", B), ("C", C)]:
+            if new is not None:
+                if len(new) != self.params["n"]:
+                    raise ValueError(
+                        f"Please provide {self.params['n']} values for {label}."
+                    )
+                self.params[label] = new
+        self._reset_model()
+
+    def update_penalties(
+        self, alpha: Optional[float] = None, beta: Optional[float] = None
+    ) -> None:
+        """
+        Change the penalty weights. The blocks are rebuilt.
+        """
+        if alpha is not None:
+            self.params["alpha"] = alpha
+        if beta is not None:
+            self.params["beta"] = beta
+        self._reset_model()
+
+    # Solvers
+    # ==============================================================================
+    def embedding_key(self, sampler: "dimod.Structured") -> str:
+        """
+        Key of the minor-embedding of the model on a structured sampler, which
+        also depends on the number of periods and on which plants are coupled
+        across periods
+        """
+        coupling = self.blocks["coupling"].tocoo()
+        return params_hash(
+            {
+                "single_period": super().embedding_key(sampler),
+                "T": self.params["T"],
+                "coupling": [coupling.row, coupling.col],
+            }
+        )
+
+    def run_exact_dp(self, *args, **kwargs) -> DistributedEnergyOptimizerResults:
+        raise ValueError(
+            "Exact dynamic programming solves single periods, use "
+            "run_annealer_sim or run_annealer_qpu."
+        )
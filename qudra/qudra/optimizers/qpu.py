@@ -0,0 +1,123 @@
+"""
+SimulatedQPUSampler
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from dwave.samplers import SimulatedAnnealingSampler
+import dimod
+import dwave_networkx as dnx
+
+
+class SimulatedQPUSampler(dimod.Sampler, dimod.Structured):
+    """
+    Offline stand-in for a D-Wave QPU: a structured sampler on a Pegasus or Chimera
+    working graph that samples with simulated annealing.
+
+    Like a QPU, it only accepts models whose variables are qubits and whose
+    interactions are couplers of the graph, so problems must be minor-embedded
+    (e.g. with FixedEmbeddingComposite) and come back with chain breaks. This
+    exercises the embedding path of run_annealer_qpu without network or hardware.
+    """
+
+    TOPOLOGIES = ["pegasus", "chimera"]
+
+    def __init__(
+        self,
+        topology: str = "pegasus",
+        shape: int = 16,
+        num_sweeps: int = 1000,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Creates SimulatedQPUSampler object.
+
+        Args:
+            topology (str):
+                "pegasus" (Advantage) or "chimera" (2000Q)
+            shape (int):
+                size parameter m of the graph, 16 for both device generations
+            num_sweeps (int):
+                default number of simulated annealing sweeps per read
+            seed (Optional[int]):
+                random seed of the first call to sample, incremented on every call
+        """
+        if topology not in self.TOPOLOGIES:
+            raise ValueError(
+                f"Unknown topology {topology}, use one of {self.TOPOLOGIES}."
+            )
+        if topology == "pegasus":
+            graph = dnx.pegasus_graph(shape)
+        else:
+            graph = dnx.chimera_graph(shape)
+        self._topology = topology
+        self._shape = shape
+        self._nodelist: List[int] = sorted(graph.nodes)
+        self._edgelist: List[Tuple[int, int]] = sorted(
+            (min(u, v), max(u, v)) for u, v in graph.edges
+        )
+        self._num_sweeps = num_sweeps
+        self._seed = seed
+        self._sampler = SimulatedAnnealingSampler()
+
+    @property
+    def name(self) -> str:
+        return f"simulated_{self._topology}_{self._shape}"
+
+    @property
+    def nodelist(self) -> List[int]:
+        return self._nodelist
+
+    @property
+    def edgelist(self) -> List[Tuple[int, int]]:
+        return self._edgelist
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        return {
+            "topology": {"type": self._topology, "shape": [self._shape]},
+            "num_qubits": len(self._nodelist),
+            "qubits": self._nodelist,
+            "couplers": self._edgelist,
+        }
+
+    @property
+    def parameters(self) -> Dict[str, List[str]]:
+        return {"num_reads": [], "num_sweeps": [], "seed": []}
+
+    @dimod.bqm_structured
+    def sample(
+        self,
+        bqm: dimod.BinaryQuadraticModel,
+        num_reads: int = 100,
+        num_sweeps: Optional[int] = None,
+        seed: Optional[int] = None,
+        **kwargs,
+    ) -> dimod.SampleSet:
+        """
+        Sample a model defined on the working graph.
+
+        Args:
+            bqm (dimod.BinaryQuadraticModel):
+                model over qubits of nodelist with interactions in edgelist
+            num_reads (int):
+                number of reads
+            num_sweeps (Optional[int]):
+                number of sweeps per read. Defaults to the sampler's.
+            seed (Optional[int]):
+                random seed. Defaults to the sampler's.
+            **kwargs:
+                QPU-only parameters (e.g. annealing_time), ignored
+
+        Returns:
+            response (dimod.SampleSet):
+                samples of the model
+        """
+        if seed is None and self._seed is not None:
+            seed, self._seed = self._seed, self._seed + 1
+        return self._sampler.sample(
+            bqm,
+            num_reads=num_reads,
+            num_sweeps=self._num_sweeps if num_sweeps is None else num_sweeps,
+            seed=seed,
+        )
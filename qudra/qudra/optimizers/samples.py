@@ -0,0 +1,401 @@
+"""
+SampleSummary
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class SampleSummary:
+    """
+    Compact summary of a batch of samples: the k lowest-energy distinct states,
+    bit-packed, with their energies and occurrence counts, plus statistics over
+    all samples.
+    """
+
+    __slots__ = (
+        "_packed",
+        "_num_vars",
+        "_energies",
+        "_counts",
+        "_num_reads",
+        "_num_distinct",
+        "_mean_energy",
+        "_std_energy",
+        "_max_energy",
+        "_num_feasible",
+        "_histogram",
+    )
+
+    def __init__(
+        self,
+        packed: np.ndarray,
+        num_vars: int,
+        energies: np.ndarray,
+        counts: np.ndarray,
+        num_reads: int,
+        num_distinct: int,
+        mean_energy: float,
+        std_energy: float,
+        max_energy: float,
+        num_feasible: Optional[int] = None,
+        histogram: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> None:
+        """
+        Creates SampleSummary object. Use from_states to summarize samples.
+
+        Args:
+            packed (np.ndarray):
+                (k, ceil(num_vars/8)) uint8 rows of np.packbits'ed states, ordered by
+                ascending energy
+            num_vars (int):
+                number of variables per state
+            energies (np.ndarray):
+                (k,) energy of each state
+            counts (np.ndarray):
+                (k,) number of samples of each state
+            num_reads (int):
+                total number of samples
+            num_distinct (int):
+                number of distinct states among all samples
+            mean_energy (float):
+                mean energy over all samples
+            std_energy (float):
+                standard deviation of the energy over all samples
+            max_energy (float):
+                highest energy over all samples
+            num_feasible (Optional[int]):
+                number of samples with a valid encoding, if known
+            histogram (Optional[Tuple[np.ndarray, np.ndarray]]):
+                (bin edges, counts) of the energies of all samples, if kept
+        """
+        self._packed = packed
+        self._num_vars = num_vars
+        self._energies = energies
+        self._counts = counts
+        self._num_reads = num_reads
+        self._num_distinct = num_distinct
+        self._mean_energy = mean_energy
+        self._std_energy = std_energy
+        self._max_energy = max_energy
+        self._num_feasible = num_feasible
+        self._histogram = histogram
+
+    @classmethod
+    def from_states(
+        cls,
+        states: np.ndarray,
+        energies: np.ndarray,
+        num_occurrences: Optional[np.ndarray] = None,
+        top_k: int = 10,
+    ) -> "SampleSummary":
+        """
+        Summarize a batch of samples.
+
+        Args:
+            states (np.ndarray):
+                (S, Q) 0/1 samples
+            energies (np.ndarray):
+                (S,) energy of each sample
+            num_occurrences (Optional[np.ndarray]):
+                (S,) number of times each sample was drawn. Defaults to once.
+            top_k (int):
+                number of lowest-energy distinct states to keep
+
+        Returns:
+            summary (SampleSummary):
+                summary of the samples
+        """
+        aggregator = SampleAggregator(top_k=top_k, bin_width=None)
+        aggregator.add(states, energies, num_occurrences)
+        return aggregator.summary()
+
+    def __len__(self) -> int:
+        return len(self._energies)
+
+    @property
+    def packed(self) -> np.ndarray:
+        return self._packed
+
+    @property
+    def num_vars(self) -> int:
+        return self._num_vars
+
+    @property
+    def states(self) -> np.ndarray:
+        """
+        (k, num_vars) 0/1 states, ordered by ascending energy
+        """
+        return np.unpackbits(self._packed, axis=1, count=self._num_vars)
+
+    @property
+    def energies(self) -> np.ndarray:
+        return self._energies
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts
+
+    @property
+    def best_state(self) -> np.ndarray:
+        return self.states[0]
+
+    @property
+    def best_energy(self) -> float:
+        return float(self._energies[0])
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        "num_reads", "num_distinct", "min_energy", "mean_energy", "std_energy",
+        "max_energy" and "num_feasible" (None if unknown) over all samples
+        """
+        return {
+            "num_reads": self._num_reads,
+            "num_distinct": self._num_distinct,
+            "min_energy": self.best_energy,
+            "mean_energy": self._mean_energy,
+            "std_energy": self._std_energy,
+            "max_energy": self._max_energy,
+            "num_feasible": self._num_feasible,
+        }
+
+    def success_probability(
+        self, target_energy: Optional[float] = None, tolerance: float = 1e-9
+    ) -> float:
+        """
+        Fraction of samples with an energy at most target_energy (defaults to the
+        lowest energy found) plus tolerance times max(1, |target_energy|). Only the
+        kept top-k states are counted, so k must be large enough to hold every
+        state at the target.
+        """
+        target = self.best_energy if target_energy is None else target_energy
+        hits = self._energies <= target + tolerance * max(1.0, abs(target))
+        return float(self._counts[hits].sum() / self._num_reads)
+
+    @property
+    def histogram(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (bin edges (B+1,), counts (B,)) of the energies of all samples, or None
+        """
+        return self._histogram
+
+
+def _row_hashes(packed: np.ndarray) -> np.ndarray:
+    """
+    64-bit hash of every row of a packed bit matrix. Exact, i.e. collision-free,
+    for rows of up to 8 bytes.
+    """
+    num_bytes = -(-packed.shape[1] // 8) * 8
+    padded = np.zeros((len(packed), num_bytes), dtype=np.uint8)
+    padded[:, : packed.shape[1]] = packed
+    words = padded.view(np.uint64)
+    hashes = words[:, 0].copy()
+    for word in words[:, 1:].T:
+        # splitmix64 finalizer, a bijection, before folding in the next word
+        hashes ^= hashes >> np.uint64(30)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(27)
+        hashes *= np.uint64(0x94D049BB133111EB)
+        hashes ^= hashes >> np.uint64(31)
+        hashes ^= word
+    return hashes
+
+
+class SampleAggregator:
+    """
+    Running aggregates of samples that arrive in chunks: the k lowest-energy
+    distinct states with their counts, energy statistics and histogram, and the
+    numbers of distinct and feasible samples. Only the aggregates are kept, so the
+    memory use is independent of the number of samples, except for one 64-bit hash
+    per distinct state.
+    """
+
+    def __init__(self, top_k: int = 10, bin_width: Optional[float] = None) -> None:
+        """
+        Creates SampleAggregator object.
+
+        Args:
+            top_k (int):
+                number of lowest-energy distinct states to keep
+            bin_width (Optional[float]):
+                width of the energy histogram bins, or None for no histogram
+        """
+        self._top_k = top_k
+        self._bin_width = bin_width
+        self._packed: Optional[np.ndarray] = None
+        self._num_vars = 0
+        self._energies = np.zeros(0)
+        self._counts = np.zeros(0, dtype=int)
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._histogram: Dict[int, int] = {}
+        self._num_reads = 0
+        self._num_feasible: Optional[int] = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._max_energy = -np.inf
+
+    @property
+    def num_reads(self) -> int:
+        return self._num_reads
+
+    @property
+    def best_energy(self) -> float:
+        return float(self._energies[0]) if len(self._energies) else np.inf
+
+    def add(
+        self,
+        states: np.ndarray,
+        energies: np.ndarray,
+        num_occurrences: Optional[np.ndarray] = None,
+        feasible: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Fold a chunk of samples into the aggregates.
+
+        Args:
+            states (np.ndarray):
+                (S, Q) 0/1 samples
+            energies (np.ndarray):
+                (S,) energy of each sample
+            num_occurrences (Optional[np.ndarray]):
+                (S,) number of times each sample was drawn. Defaults to once.
+            feasible (Optional[np.ndarray]):
+                (S,) booleans, True for samples with a valid encoding
+        """
+        states = np.atleast_2d(np.asarray(states))
+        energies = np.asarray(energies, dtype=float)
+        if num_occurrences is None:
+            num_occurrences = np.ones(len(energies), dtype=int)
+        num_occurrences = np.asarray(num_occurrences, dtype=int)
+        if len(states) != len(energies) or len(states) != len(num_occurrences):
+            raise ValueError("Please provide one energy and count per state.")
+        if len(states) == 0:
+            return
+
+        # distinct states of the chunk
+        # ======================================================================
+        packed = np.packbits(states.astype(np.uint8), axis=1)
+        hashes = _row_hashes(packed)
+        hashes, first, inverse = np.unique(
+            hashes, return_index=True, return_inverse=True
+        )
+        counts = np.bincount(inverse.ravel(), weights=num_occurrences).astype(int)
+
+        # top-k, merged with the kept states. A state that dropped out is never
+        # re-admitted, even if it ties with (or, by rounding, undercuts) a kept
+        # state, as its earlier counts are lost. So kept counts are exact.
+        # ======================================================================
+        if self._packed is None:
+            self._num_vars = states.shape[1]
+            kept_hashes = np.zeros(0, dtype=np.uint64)
+            self._packed = np.zeros((0, packed.shape[1]), dtype=np.uint8)
+        else:
+            kept_hashes = _row_hashes(self._packed)
+        dropped = np.isin(hashes, self._hashes) & ~np.isin(hashes, kept_hashes)
+        self._hashes = np.union1d(self._hashes, hashes)
+        candidates = np.flatnonzero(~dropped)
+        order = candidates[
+            np.argsort(energies[first[candidates]], kind="stable")[: self._top_k]
+        ]
+        merged_hashes = np.concatenate([kept_hashes, hashes[order]])
+        merged_hashes, merged_first, merged_inverse = np.unique(
+            merged_hashes, return_index=True, return_inverse=True
+        )
+        merged_counts = np.bincount(
+            merged_inverse.ravel(),
+            weights=np.concatenate([self._counts, counts[order]]),
+        ).astype(int)
+        merged_packed = np.concatenate([self._packed, packed[first[order]]])
+        merged_energies = np.concatenate([self._energies, energies[first[order]]])
+        top = np.argsort(merged_energies[merged_first], kind="stable")[: self._top_k]
+        self._packed = merged_packed[merged_first[top]]
+        self._energies = merged_energies[merged_first[top]]
+        self._counts = merged_counts[top]
+
+        # statistics, merged with Chan et al.'s parallel variance update
+        # ======================================================================
+        num_reads = int(num_occurrences.sum())
+        mean = float(num_occurrences @ energies / num_reads)
+        m2 = float(num_occurrences @ (energies - mean) ** 2)
+        total = self._num_reads + num_reads
+        delta = mean - self._mean
+        self._mean += delta * num_reads / total
+        self._m2 += m2 + delta**2 * self._num_reads * num_reads / total
+        self._num_reads = total
+        self._max_energy = max(self._max_energy, float(energies.max()))
+        if feasible is not None:
+            self._num_feasible = (self._num_feasible or 0) + int(
+                num_occurrences[np.asarray(feasible, dtype=bool)].sum()
+            )
+        if self._bin_width is not None:
+            bins = np.floor(energies / self._bin_width).astype(np.int64)
+            bins, inverse = np.unique(bins, return_inverse=True)
+            bin_counts = np.bincount(inverse.ravel(), weights=num_occurrences)
+            for index, count in zip(bins.tolist(), bin_counts.astype(int).tolist()):
+                self._histogram[index] = self._histogram.get(index, 0) + count
+
+    def histogram(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (bin edges (B+1,), counts (B,)) of the energies of all samples, or None if
+        there is no histogram
+        """
+        if self._bin_width is None or not self._histogram:
+            return None
+        low, high = min(self._histogram), max(self._histogram)
+        counts = np.zeros(high - low + 1, dtype=int)
+        for index, count in self._histogram.items():
+            counts[index - low] = count
+        edges = self._bin_width * np.arange(low, high + 2)
+        return edges, counts
+
+    def summary(self) -> SampleSummary:
+        """
+        SampleSummary of all samples added so far
+        """
+        if self._packed is None:
+            raise ValueError("Please add at least one state.")
+        return SampleSummary(
+            packed=self._packed,
+            num_vars=self._num_vars,
+            energies=self._energies,
+            counts=self._counts,
+            num_reads=self._num_reads,
+            num_distinct=len(self._hashes),
+            mean_energy=self._mean,
+            std_energy=float(np.sqrt(self._m2 / self._num_reads)),
+            max_energy=self._max_energy,
+            num_feasible=self._num_feasible,
+            histogram=self.histogram(),
+        )
+
+
+def time_to_solution(
+    success_probability: float, time_per_run: float, confidence: float = 0.99
+) -> float:
+    """
+    Expected time to find a solution at least once with a given confidence, from
+    independent runs that each succeed with success_probability:
+
+        TTS = time_per_run * log(1 - confidence) / log(1 - success_probability)
+
+    Args:
+        success_probability (float):
+            probability that one run finds the solution
+        time_per_run (float):
+            time of one run, e.g. one annealer shot
+        confidence (float):
+            target probability of at least one success, e.g. 0.99 for TTS99
+
+    Returns:
+        tts (float):
+            time to solution, time_per_run if every run succeeds and inf if none
+    """
+    if success_probability >= confidence:
+        return time_per_run
+    if success_probability <= 0:
+        return float("inf")
+    return float(
+        time_per_run * np.log(1 - confidence) / np.log(1 - success_probability)
+    )
@@ -0,0 +1,403 @@
+"""
+StatevectorAnsatz
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse
+
+if TYPE_CHECKING:
+    import scipy.optimize
+
+# 2^26 complex amplitudes take 1 GiB
+MAX_STATEVECTOR_QUBITS = 26
+
+# (kind, qubits, parameter index, angle factor)
+Gate = Tuple[str, Tuple[int, ...], Optional[int], float]
+
+
+def cost_diagonal(
+    linear: np.ndarray,
+    quadratic: Union[np.ndarray, scipy.sparse.spmatrix],
+    offset: float,
+) -> np.ndarray:
+    """
+    QUBO energy of every bitstring, i.e. the diagonal of the cost Hamiltonian.
+
+    Bitstring b has x_j = (b >> j) & 1, matching the little-endian qubit order of
+    Qiskit. The diagonal is built by doubling: appending variable j copies the
+    energies of the first j variables and adds l_j plus the couplings of x_j to all
+    patterns of the lower variables, in O(2^Q) total time.
+
+    Args:
+        linear (np.ndarray):
+            linear coefficient vector with Q elements
+        quadratic (Union[np.ndarray, scipy.sparse.spmatrix]):
+            upper-triangular quadratic coefficient matrix of shape (Q, Q)
+        offset (float):
+            constant offset
+
+    Returns:
+        diagonal (np.ndarray):
+            energies of shape (2^Q,)
+    """
+    num_qubits = len(linear)
+    if num_qubits > MAX_STATEVECTOR_QUBITS:
+        raise ValueError(
+            f"{num_qubits} qubits exceed the statevector limit of "
+            f"{MAX_STATEVECTOR_QUBITS}."
+        )
+    if scipy.sparse.issparse(quadratic):
+        quadratic = quadratic.toarray()
+
+    diagonal = np.full(1, float(offset))
+    for j in range(num_qubits):
+        field = np.zeros(1)
+        for k in range(j):
+            field = np.concatenate([field, field + quadratic[k, j]])
+        diagonal = np.concatenate([diagonal, diagonal + linear[j] + field])
+    return diagonal
+
+
+class StatevectorAnsatz:
+    """
+    Exact statevector simulation of a parametrized circuit whose only observable is
+    a diagonal cost Hamiltonian, as used by QAOA and VQE.
+
+    The circuit is a list of gates (kind, qubits, parameter index, factor), whose
+    rotation angle is factor * theta[parameter index]:
+
+        ("cx", (c, t), None, 0.0):  CNOT
+        ("rx", (q,), p, f):         exp(-i angle X / 2)
+        ("ry", (q,), p, f):         exp(-i angle Y / 2)
+        ("cost", (), p, f):         exp(-i angle H_C / 2)
+
+    Several gates may share a parameter. Expectation values are exact, and
+    gradients are computed with the adjoint method (one backward pass through the
+    circuit) or with the parameter-shift rule.
+    """
+
+    GRADIENTS = ["adjoint", "parameter_shift"]
+
+    def __init__(
+        self,
+        diagonal: np.ndarray,
+        gates: List[Gate],
+        num_parameters: int,
+        initial_state: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Creates StatevectorAnsatz object.
+
+        Args:
+            diagonal (np.ndarray):
+                cost Hamiltonian diagonal of shape (2^Q,), see cost_diagonal
+            gates (List[Gate]):
+                circuit as described above
+            num_parameters (int):
+                number of circuit parameters
+            initial_state (Optional[np.ndarray]):
+                statevector before the first gate. Defaults to |0...0>.
+        """
+        self._diagonal = np.asarray(diagonal, dtype=float)
+        self._num_qubits = int(np.log2(len(self._diagonal)))
+        self._gates = gates
+        self._num_parameters = num_parameters
+        self._initial_state = initial_state
+        self._eval_count = 0
+
+    @classmethod
+    def qaoa(cls, diagonal: np.ndarray, reps: int = 1) -> "StatevectorAnsatz":
+        """
+        QAOA ansatz with reps layers of exp(-i gamma H_C / s) exp(-i beta sum_q X_q)
+        on |+...+>, where s = max|E - mean E| normalizes the cost spectrum so that
+        gamma is of order 1 regardless of the penalty weights. Parameters are
+        ordered [beta_0, ..., beta_{p-1}, gamma_0, ..., gamma_{p-1}] like Qiskit's
+        QAOAAnsatz.
+        """
+        num_qubits = int(np.log2(len(diagonal)))
+        spread = np.abs(diagonal - diagonal.mean()).max()
+        cost_factor = 2.0 / spread if spread > 0 else 2.0
+
+        gates: List[Gate] = []
+        for layer in range(reps):
+            gates.append(("cost", (), reps + layer, cost_factor))
+            gates.extend(("rx", (q,), layer, 2.0) for q in range(num_qubits))
+        num_states = len(diagonal)
+        plus = np.full(num_states, 1 / np.sqrt(num_states), dtype=complex)
+        return cls(diagonal, gates, 2 * reps, initial_state=plus)
+
+    @classmethod
+    def real_amplitudes(
+        cls, diagonal: np.ndarray, reps: int = 3
+    ) -> "StatevectorAnsatz":
+        """
+        Hardware-efficient VQE ansatz like Qiskit's RealAmplitudes: reps+1 layers of
+        ry rotations on every qubit, separated by a linear chain of CNOTs.
+        """
+        num_qubits = int(np.log2(len(diagonal)))
+        gates: List[Gate] = []
+        for layer in range(reps + 1):
+            gates.extend(
+                ("ry", (q,), layer * num_qubits + q, 1.0) for q in range(num_qubits)
+            )
+            if layer < reps:
+                gates.extend(
+                    ("cx", (q, q + 1), None, 0.0) for q in range(num_qubits - 1)
+                )
+        return cls(diagonal, gates, (reps + 1) * num_qubits)
+
+    @property
+    def num_parameters(self) -> int:
+        return self._num_parameters
+
+    @property
+    def eval_count(self) -> int:
+        """
+        Number of circuit evaluations so far, counting an energy and gradient
+        evaluation as one
+        """
+        return self._eval_count
+
+    @property
+    def diagonal(self) -> np.ndarray:
+        return self._diagonal
+
+    # Gates
+    # ==============================================================================
+    def _split(self, psi: np.ndarray, qubit: int) -> Tuple[np.ndarray, np.ndarray]:
+        view = psi.reshape(-1, 2, 2**qubit)
+        return view[:, 0, :], view[:, 1, :]
+
+    def _rotate(self, psi: np.ndarray, kind: str, qubit: int, angle: float) -> None:
+        """
+        Apply exp(-i angle P / 2) in place, for P = X (rx) or Y (ry)
+        """
+        cos, sin = np.cos(angle / 2), np.sin(angle / 2)
+        off_diagonal = -1j * sin if kind == "rx" else -sin
+        zero, one = self._split(psi, qubit)
+        old_zero = zero.copy()
+        zero *= cos
+        zero += off_diagonal * one
+        one *= cos
+        one += (off_diagonal if kind == "rx" else sin) * old_zero
+
+    def _cnot(self, psi: np.ndarray, control: int, target: int) -> None:
+        tensor = psi.reshape((2,) * self._num_qubits)
+        index: List[Union[int, slice]] = [slice(None)] * self._num_qubits
+        index[self._num_qubits - 1 - control] = 1
+        sub = tensor[tuple(index)]
+        axis = self._num_qubits - 1 - target
+        if axis > self._num_qubits - 1 - control:
+            axis -= 1
+        flipped = np.flip(sub, axis=axis).copy()
+        sub[...] = flipped
+
+    def _apply(
+        self,
+        psi: np.ndarray,
+        gate_index: int,
+        angle: float,
+        phases: Optional[Dict[int, np.ndarray]] = None,
+        inverse: bool = False,
+    ) -> None:
+        """
+        Apply a gate (or its inverse) in place. Cost layer phases are stored in, and
+        reused from, phases if given, since the complex exponential dominates the
+        cost of a layer.
+        """
+        kind, qubits, _, _ = self._gates[gate_index]
+        if kind == "cost":
+            if phases is not None and gate_index in phases:
+                phase = phases[gate_index]
+            else:
+                phase = np.exp(-0.5j * angle * self._diagonal)
+                if phases is not None:
+                    phases[gate_index] = phase
+            if inverse:
+                psi /= phase
+            else:
+                psi *= phase
+        elif kind in ("rx", "ry"):
+            self._rotate(psi, kind, qubits[0], -angle if inverse else angle)
+        elif kind == "cx":
+            self._cnot(psi, *qubits)
+        else:
+            raise ValueError(f"Unknown gate {kind}.")
+
+    def _derivative(self, psi: np.ndarray, gate_index: int) -> np.ndarray:
+        """
+        -i G psi for the generator G of a parametrized gate exp(-i angle G), i.e.
+        the derivative of the gate's output with respect to its angle
+        """
+        kind, qubits, _, _ = self._gates[gate_index]
+        if kind == "cost":
+            return -0.5j * self._diagonal * psi
+        out = np.empty_like(psi)
+        zero, one = self._split(psi, qubits[0])
+        out_zero, out_one = self._split(out, qubits[0])
+        if kind == "rx":
+            out_zero[...], out_one[...] = -0.5j * one, -0.5j * zero
+        else:
+            out_zero[...], out_one[...] = -0.5 * one, 0.5 * zero
+        return out
+
+    def _angles(
+        self, parameters: np.ndarray, shifts: Optional[Dict[int, float]] = None
+    ) -> np.ndarray:
+        angles = np.zeros(len(self._gates))
+        for i, (_, _, index, factor) in enumerate(self._gates):
+            if index is not None:
+                angles[i] = factor * parameters[index]
+        if shifts:
+            for i, shift in shifts.items():
+                angles[i] += shift
+        return angles
+
+    # Evaluation
+    # ==============================================================================
+    def statevector(
+        self,
+        parameters: np.ndarray,
+        shifts: Optional[Dict[int, float]] = None,
+        phases: Optional[Dict[int, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Final statevector of shape (2^Q,) for the given parameters. Circuits made
+        only of ry and cx gates on a real initial state are simulated with real
+        amplitudes.
+
+        Args:
+            parameters (np.ndarray):
+                circuit parameters
+            shifts (Optional[Dict[int, float]]):
+                extra rotation angle per gate index, used by the parameter-shift rule
+            phases (Optional[Dict[int, np.ndarray]]):
+                cache of cost layer phases, filled in by this call
+        """
+        real = all(kind in ("ry", "cx") for kind, _, _, _ in self._gates) and (
+            self._initial_state is None or np.isrealobj(self._initial_state)
+        )
+        dtype = float if real else complex
+        if self._initial_state is None:
+            psi = np.zeros(len(self._diagonal), dtype=dtype)
+            psi[0] = 1.0
+        else:
+            psi = self._initial_state.astype(dtype)
+        for i, angle in enumerate(self._angles(parameters, shifts)):
+            self._apply(psi, i, angle, phases)
+        return psi
+
+    def _expectation(self, psi: np.ndarray) -> float:
+        return float(np.dot(np.abs(psi) ** 2, self._diagonal))
+
+    def energy(self, parameters: np.ndarray) -> float:
+        """
+        Exact expectation value <psi(parameters)| H_C |psi(parameters)>
+        """
+        self._eval_count += 1
+        return self._expectation(self.statevector(parameters))
+
+    def energy_and_gradient(
+        self, parameters: np.ndarray, method: str = "adjoint"
+    ) -> Tuple[float, np.ndarray]:
+        """
+        Exact energy() and its gradient.
+
+        Args:
+            parameters (np.ndarray):
+                circuit parameters
+            method (str):
+                "adjoint" for a single backward pass through the circuit, or
+                "parameter_shift" for two circuit evaluations per parametrized gate,
+                which requires every generator to have eigenvalues +-1/2 (i.e. not
+                for the QAOA cost layer)
+
+        Returns:
+            energy (float):
+                expectation value
+            gradient (np.ndarray):
+                array of shape (num_parameters,)
+        """
+        if method not in self.GRADIENTS:
+            raise ValueError(f"Unknown gradient {method}, use one of {self.GRADIENTS}.")
+        self._eval_count += 1
+        phases: Dict[int, np.ndarray] = {}
+        psi = self.statevector(parameters, phases=phases)
+        energy = self._expectation(psi)
+        if method == "parameter_shift":
+            return energy, self._parameter_shift_gradient(parameters)
+
+        # adjoint method: walk the circuit backwards, carrying H|psi> along
+        angles = self._angles(parameters)
+        adjoint = self._diagonal * psi
+        gradient = np.zeros(self._num_parameters)
+        for i in reversed(range(len(self._gates))):
+            _, _, index, factor = self._gates[i]
+            if index is not None:
+                # d<H>/d angle = 2 Re <adjoint| -i G |psi>
+                overlap = np.vdot(adjoint, self._derivative(psi, i))
+                gradient[index] += 2 * overlap.real * factor
+            self._apply(psi, i, angles[i], phases, inverse=True)
+            self._apply(adjoint, i, angles[i], phases, inverse=True)
+        return energy, gradient
+
+    def gradient(self, parameters: np.ndarray, method: str = "adjoint") -> np.ndarray:
+        """
+        Exact gradient of energy(), see energy_and_gradient.
+        """
+        return self.energy_and_gradient(parameters, method)[1]
+
+    def _parameter_shift_gradient(self, parameters: np.ndarray) -> np.ndarray:
+        gradient = np.zeros(self._num_parameters)
+        for i, (kind, _, index, factor) in enumerate(self._gates):
+            if index is None:
+                continue
+            if kind not in ("rx", "ry"):
+                raise ValueError(
+                    f"The parameter-shift rule does not apply to {kind} gates, "
+                    f"use the adjoint gradient instead."
+                )
+            plus = self._expectation(self.statevector(parameters, {i: np.pi / 2}))
+            minus = self._expectation(self.statevector(parameters, {i: -np.pi / 2}))
+            gradient[index] += (plus - minus) / 2 * factor
+        return gradient
+
+    def minimize(
+        self,
+        initial_point: np.ndarray,
+        gradient: Optional[str] = "adjoint",
+        max_iter: int = 1000,
+    ) -> "scipy.optimize.OptimizeResult":
+        """
+        Minimize energy() over the circuit parameters.
+
+        Args:
+            initial_point (np.ndarray):
+                initial circuit parameters
+            gradient (Optional[str]):
+                "adjoint" or "parameter_shift" to run L-BFGS-B with exact gradients,
+                or None to run the gradient-free COBYLA
+            max_iter (int):
+                maximum number of optimizer iterations
+
+        Returns:
+            result (scipy.optimize.OptimizeResult):
+                optimizer result with the optimal parameters x and energy fun
+        """
+        import scipy.optimize
+
+        options = {"maxiter": max_iter}
+        if gradient is None:
+            return scipy.optimize.minimize(
+                self.energy, initial_point, method="COBYLA", options=options
+            )
+        return scipy.optimize.minimize(
+            self.energy_and_gradient,
+            initial_point,
+            args=(gradient,),
+            jac=True,
+            method="L-BFGS-B",
+            options=options,
+        )
@@ -0,0 +1,316 @@
+"""
+ResultStore
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+
+def result_key(
+    params_hash: str,
+    method: str,
+    seed: Optional[int] = None,
+    shots: Optional[int] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Key of a stored result.
+
+    Args:
+        params_hash (str):
+            model key, see DistributedEnergyOptimizer.model_key
+        method (str):
+            solve method, i.e. the suffix of a run_* method
+        seed (Optional[int]):
+            random seed of the run
+        shots (Optional[int]):
+            number of shots of the run
+        options (Optional[Dict[str, Any]]):
+            any other run_* keyword arguments that change the result
+
+    Returns:
+        key (str):
+            hex SHA-256 digest
+    """
+    payload = json.dumps(
+        [params_hash, method, seed, shots, options or {}], sort_keys=True, default=repr
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    """
+    JSON-compatible copy of value, or None if it has no JSON form
+    """
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    if isinstance(value, dict):
+        items = {str(k): _jsonable(v) for k, v in value.items()}
+        return {k: v for k, v in items.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        items = [_jsonable(v) for v in value]
+        return None if any(v is None for v in items) else items
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return None
+
+
+class ResultStore(ABC):
+    """
+    Interface of persistent stores of compact optimization results.
+
+    A stored record is a dict with "key", "params_hash", "method", "seed", "shots",
+    "options", "opt_cost", "opt_state" (0/1 array ordered like the optimizer's
+    variable_names), "extras" (JSON-compatible run extras), "created" and
+    "accessed" (UNIX timestamps). Heavyweight raw results (e.g. dimod SampleSets)
+    are never stored.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Record of a key, or None if it is not stored
+        """
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Records of all stored keys among keys
+        """
+        records = {key: self.get(key) for key in keys}
+        return {key: record for key, record in records.items() if record is not None}
+
+    @abstractmethod
+    def put(self, record: Dict[str, Any]) -> None:
+        """
+        Insert or replace a record
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        params_hash: Optional[str] = None,
+        method: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Stored records matching all given fields, cheapest first
+        """
+
+    @abstractmethod
+    def evict(self) -> int:
+        """
+        Remove least recently used records until the store fits its size bound,
+        returning the number of removed records
+        """
+
+
+class SQLiteResultStore(ResultStore):
+    """
+    ResultStore in a single SQLite file, bounded in size with least recently used
+    eviction. Every operation opens its own connection, so the store can be shared
+    by worker processes.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            params_hash TEXT NOT NULL,
+            method TEXT NOT NULL,
+            seed INTEGER,
+            shots INTEGER,
+            options TEXT NOT NULL,
+            opt_cost REAL,
+            num_vars INTEGER NOT NULL,
+            opt_state BLOB NOT NULL,
+            extras TEXT NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL,
+            size INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS results_model ON results (params_hash, method);
+        CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+    """
+
+    _COLUMNS = (
+        "key, params_hash, method, seed, shots, options, opt_cost, num_vars, "
+        "opt_state, extras, created, accessed"
+    )
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = 100_000,
+        max_bytes: Optional[int] = 2**30,
+    ) -> None:
+        """
+        Creates SQLiteResultStore object.
+
+        Args:
+            path (str):
+                SQLite database file, created if it does not exist
+            max_entries (Optional[int]):
+                maximum number of records, or None for no bound
+            max_bytes (Optional[int]):
+                maximum total size of the records' states and extras, or None for
+                no bound
+        """
+        self._path = os.path.abspath(os.path.expanduser(path))
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(self._SCHEMA)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=30.0)
+
+    def _record(self, row: tuple) -> Dict[str, Any]:
+        (
+            key,
+            params_hash,
+            method,
+            seed,
+            shots,
+            options,
+            opt_cost,
+            num_vars,
+            opt_state,
+            extras,
+            created,
+            accessed,
+        ) = row
+        state = np.unpackbits(np.frombuffer(opt_state, dtype=np.uint8))[:num_vars]
+        return {
+            "key": key,
+            "params_hash": params_hash,
+            "method": method,
+            "seed": seed,
+            "shots": shots,
+            "options": json.loads(options),
+            "opt_cost": opt_cost,
+            "opt_state": state.astype(int),
+            "extras": json.loads(extras),
+            "created": created,
+            "accessed": accessed,
+        }
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT 1 FROM results WHERE key = ?", (key,))
+            return row.fetchone() is not None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(keys)
+        records: Dict[str, Dict[str, Any]] = {}
+        with closing(self._connect()) as conn, conn:
+            # stay below SQLite's limit on the number of bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                marks = ", ".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM results WHERE key IN ({marks})",
+                    chunk,
+                ).fetchall()
+                records.update((row[0], self._record(row)) for row in rows)
+                conn.execute(
+                    f"UPDATE results SET accessed = ? WHERE key IN ({marks})",
+                    [time.time()] + chunk,
+                )
+        return records
+
+    def put(self, record: Dict[str, Any]) -> None:
+        state = np.asarray(record["opt_state"], dtype=np.uint8)
+        opt_state = np.packbits(state).tobytes()
+        options = json.dumps(_jsonable(record.get("options") or {}), sort_keys=True)
+        extras = json.dumps(_jsonable(record.get("extras") or {}), sort_keys=True)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO results ({self._COLUMNS}, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record["key"],
+                    record["params_hash"],
+                    record["method"],
+                    record.get("seed"),
+                    record.get("shots"),
+                    options,
+                    record.get("opt_cost"),
+                    len(state),
+                    opt_state,
+                    extras,
+                    record.get("created", now),
+                    now,
+                    len(opt_state) + len(extras) + len(options),
+                ),
+            )
+        self.evict()
+
+    def query(
+        self,
+        params_hash: Optional[str] = None,
+        method: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        conditions, values = [], []
+        for column, value in (("params_hash", params_hash), ("method", method)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        sql = f"SELECT {self._COLUMNS} FROM results"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY opt_cost"
+        if limit is not None:
+            sql += " LIMIT ?"
+            values.append(limit)
+        with closing(self._connect()) as conn:
+            return [self._record(row) for row in conn.execute(sql, values)]
+
+    def evict(self) -> int:
+        with closing(self._connect()) as conn, conn:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            over_entries = max(0, count - self._max_entries) if self._max_entries else 0
+            over_bytes = max(0, total - self._max_bytes) if self._max_bytes else 0
+            if not over_entries and not over_bytes:
+                return 0
+
+            # oldest first, until both bounds are met
+            removed, freed = [], 0
+            rows = conn.execute("SELECT key, size FROM results ORDER BY accessed")
+            for key, size in rows:
+                if len(removed) >= over_entries and freed >= over_bytes:
+                    break
+                removed.append(key)
+                freed += size
+            conn.executemany(
+                "DELETE FROM results WHERE key = ?", [(key,) for key in removed]
+            )
+        return len(removed)
+
+    def clear(self) -> None:
+        """
+        Remove all records
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM results")
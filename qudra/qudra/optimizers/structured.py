@@ -0,0 +1,394 @@
+"""
+StructuredEnergyModel
+"""
+
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+
+class StructuredEnergyModel:
+    """
+    QUBO over variables partitioned into groups, e.g. the group of every plant
+    (see VariableRegistry.groups), whose only interactions across groups come from
+    one squared linear form:
+
+        E(x) = offset + sum_g (l_g . x_g + x_g^T U_g x_g) + beta (w . x + c - L)^2
+
+    The separable part is stored per group and the load term as the weight vector
+    w, so memory is O(num_groups * G^2) instead of the O(Q^2) of the dense QUBO.
+    With the running load s = w . x + c of a state, flipping a variable changes the
+    load term by beta d (2 (s - L) + d) with d = +-w_j, so energy deltas only touch
+    the variable's group and never the rest of the network.
+    """
+
+    def __init__(
+        self,
+        linear: np.ndarray,
+        quadratic: np.ndarray,
+        offset: float,
+        groups: np.ndarray,
+        weights: np.ndarray,
+        const: float,
+        beta: float,
+        target: float,
+        configurations: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Creates StructuredEnergyModel object.
+
+        Args:
+            linear (np.ndarray):
+                linear coefficients of each group, shape (num_groups, G)
+            quadratic (np.ndarray):
+                upper-triangular quadratic coefficients within each group, shape
+                (num_groups, G, G)
+            offset (float):
+                constant offset of the separable part
+            groups (np.ndarray):
+                array of shape (num_groups, G) listing the variables of each group.
+                Every variable must belong to exactly one group.
+            weights (np.ndarray):
+                weight of every variable in the linear form, shape (num_groups, G)
+            const (float):
+                constant of the linear form
+            beta (float):
+                weight of the squared linear form
+            target (float):
+                target L of the linear form
+            configurations (Optional[np.ndarray]):
+                0/1 array of shape (K, G) with the valid assignments of a group's
+                variables, used by solve. Defaults to one-hot assignments.
+        """
+        self._linear = np.asarray(linear, dtype=float)
+        self._quadratic = np.triu(np.asarray(quadratic, dtype=float), k=1)
+        self._coupling = self._quadratic + self._quadratic.transpose(0, 2, 1)
+        self._offset = float(offset)
+        self._groups = np.asarray(groups)
+        self._weights = np.asarray(weights, dtype=float)
+        self._const = float(const)
+        self._beta = float(beta)
+        self._target = float(target)
+        self._num_vars = self._groups.size
+        if configurations is None:
+            configurations = np.eye(self._groups.shape[1], dtype=np.int8)
+        self._configurations = np.asarray(configurations, dtype=float)
+
+        # separable energy and load of every configuration of every group, (n, K)
+        cfg = self._configurations
+        self._group_energies = self._linear @ cfg.T + np.einsum(
+            "kg,ngh,kh->nk", cfg, self._quadratic, cfg
+        )
+        self._group_loads = self._weights @ cfg.T
+
+    @property
+    def num_vars(self) -> int:
+        return self._num_vars
+
+    @property
+    def groups(self) -> np.ndarray:
+        return self._groups
+
+    @property
+    def configurations(self) -> np.ndarray:
+        return self._configurations
+
+    @property
+    def beta(self) -> float:
+        return self._beta
+
+    @property
+    def target(self) -> float:
+        return self._target
+
+    @target.setter
+    def target(self, target: float) -> None:
+        # only the load term depends on the target
+        self._target = float(target)
+
+    def _grouped(self, states: Union[np.ndarray, List[List[int]]]) -> np.ndarray:
+        return np.atleast_2d(np.asarray(states, dtype=float))[:, self._groups]
+
+    def loads(self, states: Union[np.ndarray, List[List[int]]]) -> np.ndarray:
+        """
+        Value s = w . x + c of the linear form for a batch of 0/1 states of shape
+        (S, Q). Shape (S,).
+        """
+        return self._loads(self._grouped(states))
+
+    def _loads(self, x: np.ndarray) -> np.ndarray:
+        return self._const + np.einsum("sng,ng->s", x, self._weights)
+
+    def energies(
+        self,
+        states: Union[np.ndarray, List[List[int]]],
+        loads: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        QUBO energy of a batch of 0/1 states of shape (S, Q).
+
+        Args:
+            states (Union[np.ndarray, List[List[int]]]):
+                0/1 states of shape (S, Q)
+            loads (Optional[np.ndarray]):
+                their loads, see loads. Computed if not provided.
+
+        Returns:
+            energies (np.ndarray): shape (S,)
+        """
+        x = self._grouped(states)
+        loads = self._loads(x) if loads is None else np.asarray(loads)
+        separable = np.einsum("sng,ng->s", x, self._linear) + np.einsum(
+            "sng,ngh,snh->s", x, self._quadratic, x
+        )
+        return self._offset + separable + self._beta * (loads - self._target) ** 2
+
+    def flip_deltas(
+        self,
+        states: Union[np.ndarray, List[List[int]]],
+        loads: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Energy change of flipping each variable of a batch of 0/1 states, using
+        only each variable's group and the states' loads.
+
+        Args:
+            states (Union[np.ndarray, List[List[int]]]):
+                0/1 states of shape (S, Q)
+            loads (Optional[np.ndarray]):
+                their loads, see loads. Computed if not provided.
+
+        Returns:
+            deltas (np.ndarray): shape (S, Q)
+        """
+        x = self._grouped(states)
+        loads = self._loads(x) if loads is None else np.asarray(loads)
+        sign = 1 - 2 * x
+        fields = self._linear + np.einsum("ngh,snh->sng", self._coupling, x)
+        d = sign * self._weights
+        load = self._beta * d * (2 * (loads[:, None, None] - self._target) + d)
+        deltas = np.zeros((len(x), self._num_vars))
+        deltas[:, self._groups] = sign * fields + load
+        return deltas
+
+    def states(self, choice: np.ndarray) -> np.ndarray:
+        """
+        0/1 states of shape (R, Q) from the configuration index of every group,
+        shape (R, num_groups).
+        """
+        choice = np.atleast_2d(choice)
+        states = np.zeros((len(choice), self._num_vars), dtype=np.int8)
+        states[:, self._groups] = self._configurations[choice]
+        return states
+
+    def _nearest_choice(self, states: np.ndarray) -> np.ndarray:
+        """
+        Configuration of every group closest (in Hamming distance) to the given
+        states, so invalid states are repaired to a nearby valid one.
+        """
+        grouped = self._grouped(states)
+        distances = np.abs(
+            grouped[:, :, None, :] - self._configurations[None, None, :, :]
+        ).sum(axis=-1)
+        return np.argmin(distances, axis=-1)
+
+    def _price_choice(self, price: float) -> np.ndarray:
+        """
+        Configuration of every group that minimizes its separable energy plus
+        price times its load
+        """
+        return np.argmin(self._group_energies + price * self._group_loads, axis=1)
+
+    def _choice_load(self, choice: np.ndarray) -> float:
+        rows = np.arange(len(choice))
+        return self._const + self._group_loads[rows, choice].sum()
+
+    def _choice_energy(self, choice: np.ndarray) -> float:
+        rows = np.arange(len(choice))
+        load = self._choice_load(choice)
+        separable = self._group_energies[rows, choice].sum()
+        return self._offset + separable + self._beta * (load - self._target) ** 2
+
+    def relaxed_choice(self, num_iterations: int = 60) -> np.ndarray:
+        """
+        Configuration of every group from the Lagrangian relaxation of the load
+        term: every group independently minimizes its separable energy plus a
+        price times its load, and the price is bisected towards the stationary
+        point price = 2 beta (s - L). Runs in O(num_groups * K) per iteration.
+
+        Args:
+            num_iterations (int):
+                number of bisection steps
+
+        Returns:
+            choice (np.ndarray):
+                configuration index of every group, shape (num_groups,)
+        """
+        lowest = self._const + self._group_loads.min(axis=1).sum()
+        highest = self._const + self._group_loads.max(axis=1).sum()
+        low = 2 * self._beta * (lowest - self._target)
+        high = 2 * self._beta * (highest - self._target)
+        low_choice, high_choice = self._price_choice(low), self._price_choice(high)
+        for _ in range(num_iterations):
+            price = 0.5 * (low + high)
+            choice = self._price_choice(price)
+            gap = price - 2 * self._beta * (self._choice_load(choice) - self._target)
+            if gap < 0:
+                low, low_choice = price, choice
+            else:
+                high, high_choice = price, choice
+        if self._choice_energy(low_choice) <= self._choice_energy(high_choice):
+            return low_choice
+        return high_choice
+
+    def _descend(self, choice: np.ndarray, max_passes: int, tol: float) -> int:
+        """
+        Move groups to their best configuration until no single group move lowers
+        the energy, in place. Every pass ranks the groups by their best move under
+        the current load and then applies the moves in that order, re-evaluating
+        each against the load left by the moves before it.
+
+        Returns:
+            num_moves (int): number of applied moves
+        """
+        rows = np.arange(len(choice))
+        energies, loads = self._group_energies, self._group_loads
+        load = self._choice_load(choice)
+        num_moves = 0
+        for _ in range(max_passes):
+            d = loads - loads[rows, choice][:, None]
+            deltas = energies - energies[rows, choice][:, None]
+            deltas += self._beta * d * (2 * (load - self._target) + d)
+            best = deltas.min(axis=1)
+            candidates = np.flatnonzero(best < -tol)
+            if len(candidates) == 0:
+                break
+            moved = False
+            for group in candidates[np.argsort(best[candidates])]:
+                d = loads[group] - loads[group, choice[group]]
+                delta = energies[group] - energies[group, choice[group]]
+                delta += self._beta * d * (2 * (load - self._target) + d)
+                new = int(np.argmin(delta))
+                if delta[new] < -tol:
+                    load += d[new]
+                    choice[group] = new
+                    num_moves += 1
+                    moved = True
+            if not moved:
+                break
+        return num_moves
+
+    def solve(
+        self,
+        num_reads: int = 1,
+        max_passes: int = 100,
+        initial_states: Optional[Union[np.ndarray, List[List[int]]]] = None,
+        perturbation: float = 0.05,
+        seed: Optional[Union[int, np.random.Generator]] = None,
+        tol: float = 1e-9,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Local search over valid configurations of every group. Every read starts
+        from the Lagrangian relaxation (see relaxed_choice) or from the given
+        states, further reads resample a random fraction of the groups first, and
+        then descends with single group moves (see _descend) to a local minimum.
+
+        Args:
+            num_reads (int):
+                number of reads
+            max_passes (int):
+                maximum number of descent passes per read
+            initial_states (Optional[Union[np.ndarray, List[List[int]]]]):
+                0/1 states of shape (S, Q) to start from, tiled over the reads.
+                Defaults to the Lagrangian relaxation.
+            perturbation (float):
+                fraction of the groups resampled at random for every read but the
+                first one of each initial state
+            seed (Optional[Union[int, np.random.Generator]]):
+                random seed of the perturbations
+            tol (float):
+                smallest energy decrease that counts as an improvement
+
+        Returns:
+            states (np.ndarray): final 0/1 states of shape (num_reads, Q)
+            energies (np.ndarray): QUBO energies of shape (num_reads,)
+        """
+        rng = np.random.default_rng(seed)
+        if initial_states is None:
+            starts = self.relaxed_choice()[None, :]
+        else:
+            starts = self._nearest_choice(initial_states)
+
+        num_groups, num_configurations = self._group_energies.shape
+        choice = starts[np.resize(np.arange(len(starts)), num_reads)].copy()
+        for read in range(len(starts), num_reads):
+            resampled = rng.random(num_groups) < perturbation
+            choice[read, resampled] = rng.integers(
+                0, num_configurations, size=resampled.sum()
+            )
+
+        for read in range(num_reads):
+            self._descend(choice[read], max_passes, tol)
+        energies = np.array([self._choice_energy(row) for row in choice])
+        return self.states(choice), energies
+
+    def polish(
+        self,
+        states: Union[np.ndarray, List[List[int]]],
+        max_steps: Optional[int] = None,
+        tol: float = 1e-9,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Repair and locally optimize a batch of states, e.g. the best samples of an
+        annealer. Every group is first set to its nearest valid configuration (see
+        _nearest_choice), then all states take steepest-descent steps together:
+        each step applies the single group move that lowers a state's energy the
+        most, until no move improves any state.
+
+        Args:
+            states (Union[np.ndarray, List[List[int]]]):
+                0/1 states of shape (S, Q)
+            max_steps (Optional[int]):
+                maximum number of steps. Defaults to running until every state is
+                at a local minimum.
+            tol (float):
+                smallest energy decrease that counts as an improvement
+
+        Returns:
+            states (np.ndarray): polished 0/1 states of shape (S, Q)
+            energies (np.ndarray): their QUBO energies, shape (S,)
+        """
+        choice = self._nearest_choice(states)
+        num_groups, num_configurations = self._group_energies.shape
+        rows = np.arange(num_groups)
+        energies, loads = self._group_energies, self._group_loads
+        load = self._const + loads[rows, choice].sum(axis=1)
+
+        active = np.ones(len(choice), dtype=bool)
+        num_steps = 0
+        while active.any() and (max_steps is None or num_steps < max_steps):
+            index = np.flatnonzero(active)
+            current = choice[index]
+            d = loads - loads[rows, current][..., None]  # (S, n, K)
+            deltas = energies - energies[rows, current][..., None]
+            deltas += (
+                self._beta * d * (2 * (load[index, None, None] - self._target) + d)
+            )
+
+            # steepest move of every state, over all groups and configurations
+            flat = deltas.reshape(len(index), -1)
+            best = flat.argmin(axis=1)
+            improving = flat[np.arange(len(index)), best] < -tol
+            active[index[~improving]] = False
+            group, new = np.divmod(best[improving], num_configurations)
+            load[index[improving]] += d[np.flatnonzero(improving), group, new]
+            choice[index[improving], group] = new
+            num_steps += 1
+
+        load = self._const + loads[rows, choice].sum(axis=1)
+        polished = (
+            self._offset
+            + energies[rows, choice].sum(axis=1)
+            + self._beta * (load - self._target) ** 2
+        )
+        return self.states(choice), polished
@@ -0,0 +1,450 @@
+"""
+VariableRegistry
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class VariableRegistry:
+    """
+    Maps every binary optimization variable of a distributed energy network to a
+    fixed integer column, for a given encoding of each plant's power level.
+
+    Each variable is identified by a (kind, plant, level) triple. Depending on the
+    encoding, plant i with power levels k = 0, ..., N uses:
+
+        "one_hot" (N+2 variables):
+            ("v", i, -1) -> v_i:  1 if plant i is turned off
+            ("z", i, k)  -> z_ik: 1 if plant i outputs power level k
+
+        "domain_wall" (N+1 variables):
+            ("d", i, j)  -> d_ij: thermometer code, plant i is on at level k when
+                            d_i0, ..., d_ik are 1 and the rest are 0, and off when
+                            all of them are 0
+
+        "binary" (ceil(log2(N+1))+1 variables):
+            ("v", i, -1) -> v_i:  1 if plant i is turned off
+            ("b", i, j)  -> b_ij: bit j of the power level of plant i
+
+    Columns are laid out with all v_i first (if the encoding has them), followed by
+    one block of level variables per plant:
+        v_i         -> i
+        (kind, i, j) -> n_v + i*width + j
+    """
+
+    KINDS = ["v", "z", "d", "b"]
+    ENCODINGS = ["one_hot", "domain_wall", "binary"]
+
+    def __init__(self, n: int, N: int, encoding: str = "one_hot") -> None:
+        """
+        Creates VariableRegistry object.
+
+        Args:
+            n (int):
+                number of plants
+            N (int):
+                number of power level steps, i.e. each plant has N+1 power levels
+            encoding (str):
+                "one_hot", "domain_wall" or "binary"
+        """
+        if encoding not in self.ENCODINGS:
+            raise ValueError(
+                f"Unknown encoding {encoding}, use one of {self.ENCODINGS}."
+            )
+        self._n = n
+        self._N = N
+        self._encoding = encoding
+
+        if encoding == "one_hot":
+            self._level_kind, width, has_v = "z", N + 1, True
+        elif encoding == "domain_wall":
+            self._level_kind, width, has_v = "d", N + 1, False
+        else:
+            self._level_kind, width, has_v = "b", self.num_bits(N), True
+
+        num_v = n if has_v else 0
+        self._index: Dict[str, np.ndarray] = {}
+        if has_v:
+            self._index["v"] = np.arange(n)
+        self._index[self._level_kind] = (
+            num_v + width * np.arange(n)[:, None] + np.arange(width)
+        )
+
+        num_vars = num_v + n * width
+        self._kinds = np.zeros(num_vars, dtype=np.int8)
+        self._plants = np.zeros(num_vars, dtype=int)
+        self._levels = np.full(num_vars, -1)
+        for kind, index in self._index.items():
+            self._kinds[index] = self.KINDS.index(kind)
+            self._plants[index] = np.arange(n).reshape((n,) + (1,) * (index.ndim - 1))
+            if index.ndim == 2:
+                self._levels[index] = np.arange(width)
+
+        self._names: Optional[List[str]] = None
+        self._name_to_index: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    @staticmethod
+    def num_bits(N: int) -> int:
+        """
+        Number of bits needed to represent the power levels 0, ..., N
+        """
+        return max(1, int(np.ceil(np.log2(N + 1))))
+
+    @property
+    def n(self) -> int:
+        return self._n
+
+    @property
+    def N(self) -> int:
+        return self._N
+
+    @property
+    def encoding(self) -> str:
+        return self._encoding
+
+    @property
+    def num_vars(self) -> int:
+        return len(self._kinds)
+
+    @property
+    def kinds(self) -> np.ndarray:
+        """
+        Kind code per column, indexing into KINDS
+        """
+        return self._kinds
+
+    @property
+    def plants(self) -> np.ndarray:
+        """
+        Plant index per column
+        """
+        return self._plants
+
+    @property
+    def levels(self) -> np.ndarray:
+        """
+        Level (or bit/wall position) per column, -1 for v variables
+        """
+        return self._levels
+
+    def kind_index(self, kind: str) -> np.ndarray:
+        """
+        Columns of all variables of a kind: shape (n,) for "v", (n, width) otherwise
+        """
+        if kind not in self._index:
+            raise ValueError(f"The {self._encoding} encoding has no {kind} variables.")
+        return self._index[kind]
+
+    @property
+    def groups(self) -> np.ndarray:
+        """
+        Columns of all variables belonging to each plant, v_i (if any) followed by
+        the plant's level variables. Shape (n, G), ascending along each row.
+        """
+        blocks = [self._index[kind] for kind in self.KINDS if kind in self._index]
+        return np.concatenate(
+            [block if block.ndim == 2 else block[:, None] for block in blocks], axis=1
+        )
+
+    @property
+    def group_size(self) -> int:
+        return self.groups.shape[1]
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Variable names per column. E.g. ["xv0", "xv1", "xz0,0", "xz0,1", ...]
+        """
+        if self._names is None:
+            names = [""] * self.num_vars
+            for col, (kind, plant, level) in enumerate(
+                zip(self._kinds, self._plants, self._levels)
+            ):
+                kind = self.KINDS[kind]
+                names[col] = (
+                    f"x{kind}{plant}" if kind == "v" else f"x{kind}{plant},{level}"
+                )
+            self._names = names
+        return self._names
+
+    def index(self, kind: str, plant: int, level: Optional[int] = None) -> int:
+        """
+        Column of a single variable.
+
+        Args:
+            kind (str):
+                "v", "z", "d" or "b"
+            plant (int):
+                plant index
+            level (Optional[int]):
+                power level (or bit/wall position), required for all kinds but "v"
+
+        Returns:
+            column (int):
+                integer column of the variable
+        """
+        index = self.kind_index(kind)
+        if index.ndim == 1:
+            return int(index[plant])
+        if level is None:
+            raise ValueError(f"Please provide a level for {kind} variables.")
+        return int(index[plant, level])
+
+    def columns(self, names: Sequence[str]) -> np.ndarray:
+        """
+        Columns of a sequence of variable names.
+
+        Args:
+            names (Sequence[str]):
+                variable names, e.g. from a QuadraticProgram or dimod SampleSet
+
+        Returns:
+            columns (np.ndarray):
+                integer column of each name
+        """
+        if self._name_to_index is None:
+            self._name_to_index = {name: i for i, name in enumerate(self.names)}
+        try:
+            return np.fromiter(
+                (self._name_to_index[name] for name in names),
+                dtype=int,
+                count=len(names),
+            )
+        except KeyError as err:
+            raise ValueError(f"Unknown variable name {err}.") from err
+
+    def reorder(
+        self, states: np.ndarray, names: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """
+        Reorder the columns of a batch of states into registry column order.
+
+        Args:
+            states (np.ndarray):
+                array of shape (S, Q) with one state per row
+            names (Optional[Sequence[str]]):
+                variable name of each column of states. If None, states are
+                assumed to already be in registry column order.
+
+        Returns:
+            states (np.ndarray):
+                array of shape (S, num_vars) in registry column order
+        """
+        states = np.atleast_2d(np.asarray(states))
+        if names is None:
+            return states
+        ordered = np.zeros((states.shape[0], self.num_vars), dtype=states.dtype)
+        ordered[:, self.columns(names)] = states
+        return ordered
+
+    # Encoding structure
+    # ==============================================================================
+    def bit_weights(self) -> np.ndarray:
+        """
+        Level weight of each bit of the "binary" encoding. The last bit is capped
+        so that every bit pattern decodes to a level in 0, ..., N.
+        """
+        num_bits = self.num_bits(self._N)
+        weights = 2 ** np.arange(num_bits)
+        weights[-1] = self._N - (2 ** (num_bits - 1) - 1)
+        return weights
+
+    def forms(self) -> Dict[str, Tuple[np.ndarray, float]]:
+        """
+        Linear forms over the G variables of a plant's group (in groups order), each
+        given as (coefficients (G,), constant). On valid states:
+
+            "commit": 1 if the plant is on, 0 if it is off
+            "on":     multiplies P_min in the power output
+            "level":  power level k of the plant when it is on, 0 when it is off
+
+        so that the power output is p_i = P_min_i*on + h_i*level.
+        """
+        G = self.group_size
+        commit, on, level = np.zeros(G), np.zeros(G), np.zeros(G)
+        if self._encoding == "one_hot":
+            commit[0], commit_const = -1.0, 1.0  # 1 - v_i
+            on[1:] = 1.0  # sum_k z_ik
+            level[1:] = np.arange(self._N + 1)  # sum_k k z_ik
+        elif self._encoding == "domain_wall":
+            commit[0], commit_const = 1.0, 0.0  # d_i0
+            on[0] = 1.0  # d_i0
+            level[1:] = 1.0  # sum_{j>0} d_ij
+        else:
+            commit[0], commit_const = -1.0, 1.0  # 1 - v_i
+            on[0] = -1.0  # 1 - v_i
+            level[1:] = self.bit_weights()  # sum_j w_j b_ij
+        on_const = 1.0 if self._encoding == "binary" else 0.0
+        return {
+            "commit": (commit, commit_const),
+            "on": (on, on_const),
+            "level": (level, 0.0),
+        }
+
+    def penalty(self) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Quadratic validity penalty over the G variables of a plant's group. It is 0
+        on valid states and at least 1 on invalid ones:
+
+            "one_hot":     (v_i + sum_k z_ik - 1)^2
+            "domain_wall": sum_j d_i,j+1 (1 - d_ij)
+            "binary":      sum_j v_i b_ij
+
+        Returns:
+            linear (np.ndarray): linear coefficients, shape (G,)
+            quadratic (np.ndarray): strictly upper-triangular coefficients, (G, G)
+            offset (float): constant offset
+        """
+        G = self.group_size
+        linear, quadratic, offset = np.zeros(G), np.zeros((G, G)), 0.0
+        if self._encoding == "one_hot":
+            linear[:] = -1.0
+            quadratic[np.triu_indices(G, k=1)] = 2.0
+            offset = 1.0
+        elif self._encoding == "domain_wall":
+            linear[1:] = 1.0
+            quadratic[np.arange(G - 1), np.arange(1, G)] = -1.0
+        else:
+            quadratic[0, 1:] = 1.0
+        return linear, quadratic, offset
+
+    def configurations(self) -> np.ndarray:
+        """
+        All valid assignments of a plant's group variables, one per row, shape
+        (K, G). The first row is the plant turned off.
+        """
+        G = self.group_size
+        if self._encoding == "one_hot":
+            return np.eye(G, dtype=np.int8)
+        if self._encoding == "domain_wall":
+            return np.tri(G + 1, G, k=-1, dtype=np.int8)
+        num_bits = G - 1
+        patterns = (np.arange(2**num_bits)[:, None] >> np.arange(num_bits)) & 1
+        off = np.zeros((1, G), dtype=np.int8)
+        off[0, 0] = 1
+        on = np.concatenate(
+            [np.zeros((len(patterns), 1), dtype=np.int8), patterns.astype(np.int8)],
+            axis=1,
+        )
+        return np.concatenate([off, on])
+
+    def indicators(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Indicator of every valid assignment (see configurations) as a linear form
+        over a plant's group variables: on valid states, form k is 1 if the group
+        is in configuration k and 0 otherwise.
+
+            "one_hot":     v_i, z_i0, ..., z_iN
+            "domain_wall": 1 - d_i0, d_i0 - d_i1, ..., d_iN
+
+        Returns:
+            coeffs (np.ndarray): shape (K, G)
+            const (np.ndarray): shape (K,)
+        """
+        G = self.group_size
+        if self._encoding == "one_hot":
+            return np.eye(G), np.zeros(G)
+        if self._encoding == "domain_wall":
+            coeffs, const = np.zeros((G + 1, G)), np.zeros(G + 1)
+            coeffs[0, 0], const[0] = -1.0, 1.0
+            coeffs[np.arange(1, G + 1), np.arange(G)] = 1.0
+            coeffs[np.arange(1, G), np.arange(1, G)] = -1.0
+            return coeffs, const
+        raise ValueError(
+            f"The {self._encoding} encoding has no linear indicators of its "
+            f"configurations."
+        )
+
+    def encode(self, on: np.ndarray, level: np.ndarray) -> np.ndarray:
+        """
+        Encode a batch of dispatch decisions into valid states. Inverse of decode.
+
+        Args:
+            on (np.ndarray):
+                (S, n) booleans, True if the plant outputs power
+            level (np.ndarray):
+                (S, n) power level of each plant, ignored where it is off
+
+        Returns:
+            states (np.ndarray):
+                array of shape (S, num_vars) of 0/1s in registry column order
+        """
+        on = np.atleast_2d(np.asarray(on, dtype=bool))
+        level = np.where(on, np.atleast_2d(np.asarray(level, dtype=int)), 0)
+        states = np.zeros((on.shape[0], self.num_vars), dtype=int)
+        if "v" in self._index:
+            states[:, self._index["v"]] = ~on
+        if self._encoding == "one_hot":
+            columns = self._index["z"][np.arange(self._n), level]
+            np.put_along_axis(states, columns, on, axis=1)
+        elif self._encoding == "domain_wall":
+            thermometer = np.arange(self._N + 1) <= level[..., None]
+            states[:, self._index["d"]] = thermometer & on[..., None]
+        else:
+            # the capped top bit takes the levels it can, the rest are plain binary
+            weights = self.bit_weights()
+            top = level >= 2 ** (len(weights) - 1)
+            rest = np.where(top, level - weights[-1], level)
+            bits = (rest[..., None] >> np.arange(len(weights))) & 1
+            bits[..., -1] = top
+            states[:, self._index["b"]] = bits
+        return states
+
+    def decode(self, states: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode a batch of states in registry column order.
+
+        Args:
+            states (np.ndarray):
+                array of shape (S, num_vars) of 0/1s
+
+        Returns:
+            vs (np.ndarray):
+                (S, n) 0/1s, 1 if the plant is turned off
+            on (np.ndarray):
+                (S, n) booleans, True if the plant outputs power
+            level (np.ndarray):
+                (S, n) power level of each plant, 0 if it is off
+        """
+        N = self._N
+        if self._encoding == "one_hot":
+            # highest active power level of each plant, 0 if none is active
+            vs = states[:, self._index["v"]]
+            zs = states[:, self._index["z"]]
+            active = zs.any(axis=-1)
+            level = np.where(active, N - np.argmax(zs[..., ::-1], axis=-1), 0)
+            return vs, vs != 1, level
+        if self._encoding == "domain_wall":
+            # number of leading ones of the thermometer code
+            ds = states[:, self._index["d"]]
+            lead = np.cumprod(ds, axis=-1).sum(axis=-1)
+            on = lead > 0
+            return (~on).astype(states.dtype), on, np.maximum(lead - 1, 0)
+        vs = states[:, self._index["v"]]
+        bits = states[:, self._index["b"]]
+        level = np.minimum(bits @ self.bit_weights(), N)
+        on = vs != 1
+        return vs, on, np.where(on, level, 0)
+
+    def valid(self, states: np.ndarray) -> np.ndarray:
+        """
+        Whether each plant's group variables form a valid assignment, i.e. have a
+        zero validity penalty.
+
+        Args:
+            states (np.ndarray):
+                array of shape (S, num_vars) of 0/1s
+
+        Returns:
+            valid (np.ndarray):
+                (S, n) booleans
+        """
+        linear, quadratic, offset = self.penalty()
+        x = np.atleast_2d(np.asarray(states))[:, self.groups].astype(float)
+        penalty = offset + x @ linear + np.sum((x @ quadratic) * x, axis=-1)
+        return penalty < 0.5
@@ -7,6 +7,7 @@ from setuptools import setup, find_namespace_packages
 
 REQUIREMENTS = [
     "numpy",
+    "scipy",
     "qiskit",
     "qiskit-optimization",
     "dimod",
@@ -32,6 +33,7 @@ EXTRA_REQUIREMENTS = {
         "mkdocs-section-index",
         "mkdocstrings",
     ],
+    "parquet": ["pandas", "pyarrow"],
 }
 
 # Read long description from README.
@@ -56,7 +58,7 @@ setup(
     author="Asil Qraini, Fouad Afiouni, Gargi Chandrakar, Nurgazy Seidaliev, Sahar Ben Rached, Salem Al Haddad, Sarthak Prasad Malla. Mentors: Akash Kant, Shantanu Jha.",
     author_email="shantanu.rajesh.jha@gmail.com",
     license="MIT",
-    packages=find_namespace_packages(exclude=["tutorials*"]),
+    packages=find_namespace_packages(exclude=["tests*", "tutorials*"]),
     install_requires=REQUIREMENTS,
     extras_require=EXTRA_REQUIREMENTS,
     classifiers=[
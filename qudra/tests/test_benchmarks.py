@@ -0,0 +1,14 @@
+"""
+Tests of the benchmark networks
+"""
+
+import pytest
+
+from qudra.benchmarks import gen_benchmark_params
+from qudra.optimizers import DistributedEnergyOptimizer
+
+
+@pytest.mark.parametrize("n, N", [(2, 1), (4, 3), (8, 7), (20, 10)])
+def test_benchmark_networks_are_solved_exactly(n, N):
+    optimizer = DistributedEnergyOptimizer(gen_benchmark_params(n, N))
+    assert optimizer.run_exact_dp().extras["exact"]
@@ -0,0 +1,177 @@
+"""
+Tests of DistributedEnergyOptimizer
+"""
+
+import numpy as np
+import pytest
+
+from qudra.benchmarks import gen_benchmark_params
+from qudra.optimizers import DistributedEnergyOptimizer, ModelCache
+
+
+def _brute_force_minimum(optimizer):
+    """
+    Lowest QUBO energy over all 2^Q states
+    """
+    num_vars = optimizer.variables.num_vars
+    codes = np.arange(2**num_vars)
+    states = (codes[:, None] >> np.arange(num_vars)) & 1
+    return optimizer.qubo_energies(states).min()
+
+
+# Incremental updates
+# ==============================================================================
+def _warm_cache(tmp_path, params):
+    cache = ModelCache(str(tmp_path))
+    DistributedEnergyOptimizer(dict(params), cache=cache).linear_coeffs
+    return cache
+
+
+@pytest.mark.parametrize("update", ["demand", "costs", "alpha"])
+def test_update_drops_program_loaded_from_cache(tmp_path, update):
+    params = gen_benchmark_params(3, 2)
+    cache = _warm_cache(tmp_path, params)
+    optimizer = DistributedEnergyOptimizer(dict(params), cache=cache)
+    cache.put(optimizer.model_key, "quadratic_program", "old")
+    assert optimizer.quadratic_program == "old"
+    assert optimizer._linear_coeffs is None
+
+    if update == "demand":
+        optimizer.update_demand(params["L"] * 0.9)
+    elif update == "costs":
+        optimizer.update_costs(B=[b + 1 for b in params["B"]])
+    else:
+        optimizer.update_penalties(alpha=2 * optimizer.params["alpha"])
+    cache.put(optimizer.model_key, "quadratic_program", "new")
+    assert optimizer.quadratic_program == "new"
+
+
+def test_update_demand_with_warm_cache_solves_new_program(tmp_path):
+    pytest.importorskip("qiskit_optimization")
+    params = gen_benchmark_params(3, 2)
+    cache = _warm_cache(tmp_path, params)
+    optimizer = DistributedEnergyOptimizer(dict(params), cache=cache)
+    optimizer.quadratic_program
+    optimizer.update_demand(params["L"] * 0.9)
+
+    fresh = DistributedEnergyOptimizer(dict(params, L=params["L"] * 0.9))
+    objective = optimizer.quadratic_program.objective
+    assert np.isclose(objective.constant, fresh.offset)
+    assert np.allclose(objective.linear.to_array(), fresh.linear_coeffs)
+
+
+# Simulated annealing
+# ==============================================================================
+def test_dimod_engine_is_reproducible_with_seed():
+    optimizer = DistributedEnergyOptimizer(gen_benchmark_params(4, 3))
+    summaries = [
+        optimizer.run_annealer_sim(
+            label=label, engine="dimod", num_shots=40, chunk_size=10, seed=7
+        ).samples
+        for label in ["first", "second"]
+    ]
+    assert np.array_equal(summaries[0].states, summaries[1].states)
+    assert np.array_equal(summaries[0].counts, summaries[1].counts)
+    assert summaries[0].stats == summaries[1].stats
+
+
+# Penalty calibration
+# ==============================================================================
+def test_calibrate_penalties_is_reproducible_with_seed():
+    params = gen_benchmark_params(4, 3)
+    reports = [
+        DistributedEnergyOptimizer(dict(params)).calibrate_penalties(
+            tune=True, num_shots=50, seed=3
+        )
+        for _ in range(2)
+    ]
+    probabilities = [
+        [trial["success_probability"] for trial in report["trials"]]
+        for report in reports
+    ]
+    assert probabilities[0] == probabilities[1]
+    assert reports[0]["target_energy"] == reports[1]["target_energy"]
+
+
+# Parallel runs
+# ==============================================================================
+def test_portfolio_of_qubo_free_methods_skips_coefficient_arrays():
+    optimizer = DistributedEnergyOptimizer(gen_benchmark_params(4, 3))
+    results = optimizer.run_portfolio(methods=("exact_dp", "structured"))
+    assert optimizer._linear_coeffs is None
+    assert results.extras["feasible"]
+    assert set(results.results) == {"exact_dp", "structured"}
+
+
+def test_batch_of_qubo_free_method_skips_coefficient_arrays():
+    optimizer = DistributedEnergyOptimizer(gen_benchmark_params(4, 3))
+    L = optimizer.params["L"]
+    results = optimizer.run_batch([L, 0.9 * L, 0.8 * L], method="exact_dp")
+    assert optimizer._linear_coeffs is None
+    assert np.allclose(
+        results.results["opt_cost"],
+        [
+            DistributedEnergyOptimizer(dict(optimizer.params, L=demand)).qubo_energies(
+                states[None]
+            )[0]
+            for demand, states in zip(results.results["L"], results.results["states"])
+        ],
+    )
+
+
+# Dynamic programming
+# ==============================================================================
+# power levels on a 0.1 grid, so that the dynamic programming is exact
+DP_PARAMS = {
+    "A": [2.0, 3.5, 1.2],
+    "B": [1.1, 0.7, 1.6],
+    "C": [0.3, 0.1, 0.2],
+    "P_min": [1.0, 0.5, 1.5],
+    "P_max": [2.0, 1.7, 2.3],
+    "L": 3.7,
+    "N": 2,
+}
+
+
+@pytest.mark.parametrize("encoding", ["one_hot", "domain_wall", "binary"])
+def test_exact_dp_matches_brute_force(encoding):
+    optimizer = DistributedEnergyOptimizer(dict(DP_PARAMS, encoding=encoding))
+    result = optimizer.run_exact_dp()
+    assert result.extras["exact"]
+    assert np.isclose(result.extras["opt_cost"], _brute_force_minimum(optimizer))
+
+
+@pytest.mark.parametrize("encoding", ["one_hot", "domain_wall", "binary"])
+def test_snapped_dp_evaluates_its_dispatch_exactly(encoding):
+    optimizer = DistributedEnergyOptimizer(dict(DP_PARAMS, encoding=encoding))
+    result = optimizer.run_exact_dp(max_states=8)
+    state = optimizer._best_state(result)
+    assert not result.extras["exact"]
+    assert optimizer.variables.valid([state]).all()
+    assert np.isclose(result.extras["opt_cost"], optimizer.qubo_energies([state])[0])
+    assert result.extras["opt_cost"] >= _brute_force_minimum(optimizer) - 1e-9
+
+
+# Gate-based optimization
+# ==============================================================================
+def test_fast_statevector_without_likely_states_keeps_most_probable():
+    optimizer = DistributedEnergyOptimizer(gen_benchmark_params(2, 1))
+    result = optimizer._run_fast_statevector(
+        "qaoa_fast", "qaoa", seed=0, min_probability=1.0
+    )
+    probabilities = result.results["probabilities"]
+    state = np.asarray(result.extras["opt_state"])
+    assert np.array_equal(result.results["states"][0], state)
+    assert result.extras["opt_cost"] == result.results["energies"][0]
+    assert probabilities[0] < 1.0
+
+
+@pytest.mark.parametrize("method", ["classical", "qaoa"])
+def test_min_eigen_optimizers_solve_the_quadratic_program(method):
+    pytest.importorskip("qiskit_optimization")
+    optimizer = DistributedEnergyOptimizer(gen_benchmark_params(2, 1))
+    result = getattr(optimizer, f"run_{method}")()
+    state = optimizer._best_state(result)
+    assert np.isclose(result.results.fval, optimizer.qubo_energies([state])[0])
+    if method == "classical":
+        assert np.isclose(result.results.fval, _brute_force_minimum(optimizer))
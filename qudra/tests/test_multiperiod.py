@@ -0,0 +1,81 @@
+"""
+Tests of MultiPeriodOptimizer
+"""
+
+import numpy as np
+import pytest
+
+from qudra.optimizers import DistributedEnergyOptimizer, MultiPeriodOptimizer
+
+# levels 1.0, 1.5, 2.0 and 0.5, 1.1, 1.7
+PARAMS = {
+    "A": [2.0, 1.0],
+    "B": [1.1, 0.7],
+    "C": [0.3, 0.1],
+    "P_min": [1.0, 0.5],
+    "P_max": [2.0, 1.7],
+    "L": [2.6, 1.5],
+    "N": 2,
+    "alpha": 20.0,
+    "beta": 3.0,
+    "S": [4.0, 2.5],
+    "R": [0.5, 0.7],
+    "gamma": 7.0,
+    "initial_on": [True, False],
+}
+
+
+def _all_states(num_vars):
+    return (np.arange(2**num_vars)[:, None] >> np.arange(num_vars)) & 1
+
+
+@pytest.mark.parametrize("encoding", ["one_hot", "domain_wall"])
+def test_energy_is_period_costs_plus_transitions(encoding):
+    optimizer = MultiPeriodOptimizer(dict(PARAMS, encoding=encoding))
+    states = _all_states(optimizer.variables.num_vars)
+    valid = optimizer.variables.valid(states).all(axis=1)
+    states = states[valid]
+
+    expected = np.zeros(len(states))
+    on, ps = [], []
+    for t, L in enumerate(PARAMS["L"]):
+        period = DistributedEnergyOptimizer(dict(PARAMS, L=L, encoding=encoding))
+        period_states = states[:, optimizer.period_columns[t]]
+        expected += period.qubo_energies(period_states)
+        vs, _, p = period.decode_samples(period_states)
+        on.append(1 - vs)
+        ps.append(p)
+    S, R = np.asarray(PARAMS["S"]), np.asarray(PARAMS["R"])
+    expected += on[0] @ (S * (1 - np.asarray(PARAMS["initial_on"])))
+    expected += (on[1] * (1 - on[0])) @ S
+    ramps = (on[0] * on[1] > 0) & (np.abs(ps[1] - ps[0]) > R + 1e-9)
+    expected += PARAMS["gamma"] * ramps.sum(axis=1)
+
+    assert ramps.any() and (on[1] * (1 - on[0])).any()
+    assert np.allclose(optimizer.qubo_energies(states), expected)
+    assert np.allclose(optimizer.evaluate(states)["ramp_violations"], ramps.sum(axis=1))
+
+
+@pytest.mark.parametrize(
+    "update, changes",
+    [
+        ("demand", {"L": [2.0, 3.1]}),
+        ("costs", {"A": [1.0, 3.0], "C": [0.2, 0.4]}),
+        ("penalties", {"alpha": 11.0, "beta": 5.0}),
+    ],
+)
+def test_updates_rebuild_the_blocks(update, changes):
+    optimizer = MultiPeriodOptimizer(dict(PARAMS))
+    rng = np.random.default_rng(0)
+    states = rng.integers(0, 2, (20, optimizer.variables.num_vars))
+    before = optimizer.qubo_energies(states)
+
+    getattr(optimizer, f"update_{update}")(**changes)
+    fresh = MultiPeriodOptimizer(dict(PARAMS, **changes))
+    after = optimizer.qubo_energies(states)
+    assert not np.allclose(after, before)
+    assert np.allclose(after, fresh.qubo_energies(states))
+    assert np.allclose(optimizer.linear_coeffs, fresh.linear_coeffs)
+    assert np.allclose(
+        optimizer.quadratic_coeffs.toarray(), fresh.quadratic_coeffs.toarray()
+    )
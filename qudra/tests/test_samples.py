@@ -0,0 +1,23 @@
+"""
+Tests of SampleAggregator
+"""
+
+import numpy as np
+
+from qudra.optimizers import SampleAggregator
+
+
+def test_tied_state_that_dropped_out_is_not_readmitted():
+    states = np.array([[0, 0, 1], [0, 1, 0], [1, 0, 0]])
+    aggregator = SampleAggregator(top_k=2)
+    aggregator.add(states, np.full(3, 0.1 + 0.2))
+    kept = aggregator.summary().states
+    dropped = next(s for s in states if not (kept == s).all(axis=1).any())
+
+    # the same energy, up to rounding
+    aggregator.add(np.array([dropped, kept[1]]), [0.3, 0.1 + 0.2], [10, 1])
+    summary = aggregator.summary()
+    assert np.array_equal(summary.states, kept)
+    assert summary.counts.tolist() == [1, 2]
+    assert summary.stats["num_distinct"] == 3
+    assert summary.success_probability() == 3 / 14
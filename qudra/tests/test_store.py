@@ -0,0 +1,22 @@
+"""
+Tests of ResultStore
+"""
+
+import pytest
+
+from qudra.optimizers import ResultStore, SQLiteResultStore
+
+
+def test_store_missing_a_method_cannot_be_created():
+    class IncompleteStore(ResultStore):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
+
+
+def test_sqlite_store_implements_the_interface(tmp_path):
+    store = SQLiteResultStore(str(tmp_path / "results.sqlite"))
+    assert isinstance(store, ResultStore)
+    assert store.get("missing") is None
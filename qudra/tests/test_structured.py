@@ -0,0 +1,53 @@
+"""
+Tests of StructuredEnergyModel
+"""
+
+import numpy as np
+import pytest
+
+from qudra.benchmarks import gen_benchmark_params
+from qudra.optimizers import DistributedEnergyOptimizer, VariableRegistry
+
+
+def _optimizer_and_states(encoding, num_states=50):
+    optimizer = DistributedEnergyOptimizer(
+        dict(gen_benchmark_params(4, 3, seed=2), encoding=encoding)
+    )
+    rng = np.random.default_rng(0)
+    states = rng.integers(0, 2, (num_states, optimizer.variables.num_vars))
+    return optimizer, states
+
+
+@pytest.mark.parametrize("encoding", VariableRegistry.ENCODINGS)
+def test_energies_match_qubo(encoding):
+    optimizer, states = _optimizer_and_states(encoding)
+    assert np.allclose(
+        optimizer.structured_model.energies(states), optimizer.qubo_energies(states)
+    )
+
+
+@pytest.mark.parametrize("encoding", VariableRegistry.ENCODINGS)
+def test_flip_deltas_match_qubo(encoding):
+    optimizer, states = _optimizer_and_states(encoding, num_states=5)
+    deltas = optimizer.structured_model.flip_deltas(states)
+    energies = optimizer.qubo_energies(states)
+    for j in range(optimizer.variables.num_vars):
+        flipped = states.copy()
+        flipped[:, j] ^= 1
+        assert np.allclose(deltas[:, j], optimizer.qubo_energies(flipped) - energies)
+
+
+@pytest.mark.parametrize("encoding", VariableRegistry.ENCODINGS)
+def test_polish_reaches_a_valid_local_minimum(encoding):
+    optimizer, states = _optimizer_and_states(encoding, num_states=10)
+    registry = optimizer.variables
+    polished, energies = optimizer.structured_model.polish(states)
+    assert registry.valid(polished).all()
+    assert np.allclose(energies, optimizer.qubo_energies(polished))
+
+    # no move of a single plant to another configuration lowers the energy
+    for state, energy in zip(polished, energies):
+        for group in registry.groups:
+            moved = np.repeat(state[None], len(registry.configurations()), axis=0)
+            moved[:, group] = registry.configurations()
+            assert optimizer.qubo_energies(moved).min() >= energy - 1e-9
@@ -0,0 +1,68 @@
+"""
+Tests of VariableRegistry
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from qudra.benchmarks import gen_benchmark_params
+from qudra.optimizers import DistributedEnergyOptimizer, VariableRegistry
+
+ENCODINGS = VariableRegistry.ENCODINGS
+
+
+def _all_dispatches(n, N):
+    """
+    Every combination of on/off and power level of n plants
+    """
+    choices = [(False, 0)] + [(True, k) for k in range(N + 1)]
+    dispatches = np.array(list(itertools.product(choices, repeat=n)))
+    return dispatches[..., 0].astype(bool), dispatches[..., 1]
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("N", [1, 2, 3, 6])
+def test_encode_decode_round_trip(encoding, N):
+    registry = VariableRegistry(2, N, encoding)
+    on, level = _all_dispatches(2, N)
+    states = registry.encode(on, level)
+    vs, decoded_on, decoded_level = registry.decode(states)
+    assert registry.valid(states).all()
+    assert np.array_equal(decoded_on, on)
+    assert np.array_equal(decoded_level, level)
+    assert np.array_equal(vs, ~on)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("N", [1, 3, 6])
+def test_forms_on_valid_states(encoding, N):
+    registry = VariableRegistry(2, N, encoding)
+    on, level = _all_dispatches(2, N)
+    x = registry.encode(on, level)[:, registry.groups]
+    expected = {"commit": on, "on": on, "level": level}
+    for name, (coeffs, const) in registry.forms().items():
+        assert np.allclose(x @ coeffs + const, expected[name])
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_invalid_states_are_detected(encoding):
+    registry = VariableRegistry(1, 3, encoding)
+    G = registry.group_size
+    states = (np.arange(2**G)[:, None] >> np.arange(G)) & 1
+    valid = registry.valid(states)[:, 0]
+    configurations = {tuple(row) for row in registry.configurations()}
+    assert {tuple(row) for row in states[valid]} == configurations
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("sparse", [False, True])
+def test_qubo_minimum_is_a_valid_encoding(encoding, sparse):
+    optimizer = DistributedEnergyOptimizer(
+        dict(gen_benchmark_params(3, 2, seed=1), encoding=encoding, sparse=sparse)
+    )
+    num_vars = optimizer.variables.num_vars
+    states = (np.arange(2**num_vars)[:, None] >> np.arange(num_vars)) & 1
+    energies = optimizer.qubo_energies(states)
+    assert optimizer.variables.valid(states[[np.argmin(energies)]]).all()